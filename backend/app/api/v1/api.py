@@ -2,7 +2,7 @@
 API v1 路由整合
 """
 from fastapi import APIRouter
-from app.api.v1 import auth, water_quality, dashboard
+from app.api.v1 import auth, water_quality, dashboard, grading_standards
 
 api_router = APIRouter()
 
@@ -12,5 +12,8 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 # 水质数据相关路由
 api_router.include_router(water_quality.router, prefix="/water-quality", tags=["water-quality"])
 
+# 等级标准相关路由
+api_router.include_router(grading_standards.router, prefix="/grading-standards", tags=["grading-standards"])
+
 # 大屏可视化路由（公开访问）
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"]) 
\ No newline at end of file
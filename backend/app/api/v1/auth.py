@@ -2,26 +2,25 @@
 认证API路由
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.base import get_db
+from app.db.async_base import RouteSession, get_async_db
 from app.schemas.user import UserLogin, Token, UserResponse
-from app.services.user_service import UserService
-from app.core.deps import get_current_user, get_token
+from app.services.async_service import AsyncUserService
+from app.core.deps import get_current_user_async, get_token
 from config import settings
 
 router = APIRouter()
 
 
 @router.post("/login", response_model=Token, summary="用户登录")
-def login(
+async def login(
     user_login: UserLogin,
-    db: Session = Depends(get_db)
+    db: RouteSession = Depends(get_async_db)
 ):
     """用户登录"""
-    user_service = UserService(db)
+    user_service = AsyncUserService(db)
     
     # 认证用户
-    user = user_service.authenticate_user(user_login.username, user_login.password)
+    user = await user_service.authenticate_user(user_login.username, user_login.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,7 +35,7 @@ def login(
         )
     
     # 生成访问令牌
-    access_token = user_service.create_access_token_for_user(user)
+    access_token = await user_service.create_access_token_for_user(user)
     
     return Token(
         access_token=access_token,
@@ -47,16 +46,16 @@ def login(
 
 
 @router.post("/logout", summary="用户退出登录")
-def logout(
+async def logout(
     token: str = Depends(get_token),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """用户退出登录"""
-    user_service = UserService(db)
+    user_service = AsyncUserService(db)
     
     # 将token加入黑名单
-    success = user_service.logout_user(token)
+    success = await user_service.logout_user(token)
     
     if not success:
         raise HTTPException(
@@ -68,23 +67,23 @@ def logout(
 
 
 @router.get("/me", response_model=UserResponse, summary="获取当前用户信息")
-def get_current_user_info(
-    current_user = Depends(get_current_user)
+async def get_current_user_info(
+    current_user = Depends(get_current_user_async)
 ):
     """获取当前用户信息"""
     return UserResponse.from_orm(current_user)
 
 
 @router.post("/refresh", response_model=Token, summary="刷新令牌")
-def refresh_token(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def refresh_token(
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """刷新令牌"""
-    user_service = UserService(db)
+    user_service = AsyncUserService(db)
     
     # 生成新的访问令牌
-    access_token = user_service.create_access_token_for_user(current_user)
+    access_token = await user_service.create_access_token_for_user(current_user)
     
     return Token(
         access_token=access_token,
@@ -0,0 +1,85 @@
+"""
+等级标准API路由
+"""
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.db.base import get_db
+from app.schemas.grading_standard import (
+    GradingStandardCreate,
+    GradingStandardResponse,
+    GradingWhatIfResponse
+)
+from app.services.grading_standard_service import GradingStandardService
+from app.utils.water_quality_calculator import CompiledStandard
+from app.core.deps import get_current_admin_user, get_current_user
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[GradingStandardResponse], summary="获取等级标准列表")
+def get_grading_standards(
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """获取全部等级标准及其版本"""
+    standards = GradingStandardService(db).get_standards()
+    return [GradingStandardResponse.from_orm(standard) for standard in standards]
+
+
+@router.post("/", response_model=GradingStandardResponse, summary="创建等级标准")
+def create_grading_standard(
+    standard_data: GradingStandardCreate,
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """创建等级标准（同名标准创建新版本，创建后不自动生效）"""
+    standard = GradingStandardService(db).create_standard(standard_data)
+    return GradingStandardResponse.from_orm(standard)
+
+
+@router.post("/what-if", response_model=GradingWhatIfResponse, summary="预览未保存标准的重新评级结果")
+def preview_unsaved_grading_standard(
+    standard_data: GradingStandardCreate,
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """按请求中的阈值对全部历史数据重新评级并统计等级变化（不保存标准，不修改已存储的等级）"""
+    compiled = CompiledStandard(standard_data.thresholds, standard_data.name)
+    return GradingStandardService(db).what_if(compiled)
+
+
+@router.get("/{standard_id}/what-if", response_model=GradingWhatIfResponse, summary="预览等级标准的重新评级结果")
+def preview_grading_standard(
+    standard_id: int,
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """按指定标准对全部历史数据重新评级并统计等级变化（不修改已存储的等级）"""
+    grading_standard_service = GradingStandardService(db)
+    
+    standard = grading_standard_service.get_standard(standard_id)
+    if not standard:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="等级标准不存在"
+        )
+    
+    compiled = grading_standard_service.compile(standard)
+    return grading_standard_service.what_if(compiled, standard_id=standard.id)
+
+
+@router.post("/{standard_id}/activate", response_model=GradingStandardResponse, summary="设置生效的等级标准")
+def activate_grading_standard(
+    standard_id: int,
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """设置生效的等级标准（已存储的等级不会自动重新计算，需要时调用重新计算等级接口）"""
+    standard = GradingStandardService(db).activate_standard(standard_id)
+    if not standard:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="等级标准不存在"
+        )
+    return GradingStandardResponse.from_orm(standard)
@@ -1,8 +1,10 @@
 """
 水质数据API路由
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.db.base import get_db
 from app.schemas.water_quality import (
@@ -12,16 +14,35 @@ from app.schemas.water_quality import (
     WaterQualityListResponse,
     WaterQualityQuery
 )
+from app.schemas.recalculation_job import RecalculationJobResponse
 from app.services.water_quality_service import WaterQualityService
-from app.core.deps import get_current_admin_user, get_current_user
-from app.utils.common import parse_datetime
+from app.services.async_service import AsyncWaterQualityService
+from app.db.async_base import RouteSession, get_async_db
+from app.services.recalculation_service import RecalculationService, run_recalculation_job
+from app.services.export_service import EXPORT_FORMATS, GZIP_FORMATS, stream_export
+from app.utils.arrow_io import import_pyarrow
+from app.core.deps import get_current_admin_user, get_current_user, get_current_user_async
+from app.utils.common import parse_datetime, decode_cursor
 from config import settings
 
 router = APIRouter()
 
 
+def _parse_date_param(value: Optional[str], detail: str):
+    """解析日期查询参数，格式错误时返回400"""
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=detail
+        )
+
+
 @router.get("/", response_model=WaterQualityListResponse, summary="获取水质数据列表")
-def get_water_quality_list(
+async def get_water_quality_list(
     page: int = Query(1, ge=1, description="页码"),
     per_page: int = Query(20, ge=1, le=100, description="每页数量"),
     river_name: str = Query(None, description="河道名称"),
@@ -29,32 +50,32 @@ def get_water_quality_list(
     comprehensive_quality_level: str = Query(None, description="综合水质等级"),
     sampling_date_start: str = Query(None, description="取样开始日期"),
     sampling_date_end: str = Query(None, description="取样结束日期"),
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: str = Query(None, description="分页游标（上一页返回的next_cursor），指定时忽略页码"),
+    count_mode: str = Query(None, description="总数计算方式: exact(精确), estimated(估算), has_more(不计算总数)"),
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
-    """获取水质数据列表"""
-    water_quality_service = WaterQualityService(db)
+    """获取水质数据列表（支持页码分页和游标分页）"""
+    water_quality_service = AsyncWaterQualityService(db)
     
     # 解析日期参数
-    parsed_start_date = None
-    parsed_end_date = None
+    parsed_start_date = _parse_date_param(sampling_date_start, "取样开始日期格式错误")
+    parsed_end_date = _parse_date_param(sampling_date_end, "取样结束日期格式错误")
     
-    if sampling_date_start:
-        try:
-            parsed_start_date = parse_datetime(sampling_date_start)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="取样开始日期格式错误"
-            )
+    count_mode = count_mode or settings.LIST_COUNT_MODE
+    if count_mode not in ("exact", "estimated", "has_more"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="总数计算方式只能是 exact、estimated 或 has_more"
+        )
     
-    if sampling_date_end:
+    if cursor:
         try:
-            parsed_end_date = parse_datetime(sampling_date_end)
+            decode_cursor(cursor)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="取样结束日期格式错误"
+                detail="分页游标格式错误"
             )
     
     # 构建查询参数
@@ -65,30 +86,87 @@ def get_water_quality_list(
         code=code,
         comprehensive_quality_level=comprehensive_quality_level,
         sampling_date_start=parsed_start_date,
-        sampling_date_end=parsed_end_date
+        sampling_date_end=parsed_end_date,
+        cursor=cursor,
+        count_mode=count_mode
     )
     
     # 获取数据
-    items, total = water_quality_service.get_water_quality_list(query)
+    items, total, next_cursor = await water_quality_service.get_water_quality_list(query)
     
     return WaterQualityListResponse(
         total=total,
         page=page,
         per_page=per_page,
-        items=[WaterQualityResponse.from_orm(item) for item in items]
+        items=[WaterQualityResponse.from_orm(item) for item in items],
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None,
+        count_mode=count_mode
+    )
+
+
+@router.get("/export", summary="导出水质数据")
+def export_water_quality(
+    river_name: str = Query(None, description="河道名称"),
+    code: str = Query(None, description="编号"),
+    comprehensive_quality_level: str = Query(None, description="综合水质等级"),
+    sampling_date_start: str = Query(None, description="取样开始日期"),
+    sampling_date_end: str = Query(None, description="取样结束日期"),
+    format: str = Query("parquet", description="导出格式: parquet, csv, ndjson"),
+    gzip: bool = Query(False, description="是否gzip压缩（仅csv、ndjson）"),
+    current_user = Depends(get_current_user)
+):
+    """按列表过滤条件导出水质数据（服务端游标分批读取，边查询边输出）"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"导出格式只能是 {'、'.join(EXPORT_FORMATS)}"
+        )
+    
+    if gzip and format not in GZIP_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{format}格式不支持gzip压缩"
+        )
+    
+    if format == "parquet":
+        try:
+            import_pyarrow()
+        except ImportError as e:
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail=str(e)
+            )
+    
+    query = WaterQualityQuery(
+        river_name=river_name,
+        code=code,
+        comprehensive_quality_level=comprehensive_quality_level,
+        sampling_date_start=_parse_date_param(sampling_date_start, "取样开始日期格式错误"),
+        sampling_date_end=_parse_date_param(sampling_date_end, "取样结束日期格式错误")
+    )
+    
+    media_type, suffix, _ = EXPORT_FORMATS[format]
+    if gzip:
+        media_type, suffix = "application/gzip", f"{suffix}.gz"
+    filename = f"water_quality_{datetime.now().strftime('%Y%m%d%H%M%S')}{suffix}"
+    return StreamingResponse(
+        stream_export(query, format, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 
 @router.get("/{water_quality_id}", response_model=WaterQualityResponse, summary="获取单个水质数据")
-def get_water_quality_by_id(
+async def get_water_quality_by_id(
     water_quality_id: int,
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """获取单个水质数据"""
-    water_quality_service = WaterQualityService(db)
+    water_quality_service = AsyncWaterQualityService(db)
     
-    water_quality = water_quality_service.get_water_quality_by_id(water_quality_id)
+    water_quality = await water_quality_service.get_water_quality_by_id(water_quality_id)
     if not water_quality:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -127,7 +205,13 @@ def update_water_quality(
     """更新水质数据"""
     water_quality_service = WaterQualityService(db)
     
-    water_quality = water_quality_service.update_water_quality(water_quality_id, water_quality_data)
+    try:
+        water_quality = water_quality_service.update_water_quality(water_quality_id, water_quality_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     if not water_quality:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -156,47 +240,112 @@ def delete_water_quality(
 
 
 @router.get("/statistics/overview", summary="获取水质数据统计")
-def get_water_quality_statistics(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_water_quality_statistics(
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """获取水质数据统计"""
-    water_quality_service = WaterQualityService(db)
+    water_quality_service = AsyncWaterQualityService(db)
     
-    return water_quality_service.get_water_quality_statistics()
+    return await water_quality_service.get_water_quality_statistics()
 
 
 @router.get("/options/rivers", response_model=List[str], summary="获取河道列表")
-def get_river_list(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_river_list(
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """获取河道列表"""
-    water_quality_service = WaterQualityService(db)
+    water_quality_service = AsyncWaterQualityService(db)
     
-    return water_quality_service.get_river_list()
+    return await water_quality_service.get_river_list()
+
+
+@router.get("/options/search", response_model=List[str], summary="搜索河道名称或编号")
+async def search_field_values(
+    keyword: str = Query(..., min_length=1, description="关键字"),
+    field: str = Query("river_name", description="搜索字段: river_name, code"),
+    limit: int = Query(20, ge=1, le=100, description="返回数量限制"),
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
+):
+    """搜索包含关键字的河道名称或编号（输入联想）"""
+    if field not in ("river_name", "code"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="搜索字段只能是 river_name 或 code"
+        )
+    
+    water_quality_service = AsyncWaterQualityService(db)
+    
+    return await water_quality_service.search_field_values(field, keyword, limit)
 
 
 @router.get("/options/quality-levels", response_model=List[str], summary="获取水质等级列表")
-def get_quality_levels(
-    current_user = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_quality_levels(
+    current_user = Depends(get_current_user_async),
+    db: RouteSession = Depends(get_async_db)
 ):
     """获取水质等级列表"""
-    water_quality_service = WaterQualityService(db)
+    water_quality_service = AsyncWaterQualityService(db)
     
-    return water_quality_service.get_quality_levels()
+    return await water_quality_service.get_quality_levels()
 
 
 @router.post("/recalculate-levels", summary="重新计算所有水质数据的等级")
 def recalculate_all_levels(
+    background_tasks: BackgroundTasks,
+    mode: str = Query("batch", description="计算方式: batch(批量计算), sql(数据库内集合更新), stream(后台分块任务)"),
+    job_id: Optional[int] = Query(None, description="续算的任务ID（仅stream方式）"),
     current_user = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """重新计算所有水质数据的等级（管理员操作）"""
+    if mode not in ("batch", "sql", "stream"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="计算方式只能是 batch、sql 或 stream"
+        )
+    
+    if mode == "stream":
+        recalculation_service = RecalculationService(db)
+        if job_id is None:
+            job = recalculation_service.create_job()
+        else:
+            job = recalculation_service.get_job(job_id)
+            if not job:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="重新计算任务不存在"
+                )
+            if job.status == "completed":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="重新计算任务已完成"
+                )
+            if RecalculationService.is_job_running(job.id):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="重新计算任务正在执行"
+                )
+        
+        background_tasks.add_task(run_recalculation_job, job.id)
+        return {
+            "message": f"重新计算任务 {job.id} 已提交后台执行",
+            "job_id": job.id
+        }
+    
     water_quality_service = WaterQualityService(db)
     
     try:
+        if mode == "sql":
+            result = water_quality_service.recalculate_all_levels_sql()
+            return {
+                "message": f"成功重新计算了 {result['total_count']} 条水质数据的等级，其中 {result['changed_count']} 条发生变化",
+                "updated_count": result['total_count'],
+                "changed_count": result['changed_count']
+            }
+        
         updated_count = water_quality_service.recalculate_all_levels()
         return {
             "message": f"成功重新计算了 {updated_count} 条水质数据的等级",
@@ -206,4 +355,30 @@ def recalculate_all_levels(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"重新计算等级失败: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+
+@router.get("/recalculate-levels/jobs", response_model=List[RecalculationJobResponse], summary="获取等级重新计算任务列表")
+def get_recalculation_jobs(
+    limit: int = Query(20, ge=1, le=100, description="返回任务数量限制"),
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """获取最近的等级重新计算任务（管理员操作）"""
+    return RecalculationService(db).get_jobs(limit)
+
+
+@router.get("/recalculate-levels/jobs/{job_id}", response_model=RecalculationJobResponse, summary="获取等级重新计算任务进度")
+def get_recalculation_job(
+    job_id: int,
+    current_user = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """获取等级重新计算任务进度（管理员操作）"""
+    job = RecalculationService(db).get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="重新计算任务不存在"
+        )
+    return job
\ No newline at end of file
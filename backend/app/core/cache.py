@@ -0,0 +1,150 @@
+"""
+进程内缓存模块
+
+提供带TTL、LRU容量上限和数据版本失效的结果缓存。写路径在提交后调用
+bump_data_version()，此前缓存的结果即全部失效。
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Hashable, Optional
+from app.core.locks import AsyncSafeLock
+
+# 数据版本号（进程内），任何水质数据写入后递增
+_data_version = 0
+_data_version_lock = threading.Lock()
+
+_MISSING = object()
+
+
+def get_data_version() -> int:
+    """获取当前数据版本号"""
+    return _data_version
+
+
+def bump_data_version() -> int:
+    """递增数据版本号，使所有缓存结果失效"""
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+        return _data_version
+
+
+class VersionedTTLCache:
+    """带TTL、LRU容量上限和数据版本失效的缓存"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 按键加锁，同一键的并发未命中只计算一次（组合结果会嵌套计算其他键，不能共用锁；
+        # 计算期间查询数据库，使用兼容异步会话的锁）；键 -> [锁, 持有和等待的调用数]
+        self._compute_locks: dict = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Any:
+        """获取缓存值，未命中、过期或版本不一致时返回_MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+
+            entry_version, expires_at, value = entry
+            if entry_version != version or expires_at <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        """写入缓存值，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+        """获取缓存值，未命中时计算并写入（指定cache_if时只写入其返回真的结果）"""
+        # 先取版本号再计算，计算期间发生写入时结果不会以新版本号缓存
+        version = get_data_version()
+        value = self.get(key, version)
+        if value is not _MISSING:
+            self._record(hit=True)
+            return value
+
+        # 计算锁按引用计数登记，最后一个等待者释放后才移除，保证同一键同时只有一把锁
+        with self._lock:
+            lock_entry = self._compute_locks.get(key)
+            if lock_entry is None:
+                lock_entry = self._compute_locks[key] = [AsyncSafeLock(), 0]
+            lock_entry[1] += 1
+
+        try:
+            with lock_entry[0]:
+                value = self.get(key, version)
+                if value is not _MISSING:
+                    self._record(hit=True)
+                    return value
+
+                self._record(hit=False)
+                value = compute()
+                if cache_if is None or cache_if(value):
+                    self.set(key, value, version)
+                return value
+        finally:
+            with self._lock:
+                lock_entry[1] -= 1
+                if lock_entry[1] == 0:
+                    del self._compute_locks[key]
+
+    def _record(self, hit: bool) -> None:
+        """记录一次命中或未命中"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """缓存统计信息"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "data_version": get_data_version()
+            }
+
+
+def cached_method(cache: VersionedTTLCache, enabled: bool = True,
+                  cache_if: Optional[Callable[[Any], bool]] = None):
+    """
+    服务方法结果缓存装饰器
+
+    缓存键为(方法名, 位置参数, 关键字参数)，不包含self；cache_if返回假的结果（如部分缺失的结果）不缓存
+    """
+    def decorator(func):
+        if not enabled:
+            return func
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            return cache.get_or_compute(key, lambda: func(self, *args, **kwargs), cache_if=cache_if)
+
+        return wrapper
+
+    return decorator
@@ -6,6 +6,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.base import get_db
+from app.db.async_base import RouteSession, get_async_db, run_with_session
+from app.db.routing import set_session_user
 from app.core.security import verify_token, create_credentials_exception
 from app.models.user import User
 from app.schemas.user import TokenData
@@ -21,12 +23,8 @@ def get_token(
     return credentials.credentials
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """获取当前用户"""
-    token = credentials.credentials
+def _get_token_user_id(token: str) -> int:
+    """校验token并返回用户ID"""
     payload = verify_token(token)
     
     if payload is None:
@@ -37,11 +35,13 @@ def get_current_user(
         raise create_credentials_exception()
     
     try:
-        user_id = int(user_id)
+        return int(user_id)
     except ValueError:
         raise create_credentials_exception()
-    
-    user = db.query(User).filter(User.id == user_id).first()
+
+
+def _check_user(user: Optional[User]) -> User:
+    """检查用户存在且未被禁用"""
     if user is None:
         raise create_credentials_exception("User not found")
     
@@ -54,6 +54,29 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """获取当前用户"""
+    user_id = _get_token_user_id(credentials.credentials)
+    user = db.query(User).filter(User.id == user_id).first()
+    # 会话记录所属用户，用户写入后短时间内的查询使用主库
+    set_session_user(db, user_id)
+    return _check_user(user)
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: RouteSession = Depends(get_async_db)
+) -> User:
+    """获取当前用户（异步路由使用）"""
+    user_id = _get_token_user_id(credentials.credentials)
+    user = await run_with_session(db, lambda session: session.query(User).filter(User.id == user_id).first())
+    set_session_user(db, user_id)
+    return _check_user(user)
+
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
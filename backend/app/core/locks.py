@@ -0,0 +1,112 @@
+"""
+兼容异步会话的线程锁和线程池任务等待
+
+AsyncSession.run_sync 在事件循环线程中以greenlet方式执行同步代码，数据库IO时切换回事件循环。
+持有普通线程锁期间发生IO时，同一线程中的其他协程等待该锁会阻塞整个事件循环（RLock则直接重入，失去互斥）。
+此锁在run_sync的greenlet中等待时让出事件循环，其他情况与threading.Lock / threading.RLock相同
+"""
+import asyncio
+import concurrent.futures
+import threading
+from typing import Iterable, Optional
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.util import await_only
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # 未安装greenlet时不支持异步会话，按线程区分持有者
+    getcurrent = threading.current_thread
+
+# greenlet中等待锁的轮询间隔（秒），每次翻倍直至上限
+_POLL_INITIAL_SECONDS = 0.001
+_POLL_MAX_SECONDS = 0.02
+
+
+class AsyncSafeLock:
+    """
+    兼容异步会话的锁（持有者按greenlet区分，线程中执行时即为线程）
+    
+    持有期间可以执行数据库IO；reentrant为True时同一持有者可重入
+    """
+    
+    def __init__(self, reentrant: bool = False):
+        self._lock = threading.Lock()
+        self._reentrant = reentrant
+        self._owner = None
+        self._count = 0
+    
+    def acquire(self) -> None:
+        """获取锁（run_sync的greenlet中等待时让出事件循环，否则阻塞等待）"""
+        current = getcurrent()
+        if self._reentrant and self._owner is current:
+            self._count += 1
+            return
+        
+        delay = _POLL_INITIAL_SECONDS
+        while not self._lock.acquire(blocking=False):
+            sleep = asyncio.sleep(delay)
+            try:
+                await_only(sleep)
+            except MissingGreenlet:
+                # 不在run_sync中（普通线程），直接阻塞等待
+                sleep.close()
+                self._lock.acquire()
+                break
+            delay = min(delay * 2, _POLL_MAX_SECONDS)
+        
+        self._owner = current
+        self._count = 1
+    
+    def release(self) -> None:
+        """释放锁"""
+        self._count -= 1
+        if self._count == 0:
+            self._owner = None
+            self._lock.release()
+    
+    def __enter__(self) -> "AsyncSafeLock":
+        self.acquire()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+def wait_futures(futures: Iterable[concurrent.futures.Future], timeout: Optional[float] = None) -> None:
+    """
+    等待线程池任务全部完成或超时（由调用方检查各任务状态）
+    
+    在run_sync的greenlet中等待时让出事件循环，否则阻塞等待
+    """
+    futures = list(futures)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    
+    if futures and loop is not None:
+        # 全部任务完成时在事件循环中设置结果，任务的异常由调用方获取
+        waiter = loop.create_future()
+        
+        def check_done() -> None:
+            if not waiter.done() and all(future.done() for future in futures):
+                waiter.set_result(None)
+        
+        def on_future_done(_) -> None:
+            try:
+                loop.call_soon_threadsafe(check_done)
+            except RuntimeError:  # 事件循环已关闭
+                pass
+        
+        for future in futures:
+            future.add_done_callback(on_future_done)
+        
+        waiting = asyncio.wait([waiter], timeout=timeout)
+        try:
+            await_only(waiting)
+            return
+        except MissingGreenlet:
+            # 在事件循环线程中但不在run_sync中，只能阻塞等待
+            waiting.close()
+    
+    concurrent.futures.wait(futures, timeout=timeout)
@@ -0,0 +1,126 @@
+"""
+异步数据库配置（ASYNC_DATABASE_ENABLED开启时使用）
+"""
+from typing import AsyncIterator, Callable, List, Optional, TypeVar, Union
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.db.base import SessionLocal, get_replica_urls, register_sqlite_pragmas
+from app.db.pool import create_pooled_engine
+from app.db.routing import ReplicaSet, RoutingSession
+from config import settings
+
+# 同步驱动到异步驱动的映射（由DATABASE_URL推导异步连接字符串）
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql"
+}
+
+# 异步路由使用的会话类型（开启异步数据库时为AsyncSession）
+RouteSession = Union[AsyncSession, Session]
+
+T = TypeVar("T")
+
+# 异步引擎和会话工厂（首次使用时创建，未开启时不加载异步驱动）
+_async_engine: Optional[AsyncEngine] = None
+_async_replica_engines: List[AsyncEngine] = []
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_database_url(database_url: Optional[str] = None) -> str:
+    """获取异步驱动连接字符串（默认为主库，主库可由ASYNC_DATABASE_URL指定）"""
+    if database_url is None:
+        if settings.ASYNC_DATABASE_URL:
+            return settings.ASYNC_DATABASE_URL
+        database_url = settings.DATABASE_URL
+    
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        raise ValueError(f"无法由连接字符串推导异步驱动: {url.drivername}，请配置ASYNC_DATABASE_URL")
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _create_async_engine(name: str, url: str) -> AsyncEngine:
+    """创建异步引擎（连接池按数据库类型和配置创建，SQLite应用PRAGMA）"""
+    target = create_pooled_engine(
+        name,
+        url,
+        create_async_engine,
+        is_async=True,
+        echo=settings.DATABASE_ECHO
+    )
+    register_sqlite_pragmas(target.sync_engine)
+    return target
+
+
+def get_async_engine() -> AsyncEngine:
+    """获取异步数据库引擎（首次调用时创建，同时创建只读副本引擎）"""
+    global _async_engine, _async_replica_engines, _async_session_factory
+    if _async_engine is None:
+        _async_engine = _create_async_engine("async", get_async_database_url())
+        _async_replica_engines = [
+            _create_async_engine(f"async_replica{index}", get_async_database_url(url))
+            for index, url in enumerate(get_replica_urls(), start=1)
+        ]
+        # 提交后不过期属性：run_sync返回的ORM对象在greenlet之外访问时不能再触发IO
+        _async_session_factory = async_sessionmaker(
+            _async_engine,
+            sync_session_class=RoutingSession,
+            autoflush=False,
+            expire_on_commit=False,
+            replicas=ReplicaSet(
+                [replica.sync_engine for replica in _async_replica_engines],
+                settings.DATABASE_REPLICA_STRATEGY
+            )
+        )
+    return _async_engine
+
+
+async def dispose_async_engine() -> None:
+    """关闭异步引擎（包括只读副本）的连接池"""
+    global _async_engine, _async_replica_engines, _async_session_factory
+    if _async_engine is not None:
+        for target in [_async_engine, *_async_replica_engines]:
+            await target.dispose()
+        _async_engine = None
+        _async_replica_engines = []
+        _async_session_factory = None
+
+
+async def run_with_session(db: RouteSession, function: Callable[[Session], T]) -> T:
+    """
+    以同步会话执行函数
+    
+    会话为AsyncSession时通过run_sync执行：同步代码在事件循环线程中以greenlet方式运行，
+    数据库IO由异步驱动完成并让出事件循环；会话为同步Session时在线程池中执行
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(function)
+    return await run_in_threadpool(function, db)
+
+
+async def get_async_db() -> AsyncIterator[RouteSession]:
+    """
+    获取异步路由使用的数据库会话
+    
+    ASYNC_DATABASE_ENABLED开启时为AsyncSession；否则为同步Session，
+    由异步服务在线程池中执行（与同步路由相同）
+    """
+    if settings.ASYNC_DATABASE_ENABLED:
+        get_async_engine()
+        async with _async_session_factory() as db:
+            yield db
+        return
+    
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        # 关闭时归还连接并回滚，在线程池中执行以免阻塞事件循环
+        await run_in_threadpool(db.close)
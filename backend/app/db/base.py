@@ -1,21 +1,121 @@
 """
 数据库基础配置
 """
-from sqlalchemy import create_engine
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from app.db.pool import create_pooled_engine
+from app.db.routing import ReplicaSet, RoutingSession
 from config import settings
 
-# 创建数据库引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=settings.DATABASE_ECHO,
-    pool_pre_ping=True,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+# SQLite PRAGMA的可选值
+SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+SQLITE_TEMP_STORES = ("DEFAULT", "FILE", "MEMORY")
+
+
+def get_sqlite_pragmas() -> List[str]:
+    """由配置生成建立SQLite连接时执行的PRAGMA语句"""
+    options = [
+        ("SQLITE_JOURNAL_MODE", SQLITE_JOURNAL_MODES),
+        ("SQLITE_SYNCHRONOUS", SQLITE_SYNCHRONOUS_MODES),
+        ("SQLITE_TEMP_STORE", SQLITE_TEMP_STORES)
+    ]
+    values = {}
+    for name, choices in options:
+        value = getattr(settings, name).upper()
+        if value not in choices:
+            raise ValueError(f"{name} 只能是 {', '.join(choices)}: {value}")
+        values[name] = value
+    
+    return [
+        # 先设置等待时间，切换日志模式时数据库被其他连接锁定则等待
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA journal_mode={values['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={values['SQLITE_SYNCHRONOUS']}",
+        # 负数表示以KB为单位
+        f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA temp_store={values['SQLITE_TEMP_STORE']}"
+    ]
+
+
+def register_sqlite_pragmas(target: Engine) -> None:
+    """SQLite引擎建立连接时应用性能配置（connect事件，每个新连接执行一次）"""
+    if target.dialect.name != "sqlite" or not settings.SQLITE_PRAGMAS_ENABLED:
+        return
+    
+    pragmas = get_sqlite_pragmas()
+    
+    @event.listens_for(target, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def optimize_sqlite(target: Optional[Engine] = None) -> Optional[Dict[str, Any]]:
+    """
+    SQLite定期维护：PRAGMA optimize更新查询规划统计，被动WAL检查点将WAL内容写回数据库文件
+    
+    被动检查点不等待读写连接，未能写回的部分留到下次。非SQLite数据库返回None
+    
+    Returns:
+        检查点结果（是否被阻塞、WAL帧数、已写回帧数，非WAL模式下帧数为-1）
+    """
+    target = target or engine
+    if target.dialect.name != "sqlite":
+        return None
+    
+    with target.connect() as connection:
+        connection.exec_driver_sql("PRAGMA optimize")
+        busy, log_frames, checkpointed_frames = connection.exec_driver_sql(
+            "PRAGMA wal_checkpoint(PASSIVE)"
+        ).one()
+    return {
+        "busy": bool(busy),
+        "log_frames": log_frames,
+        "checkpointed_frames": checkpointed_frames
+    }
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def get_replica_urls() -> List[str]:
+    """只读副本连接字符串列表"""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+def _create_engine(name: str, url: str) -> Engine:
+    """创建同步引擎（连接池按数据库类型和配置创建，SQLite应用PRAGMA）"""
+    target = create_pooled_engine(
+        name,
+        url,
+        create_engine,
+        echo=settings.DATABASE_ECHO,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+    register_sqlite_pragmas(target)
+    return target
+
+
+# 创建数据库引擎（主库）和只读副本引擎
+engine = _create_engine("sync", settings.DATABASE_URL)
+replica_engines = [
+    _create_engine(f"replica{index}", url) for index, url in enumerate(get_replica_urls(), start=1)
+]
+
+# 创建会话工厂（读写分离，未配置副本时全部使用主库）
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    bind=engine,
+    replicas=ReplicaSet(replica_engines, settings.DATABASE_REPLICA_STRATEGY)
+)
 
 # 创建基类
 Base = declarative_base()
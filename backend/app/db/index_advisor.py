@@ -0,0 +1,131 @@
+"""
+索引顾问
+执行服务层的典型查询，捕获实际生成的SQL，通过 EXPLAIN 检查执行计划并标记全表扫描
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+@dataclass
+class QueryPlanReport:
+    """单条查询的执行计划报告"""
+    
+    source: str
+    statement: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+
+@contextmanager
+def capture_queries(target: Any = Engine) -> Iterator[List[Tuple[Engine, str, Any]]]:
+    """捕获期间执行的SELECT语句（执行的引擎、语句及参数），默认捕获全部引擎（包括只读副本）"""
+    captured: List[Tuple[Engine, str, Any]] = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((conn.engine, statement, parameters))
+    
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def explain_query(engine: Engine, statement: str, parameters: Any) -> Tuple[List[str], List[str], List[str]]:
+    """
+    获取查询的执行计划
+    
+    Returns:
+        (执行计划行, 全表扫描行, 其他警告行)
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        # SQLite: "SCAN 表名"为全表扫描，"SCAN 表名 USING INDEX"为索引全扫描
+        full_scans = [line for line in plan if line.startswith("SCAN ") and " USING " not in line]
+        warnings = [line for line in plan if "TEMP B-TREE" in line]
+    else:
+        with engine.connect() as connection:
+            rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        plan = [row[0] for row in rows]
+        full_scans = [line.strip() for line in plan if "Seq Scan" in line]
+        warnings = [line.strip() for line in plan if "Sort Method: external" in line]
+    
+    return plan, full_scans, warnings
+
+
+def collect_service_queries(db: Session) -> Dict[str, Callable[[], Any]]:
+    """大屏和列表服务的典型查询（名称 -> 调用）"""
+    from app.schemas.water_quality import WaterQualityQuery
+    from app.services.dashboard_service import DashboardService
+    from app.services.water_quality_service import WaterQualityService
+    from app.utils.common import encode_cursor
+    from datetime import datetime
+    
+    dashboard_service = DashboardService(db)
+    water_quality_service = WaterQualityService(db)
+    cursor = encode_cursor(datetime(2100, 1, 1), 0)
+    method = "工程"
+    
+    return {
+        "dashboard.overview": dashboard_service.get_overview_statistics,
+        "dashboard.recent": dashboard_service.get_recent_water_quality,
+        "dashboard.warning": dashboard_service.get_warning_water_quality,
+        "dashboard.river_list": dashboard_service.get_river_list,
+        "dashboard.method_list": dashboard_service.get_method_list,
+        "dashboard.method_overview": lambda: dashboard_service.get_method_overview_statistics(method),
+        "dashboard.method_recent": lambda: dashboard_service.get_method_recent_water_quality(method),
+        "dashboard.method_warning": lambda: dashboard_service.get_method_warning_water_quality(method),
+        "dashboard.level_statistics": dashboard_service.get_water_quality_level_statistics,
+        "list.page": lambda: water_quality_service.get_water_quality_list(WaterQualityQuery(page=50)),
+        "list.cursor": lambda: water_quality_service.get_water_quality_list(WaterQualityQuery(cursor=cursor)),
+        "list.river": lambda: water_quality_service.get_water_quality_list(WaterQualityQuery(river_name="河")),
+        "list.level": lambda: water_quality_service.get_water_quality_list(
+            WaterQualityQuery(comprehensive_quality_level="Ⅲ类")
+        ),
+        "list.date_range": lambda: water_quality_service.get_water_quality_list(WaterQualityQuery(
+            sampling_date_start=datetime(2025, 1, 1), sampling_date_end=datetime(2025, 3, 31)
+        )),
+        "list.estimated_count": lambda: water_quality_service.get_water_quality_list(
+            WaterQualityQuery(count_mode="estimated", river_name="河")
+        ),
+        "options.rivers": water_quality_service.get_river_list,
+        "options.quality_levels": water_quality_service.get_quality_levels,
+    }
+
+
+def analyze_service_queries(db: Session) -> List[QueryPlanReport]:
+    """执行典型服务查询并分析其执行计划"""
+    from app.core.cache import bump_data_version
+    
+    reports: List[QueryPlanReport] = []
+    seen = set()
+    
+    for source, call in collect_service_queries(db).items():
+        # 使结果缓存失效，确保查询真正发送到数据库
+        bump_data_version()
+        with capture_queries() as captured:
+            call()
+        
+        for engine, statement, parameters in captured:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            
+            plan, full_scans, warnings = explain_query(engine, statement, parameters)
+            reports.append(QueryPlanReport(
+                source=source,
+                statement=statement,
+                plan=plan,
+                full_scans=full_scans,
+                warnings=warnings
+            ))
+    
+    return reports
@@ -0,0 +1,207 @@
+"""
+数据库初始化
+"""
+import logging
+from typing import List, Tuple
+from sqlalchemy import MetaData, String, func, inspect, select, text, update
+from sqlalchemy.exc import IntegrityError, OperationalError
+from app.db.base import Base, engine, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 自然键回填每批行数
+NATURAL_KEY_BACKFILL_CHUNK_SIZE = 5000
+
+# 无法创建自然键唯一索引时日志中列出的重复自然键数量
+DUPLICATE_NATURAL_KEY_REPORT_LIMIT = 10
+
+
+def _add_missing_columns() -> None:
+    """为已存在的表补建模型中新增的列（create_all不会修改已存在的表）"""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                logger.info("已为表%s补建列%s", table.name, column.name)
+
+
+def _level_code_expression(column_name: str) -> str:
+    """将等级字符串列转换为等级代码的SQL表达式（空等级和未知等级转换为NULL）"""
+    from app.utils.water_quality_calculator import WaterQualityCalculator
+    
+    whens = " ".join(
+        f"WHEN '{level}' THEN {code}" for level, code in WaterQualityCalculator.LEVEL_CODES.items()
+    )
+    return f"CASE TRIM({column_name}) {whens} ELSE NULL END"
+
+
+def _migrate_level_columns() -> None:
+    """
+    将历史版本按字符串存储的等级列转换为等级代码
+    
+    水质数据表在SQLite中重建表（SQLite不支持修改列类型，索引稍后补建），其他数据库使用ALTER COLUMN；
+    汇总表为派生数据，直接重建后由ensure_built重新汇总
+    """
+    from app.models.types import QualityLevel
+    from app.models.water_quality import WaterQuality
+    from app.models.water_quality_rollup import WaterQualityRollup
+    
+    inspector = inspect(engine)
+    
+    rollup_table = WaterQualityRollup.__table__
+    rollup_columns = {column['name']: column['type'] for column in inspector.get_columns(rollup_table.name)}
+    if isinstance(rollup_columns.get('comprehensive_quality_level'), String):
+        rollup_table.drop(bind=engine)
+        rollup_table.create(bind=engine)
+        logger.info("已重建汇总表%s（等级列改为等级代码）", rollup_table.name)
+    
+    table = WaterQuality.__table__
+    existing_columns = {column['name']: column['type'] for column in inspector.get_columns(table.name)}
+    level_columns = [
+        column.name for column in table.columns
+        if isinstance(column.type, QualityLevel) and isinstance(existing_columns.get(column.name), String)
+    ]
+    if not level_columns:
+        return
+    
+    with engine.begin() as connection:
+        unknown_count = connection.execute(text(
+            f"SELECT COUNT(*) FROM {table.name} WHERE "
+            + " OR ".join(
+                f"({_level_code_expression(name)}) IS NULL AND TRIM({name}) <> ''" for name in level_columns
+            )
+        )).scalar()
+        if unknown_count:
+            logger.warning("%d条水质数据含未知等级，迁移后记为空等级，可重新计算等级补全", unknown_count)
+        
+        if engine.dialect.name == 'sqlite':
+            migrating_table = table.to_metadata(MetaData(), name=f"{table.name}_migrating")
+            migrating_table.indexes.clear()
+            migrating_table.create(bind=connection)
+            column_names = [column.name for column in table.columns if column.name in existing_columns]
+            select_list = [
+                _level_code_expression(name) if name in level_columns else name for name in column_names
+            ]
+            connection.execute(text(
+                f"INSERT INTO {migrating_table.name} ({', '.join(column_names)}) "
+                f"SELECT {', '.join(select_list)} FROM {table.name}"
+            ))
+            connection.execute(text(f"DROP TABLE {table.name}"))
+            connection.execute(text(f"ALTER TABLE {migrating_table.name} RENAME TO {table.name}"))
+        else:
+            for name in level_columns:
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ALTER COLUMN {name} TYPE SMALLINT "
+                    f"USING {_level_code_expression(name)}"
+                ))
+    logger.info("已将表%s的等级列%s转换为等级代码", table.name, ", ".join(level_columns))
+    
+    if engine.dialect.name == 'sqlite':
+        # 回收重建表前占用的空间
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("VACUUM"))
+
+
+def _backfill_natural_keys() -> int:
+    """为缺少自然键的水质数据分批回填自然键和内容哈希，返回回填数量"""
+    from app.models.water_quality import WaterQuality
+    from app.utils.record_hash import CONTENT_FIELDS, NATURAL_KEY_FIELDS, compute_natural_key, compute_content_hash
+    
+    columns = [WaterQuality.id] + [getattr(WaterQuality, field) for field in NATURAL_KEY_FIELDS + CONTENT_FIELDS]
+    backfilled_count = 0
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(*columns)
+                .where(WaterQuality.natural_key.is_(None), WaterQuality.id > last_id)
+                .order_by(WaterQuality.id)
+                .limit(NATURAL_KEY_BACKFILL_CHUNK_SIZE)
+            ).mappings().all()
+            if not rows:
+                break
+            
+            params = [
+                {
+                    'id': row['id'],
+                    'natural_key': compute_natural_key(
+                        row['code'], row['river_name'], row['sampling_date'], row['sampling_time']
+                    ),
+                    'content_hash': compute_content_hash(row)
+                }
+                for row in rows
+            ]
+            db.execute(update(WaterQuality), params)
+            db.commit()
+            backfilled_count += len(rows)
+            last_id = rows[-1]['id']
+    finally:
+        db.close()
+    return backfilled_count
+
+
+def _find_duplicate_natural_keys() -> Tuple[int, List[Tuple[str, int]]]:
+    """查找重复的自然键，返回(重复的自然键数量, 前若干个(自然键, 数据条数))"""
+    from app.models.water_quality import WaterQuality
+    
+    duplicates = select(WaterQuality.natural_key, func.count(WaterQuality.id).label('count'))\
+        .where(WaterQuality.natural_key.is_not(None))\
+        .group_by(WaterQuality.natural_key)\
+        .having(func.count(WaterQuality.id) > 1)
+    with engine.connect() as connection:
+        duplicate_count = connection.execute(select(func.count()).select_from(duplicates.subquery())).scalar()
+        examples = connection.execute(duplicates.limit(DUPLICATE_NATURAL_KEY_REPORT_LIMIT)).all()
+    return duplicate_count, [(row.natural_key, row.count) for row in examples]
+
+
+def init_db() -> None:
+    """创建缺失的数据表、列和索引，迁移历史版本的等级列，写入内置等级标准，并在需要时补建大屏汇总数据"""
+    # 导入模型以注册到元数据
+    import app.models  # noqa: F401
+    from app.services.grading_standard_service import GradingStandardService
+    from app.services.rollup_service import RollupService
+    
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _migrate_level_columns()
+    
+    backfilled_count = _backfill_natural_keys()
+    if backfilled_count:
+        logger.info("已回填%d条水质数据的自然键", backfilled_count)
+    
+    # create_all不会为已存在的表补建索引，逐个检查创建
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except (IntegrityError, OperationalError) as e:
+                if not (index.unique and [column.name for column in index.columns] == ['natural_key']):
+                    logger.warning("创建索引%s失败: %s", index.name, e)
+                    continue
+                # 历史数据存在重复自然键时无法创建唯一索引：upsert导入不可用，接口写入不受影响，需人工清理后重启
+                duplicate_count, examples = _find_duplicate_natural_keys()
+                logger.error(
+                    "创建自然键唯一索引%s失败，有%d个自然键存在重复数据，upsert导入在清理重复数据并重启前不可用。"
+                    "部分重复的自然键(数据条数): %s；错误: %s",
+                    index.name,
+                    duplicate_count,
+                    ", ".join(f"{natural_key}({count})" for natural_key, count in examples),
+                    e
+                )
+    
+    db = SessionLocal()
+    try:
+        if GradingStandardService(db).ensure_default():
+            logger.info("已写入内置等级标准GB3838-2002")
+        if RollupService(db).ensure_built():
+            logger.info("已重建大屏汇总数据")
+    finally:
+        db.close()
@@ -0,0 +1,207 @@
+"""
+数据库连接池配置（按数据库类型的默认配置）与取连接等待时间统计
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool, SingletonThreadPool, StaticPool
+from config import settings
+
+# 各数据库的默认连接池配置，Settings中未设置（为空）的项取此处的值
+# pool_pre_ping关闭时不在取连接前检测：断线错误发生后SQLAlchemy使该连接及更早建立的连接失效，之后重新连接
+ENGINE_PROFILES = {
+    # 本地文件无需检测断线和定期回收
+    "sqlite": {
+        "pool_mode": "queue", "pool_size": 5, "max_overflow": 10,
+        "pool_recycle": -1, "pool_timeout": 30.0, "pool_pre_ping": False
+    },
+    # 服务端数据库：早于防火墙、代理或服务端的空闲断开时间回收连接，取连接前检测
+    "postgresql": {
+        "pool_mode": "queue", "pool_size": 10, "max_overflow": 20,
+        "pool_recycle": 1800, "pool_timeout": 30.0, "pool_pre_ping": True
+    },
+    "mysql": {
+        "pool_mode": "queue", "pool_size": 10, "max_overflow": 20,
+        "pool_recycle": 3600, "pool_timeout": 30.0, "pool_pre_ping": True
+    }
+}
+
+# 未列出的数据库使用的默认配置
+DEFAULT_PROFILE = "postgresql"
+
+# 连接池类型：queue 固定容量加溢出，null 不复用连接，
+# static 全部线程共享一个连接（SQLite内存库或单线程脚本），singleton 每个线程一个连接（SQLite）
+POOL_MODES = ("queue", "null", "static", "singleton")
+SQLITE_POOL_MODES = ("static", "singleton")
+
+# 取连接等待时间分布的桶上限（秒），超出最后一个桶的计入最后一项
+WAIT_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+
+# 已创建的引擎（名称 -> (引擎, 连接池配置, 统计)）
+_engines: Dict[str, Tuple[Any, Dict[str, Any], "PoolMetrics"]] = {}
+
+
+class PoolMetrics:
+    """连接池取连接统计（取连接耗时包括池中无空闲连接时新建连接的耗时）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_count = 0
+        self.timeout_count = 0
+        self.created_count = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+    
+    def record_checkout(self, seconds: float, timed_out: bool = False) -> None:
+        """记录一次取连接"""
+        with self._lock:
+            if timed_out:
+                self.timeout_count += 1
+            else:
+                self.checkout_count += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            bucket = 0
+            while bucket < len(WAIT_BUCKETS) and seconds > WAIT_BUCKETS[bucket]:
+                bucket += 1
+            self.wait_buckets[bucket] += 1
+    
+    def record_created(self) -> None:
+        """记录一次新建连接"""
+        with self._lock:
+            self.created_count += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """统计结果"""
+        with self._lock:
+            attempts = self.checkout_count + self.timeout_count
+            bucket_labels = [f"<={bound * 1000:g}ms" for bound in WAIT_BUCKETS] + [f">{WAIT_BUCKETS[-1] * 1000:g}ms"]
+            return {
+                "checkout_count": self.checkout_count,
+                "timeout_count": self.timeout_count,
+                "created_count": self.created_count,
+                "avg_wait_ms": round(self.total_wait_seconds / attempts * 1000, 3) if attempts else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "wait_distribution": dict(zip(bucket_labels, self.wait_buckets))
+            }
+
+
+class _TimedCheckoutMixin:
+    """记录取连接耗时的连接池（连接池重建时保留子类，统计随之保留）"""
+    
+    metrics: PoolMetrics
+    
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_checkout(time.perf_counter() - start_time, timed_out=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start_time)
+        return record
+    
+    def _create_connection(self):
+        self.metrics.record_created()
+        return super()._create_connection()
+
+
+def resolve_pool_config(url: str) -> Dict[str, Any]:
+    """按数据库类型的默认配置和Settings得到连接池配置"""
+    parsed_url = make_url(url)
+    backend = parsed_url.get_backend_name()
+    config = dict(ENGINE_PROFILES.get(backend, ENGINE_PROFILES[DEFAULT_PROFILE]))
+    # SQLite内存库的数据只在一个连接中，默认共享单个连接
+    if backend == "sqlite" and parsed_url.database in (None, "", ":memory:"):
+        config["pool_mode"] = "static"
+    
+    overrides = {
+        "pool_mode": settings.DATABASE_POOL_MODE,
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING
+    }
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    
+    if config["pool_mode"] not in POOL_MODES:
+        raise ValueError(f"连接池类型只能是 {', '.join(POOL_MODES)}: {config['pool_mode']}")
+    if config["pool_mode"] in SQLITE_POOL_MODES and backend != "sqlite":
+        raise ValueError(f"连接池类型 {config['pool_mode']} 只适用于SQLite")
+    return config
+
+
+def get_engine_options(config: Dict[str, Any], metrics: PoolMetrics, is_async: bool = False) -> Dict[str, Any]:
+    """由连接池配置生成create_engine的连接池参数"""
+    pool_mode = config["pool_mode"]
+    # 异步引擎的全部连接在事件循环线程中使用，每线程一个连接没有意义，使用固定容量的连接池
+    if is_async and pool_mode == "singleton":
+        pool_mode = "queue"
+    
+    pool_classes: Dict[str, type] = {
+        "queue": AsyncAdaptedQueuePool if is_async else QueuePool,
+        "null": NullPool,
+        "static": StaticPool,
+        "singleton": SingletonThreadPool
+    }
+    pool_class = pool_classes[pool_mode]
+    options: Dict[str, Any] = {
+        "poolclass": type(f"Timed{pool_class.__name__}", (_TimedCheckoutMixin, pool_class), {"metrics": metrics}),
+        "pool_pre_ping": config["pool_pre_ping"],
+        "pool_recycle": config["pool_recycle"]
+    }
+    if pool_mode == "queue":
+        options.update(
+            pool_size=config["pool_size"],
+            max_overflow=config["max_overflow"],
+            pool_timeout=config["pool_timeout"]
+        )
+    elif pool_mode == "singleton":
+        # 保留连接的线程数上限
+        options["pool_size"] = config["pool_size"]
+    return options
+
+
+def create_pooled_engine(name: str, url: str, create: Callable[..., Any], is_async: bool = False,
+                         **kwargs) -> Any:
+    """
+    按连接池配置创建引擎，并登记以便查询连接池状态
+    
+    Args:
+        name: 引擎名称（同名引擎重新创建时替换）
+        url: 连接字符串
+        create: create_engine 或 create_async_engine
+        is_async: 是否为异步引擎
+        **kwargs: 其他create_engine参数
+    """
+    config = resolve_pool_config(url)
+    metrics = PoolMetrics()
+    engine = create(url, **get_engine_options(config, metrics, is_async), **kwargs)
+    _engines[name] = (engine, config, metrics)
+    return engine
+
+
+def get_pool_status() -> List[Dict[str, Any]]:
+    """各引擎的连接池配置、当前连接数和取连接统计"""
+    result = []
+    for name, (engine, config, metrics) in _engines.items():
+        pool: Pool = engine.pool
+        status = {
+            "engine": name,
+            "backend": engine.dialect.name,
+            "pool_class": type(pool).__bases__[-1].__name__,
+            **config
+        }
+        if isinstance(pool, QueuePool):
+            status.update({
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow()
+            })
+        status.update(metrics.to_dict())
+        result.append(status)
+    return result
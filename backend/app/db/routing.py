@@ -0,0 +1,194 @@
+"""
+读写分离会话（写入和一般查询走主库，标记为只读的查询走只读副本）
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from config import settings
+
+# 副本选择策略
+REPLICA_STRATEGIES = ("round_robin", "least_connections")
+
+# 会话info中的键
+_READ_REPLICA_KEY = "read_replica"
+_PRIMARY_KEY = "primary"
+_USER_ID_KEY = "user_id"
+_WROTE_KEY = "wrote"
+
+# 用户最近一次写入提交的时间（用户ID -> time.monotonic()），用于写后读一致
+_recent_writes: Dict[int, float] = {}
+_recent_writes_lock = threading.Lock()
+
+
+def record_user_write(user_id: int) -> None:
+    """记录用户的写入提交时间"""
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[user_id] = now
+        # 顺带清理已过期的记录
+        if len(_recent_writes) > 1024:
+            expired_before = now - settings.DATABASE_READ_YOUR_WRITES_SECONDS
+            for expired_user_id in [key for key, value in _recent_writes.items() if value < expired_before]:
+                del _recent_writes[expired_user_id]
+
+
+def wrote_recently(user_id: Optional[int]) -> bool:
+    """用户是否在写后读一致时间窗口内提交过写入"""
+    if user_id is None:
+        return False
+    with _recent_writes_lock:
+        written_at = _recent_writes.get(user_id)
+    return written_at is not None and time.monotonic() - written_at < settings.DATABASE_READ_YOUR_WRITES_SECONDS
+
+
+class ReplicaSet:
+    """只读副本引擎集合（按轮询或最少连接数选择）"""
+    
+    def __init__(self, engines: List[Engine], strategy: str = "round_robin"):
+        if strategy not in REPLICA_STRATEGIES:
+            raise ValueError(f"副本选择策略只能是 {', '.join(REPLICA_STRATEGIES)}: {strategy}")
+        self.engines = engines
+        self.strategy = strategy
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+    
+    def choose(self) -> Optional[Engine]:
+        """选择一个副本，未配置副本时返回None"""
+        if not self.engines:
+            return None
+        if len(self.engines) == 1:
+            return self.engines[0]
+        
+        if self.strategy == "least_connections":
+            # 按连接池当前取出的连接数选择（不统计取出连接数的连接池按0计），相同时取靠前的副本
+            return min(
+                self.engines,
+                key=lambda engine: engine.pool.checkedout() if isinstance(engine.pool, QueuePool) else 0
+            )
+        
+        with self._lock:
+            index = next(self._counter) % len(self.engines)
+        return self.engines[index]
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+    
+    flush、INSERT/UPDATE/DELETE以及本会话写入后的查询都使用主库；
+    标记为只读的查询使用副本（会话内固定同一个副本），但当前用户在写后读一致时间窗口内提交过写入时仍使用主库；
+    结果写入进程内缓存、快照或索引的查询（read_from_primary期间）始终使用主库
+    """
+    
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._replica: Optional[Engine] = None
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._use_replica(clause):
+            if self._replica is None:
+                self._replica = self.replicas.choose()
+            return self._replica
+        return super().get_bind(mapper, clause=clause, **kwargs)
+    
+    def _use_replica(self, clause) -> bool:
+        """本次执行是否使用副本"""
+        if not self.replicas or not self.replicas.engines or not self.info.get(_READ_REPLICA_KEY):
+            return False
+        if self.info.get(_PRIMARY_KEY):
+            return False
+        if self._flushing or isinstance(clause, UpdateBase) or self.info.get(_WROTE_KEY):
+            return False
+        return not wrote_recently(self.info.get(_USER_ID_KEY))
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush_write(session, flush_context):
+    """flush写入了数据"""
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_statement_write(orm_execute_state):
+    """执行了ORM批量更新、删除或插入"""
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _record_commit_write(session):
+    """提交了写入时记录用户的写入时间"""
+    if session.info.pop(_WROTE_KEY, False):
+        user_id = session.info.get(_USER_ID_KEY)
+        if user_id is not None:
+            record_user_write(user_id)
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _clear_rollback_write(session):
+    """回滚后写入不再存在"""
+    session.info.pop(_WROTE_KEY, None)
+
+
+def set_session_user(db: Any, user_id: int) -> None:
+    """记录会话所属的用户（用于写后读一致），db可为Session或AsyncSession"""
+    db.info[_USER_ID_KEY] = user_id
+
+
+def get_routing_info(db: Any) -> Dict[str, Any]:
+    """会话的路由状态（所属用户、是否强制主库），用于在其他会话中沿用"""
+    return {key: db.info[key] for key in (_USER_ID_KEY, _PRIMARY_KEY) if key in db.info}
+
+
+def use_read_replica(db: Any) -> None:
+    """之后本会话中的只读查询使用副本（会话只用于查询时）"""
+    db.info[_READ_REPLICA_KEY] = True
+
+
+@contextmanager
+def read_from_primary(db: Any) -> Iterator[None]:
+    """
+    期间本会话的查询都使用主库
+    
+    用于结果写入进程内缓存、快照或索引的查询：这些结果按主库的数据版本号保存，
+    读取落后的副本会把写入前的数据以新版本号保存下来，直到过期或下次写入
+    """
+    previous = db.info.get(_PRIMARY_KEY, False)
+    db.info[_PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        db.info[_PRIMARY_KEY] = previous
+
+
+def primary_read(func: Callable) -> Callable:
+    """服务方法装饰器：方法执行期间本会话（self.db）的查询都使用主库"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with read_from_primary(self.db):
+            return func(self, *args, **kwargs)
+    
+    return wrapper
+
+
+def replica_read(func: Callable) -> Callable:
+    """服务方法装饰器：方法执行期间本会话（self.db）的只读查询使用副本"""
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        previous = self.db.info.get(_READ_REPLICA_KEY, False)
+        self.db.info[_READ_REPLICA_KEY] = True
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self.db.info[_READ_REPLICA_KEY] = previous
+    
+    return wrapper
@@ -3,5 +3,9 @@
 """
 from app.models.water_quality import WaterQuality
 from app.models.user import User
+from app.models.water_quality_rollup import WaterQualityRollup
+from app.models.recalculation_job import RecalculationJob
+from app.models.import_manifest import ImportManifest
+from app.models.grading_standard import GradingStandard
 
-__all__ = ["WaterQuality", "User"] 
\ No newline at end of file
+__all__ = ["WaterQuality", "User", "WaterQualityRollup", "RecalculationJob", "ImportManifest", "GradingStandard"] 
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+等级标准模型
+"""
+import json
+from typing import Dict
+
+from sqlalchemy import Boolean, Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class GradingStandard(Base):
+    """等级标准模型（按名称和版本记录各指标阈值，创建后不可修改，修改阈值需创建新版本）"""
+    
+    __tablename__ = "grading_standards"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # 标准信息
+    name = Column(String(100), nullable=False, comment="标准名称")
+    version = Column(Integer, nullable=False, default=1, comment="版本号（同名标准内递增）")
+    description = Column(Text, nullable=True, comment="说明")
+    rules = Column(Text, nullable=False, comment="各指标Ⅰ类至Ⅴ类阈值(JSON)")
+    
+    # 是否为当前生效的标准（同一时间只有一个）
+    is_active = Column(Boolean, nullable=False, default=False, comment="是否生效")
+    
+    # 系统字段
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    
+    __table_args__ = (
+        Index("ux_grading_standards_name_version", "name", "version", unique=True),
+    )
+    
+    @property
+    def thresholds(self) -> Dict[str, Dict[str, float]]:
+        """各指标阈值"""
+        return json.loads(self.rules)
+    
+    def __repr__(self):
+        return f"<GradingStandard(id={self.id}, name='{self.name}', version={self.version}, active={self.is_active})>"
@@ -0,0 +1,40 @@
+"""
+数据文件导入清单模型
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ImportManifest(Base):
+    """数据文件导入清单模型（按文件内容哈希记录，已导入的文件再次导入时跳过）"""
+    
+    __tablename__ = "import_manifests"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # 文件信息
+    file_path = Column(String(500), nullable=False, comment="文件路径")
+    file_hash = Column(String(64), nullable=False, unique=True, comment="文件内容SHA-256")
+    file_size = Column(BigInteger, nullable=False, default=0, comment="文件大小（字节）")
+    
+    # 导入状态: completed, failed
+    status = Column(String(20), nullable=False, comment="导入状态")
+    mode = Column(String(20), nullable=False, default="insert", comment="导入模式")
+    
+    # 导入统计
+    inserted_count = Column(Integer, nullable=False, default=0, comment="新增数量")
+    updated_count = Column(Integer, nullable=False, default=0, comment="更新数量")
+    unchanged_count = Column(Integer, nullable=False, default=0, comment="未变化数量")
+    duplicate_count = Column(Integer, nullable=False, default=0, comment="文件内自然键重复被覆盖的数量")
+    skipped_count = Column(Integer, nullable=False, default=0, comment="跳过的无效行数")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+    
+    # 系统字段
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    finished_at = Column(DateTime, nullable=True, comment="完成时间")
+    
+    def __repr__(self):
+        return f"<ImportManifest(id={self.id}, file_path='{self.file_path}', status='{self.status}')>"
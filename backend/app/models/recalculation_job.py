@@ -0,0 +1,47 @@
+"""
+等级重新计算任务模型
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class RecalculationJob(Base):
+    """等级重新计算任务模型（记录进度检查点，中断后可续算）"""
+    
+    __tablename__ = "recalculation_jobs"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # 任务状态: pending, running, completed, failed
+    status = Column(String(20), nullable=False, default="pending", comment="任务状态")
+    chunk_size = Column(Integer, nullable=False, comment="每块数量")
+    
+    # 进度检查点
+    last_id = Column(Integer, nullable=False, default=0, comment="已处理的最大水质数据ID")
+    total_count = Column(Integer, nullable=False, default=0, comment="总数量")
+    processed_count = Column(Integer, nullable=False, default=0, comment="已处理数量")
+    changed_count = Column(Integer, nullable=False, default=0, comment="等级变化数量")
+    error_message = Column(Text, nullable=True, comment="错误信息")
+    
+    # 系统字段
+    created_at = Column(DateTime, default=func.now(), comment="创建时间")
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    finished_at = Column(DateTime, nullable=True, comment="完成时间")
+    
+    @property
+    def progress(self) -> float:
+        """进度百分比"""
+        if self.status == "completed":
+            return 100.0
+        if not self.total_count:
+            return 0.0
+        return round(min(self.processed_count / self.total_count, 1) * 100, 2)
+    
+    def __repr__(self):
+        return (
+            f"<RecalculationJob(id={self.id}, status='{self.status}', "
+            f"processed={self.processed_count}/{self.total_count})>"
+        )
@@ -0,0 +1,42 @@
+"""
+自定义列类型
+"""
+from typing import Optional
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+from app.utils.water_quality_calculator import WaterQualityCalculator
+
+# 存储代码到等级字符串
+_LEVEL_NAMES = {code: level for level, code in WaterQualityCalculator.LEVEL_CODES.items()}
+
+
+class QualityLevel(TypeDecorator):
+    """
+    水质等级列类型
+    
+    数据库中存储为小整数代码（WaterQualityCalculator.LEVEL_CODES，代码越大等级越差），
+    ORM属性、查询参数和查询结果仍为等级字符串；空等级存储为empty_code
+    """
+    
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, empty_code: Optional[int] = None):
+        super().__init__()
+        self.empty_code = empty_code
+    
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[int]:
+        if value is None or value.strip() == "":
+            return self.empty_code
+        code = WaterQualityCalculator.LEVEL_CODES.get(value.strip())
+        if code is None:
+            raise ValueError(f"未知的水质等级: {value}")
+        return code
+    
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        if value == self.empty_code:
+            return ""
+        return _LEVEL_NAMES[value]
@@ -4,10 +4,12 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.models.types import QualityLevel
+from app.utils.record_hash import CONTENT_FIELDS, compute_natural_key, compute_content_hash
 
 
 class WaterQuality(Base):
@@ -34,14 +36,14 @@ class WaterQuality(Base):
     total_phosphorus_value = Column(Float, nullable=True, comment="总磷数值")
     potassium_permanganate_value = Column(Float, nullable=True, comment="高锰酸钾数值")
     
-    # 水质指标等级
-    cod_level = Column(String(20), nullable=True, comment="COD等级")
-    ammonia_nitrogen_level = Column(String(20), nullable=True, comment="氨氮等级")
-    total_phosphorus_level = Column(String(20), nullable=True, comment="总磷等级")
-    potassium_permanganate_level = Column(String(20), nullable=True, comment="高锰酸钾等级")
+    # 水质指标等级（存储为等级代码）
+    cod_level = Column(QualityLevel(), nullable=True, comment="COD等级")
+    ammonia_nitrogen_level = Column(QualityLevel(), nullable=True, comment="氨氮等级")
+    total_phosphorus_level = Column(QualityLevel(), nullable=True, comment="总磷等级")
+    potassium_permanganate_level = Column(QualityLevel(), nullable=True, comment="高锰酸钾等级")
     
     # 综合评价
-    comprehensive_quality_level = Column(String(20), nullable=True, comment="综合水质等级")
+    comprehensive_quality_level = Column(QualityLevel(), nullable=True, comment="综合水质等级")
     comprehensive_level_number = Column(Integer, nullable=True, comment="综合等级数")
     
     # 系统字段
@@ -51,5 +53,25 @@ class WaterQuality(Base):
     # 备注
     remarks = Column(Text, nullable=True, comment="备注")
     
+    # 导入去重：自然键(编号+河道+取样日期+取样时间)哈希、最近一次导入或编辑时的内容哈希
+    natural_key = Column(String(40), nullable=True, comment="自然键哈希")
+    content_hash = Column(String(40), nullable=True, comment="内容哈希")
+    
+    __table_args__ = (
+        # 列表按(取样日期, ID)倒序的游标分页、最新数据（倒序时反向扫描索引）
+        Index("ix_water_quality_sampling_date_id", "sampling_date", "id"),
+        # 按方式、综合等级、河道过滤后按取样日期排序或按日期范围过滤
+        Index("ix_water_quality_method_sampling_date", "method", "sampling_date"),
+        Index("ix_water_quality_level_sampling_date", "comprehensive_quality_level", "sampling_date"),
+        Index("ix_water_quality_river_name_sampling_date", "river_name", "sampling_date"),
+        # 导入时按自然键去重（INSERT ... ON CONFLICT）
+        Index("ux_water_quality_natural_key", "natural_key", unique=True),
+    )
+    
+    def refresh_hashes(self) -> None:
+        """根据当前字段值更新自然键和内容哈希"""
+        self.natural_key = compute_natural_key(self.code, self.river_name, self.sampling_date, self.sampling_time)
+        self.content_hash = compute_content_hash({field: getattr(self, field) for field in CONTENT_FIELDS})
+    
     def __repr__(self):
         return f"<WaterQuality(id={self.id}, river_name='{self.river_name}', sampling_date='{self.sampling_date}')>" 
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+水质数据汇总模型（大屏统计预聚合）
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.types import QualityLevel
+
+
+class WaterQualityRollup(Base):
+    """水质数据汇总模型，按(河道, 方式, 月份, 综合等级)预聚合"""
+    
+    __tablename__ = "water_quality_rollup"
+    
+    # 主键
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    
+    # 汇总维度（方式已标准化，空白方式记为"其他"；综合等级为空时记为空字符串，存储代码为0）
+    river_name = Column(String(100), nullable=False, comment="河道名称")
+    method = Column(String(50), nullable=False, comment="方式")
+    month = Column(String(7), nullable=False, comment="月份(YYYY-MM)")
+    comprehensive_quality_level = Column(QualityLevel(empty_code=0), nullable=False, default="", comment="综合水质等级")
+    
+    # 数量统计
+    sample_count = Column(Integer, nullable=False, default=0, comment="数据量")
+    latest_sampling_date = Column(DateTime, nullable=True, comment="最新采样时间")
+    
+    # COD统计
+    cod_value_count = Column(Integer, nullable=False, default=0, comment="COD有效数量")
+    cod_value_sum = Column(Float, nullable=True, comment="COD合计")
+    cod_value_min = Column(Float, nullable=True, comment="COD最小值")
+    cod_value_max = Column(Float, nullable=True, comment="COD最大值")
+    cod_value_exceed_count = Column(Integer, nullable=False, default=0, comment="COD超标数量")
+    
+    # 氨氮统计
+    ammonia_nitrogen_value_count = Column(Integer, nullable=False, default=0, comment="氨氮有效数量")
+    ammonia_nitrogen_value_sum = Column(Float, nullable=True, comment="氨氮合计")
+    ammonia_nitrogen_value_min = Column(Float, nullable=True, comment="氨氮最小值")
+    ammonia_nitrogen_value_max = Column(Float, nullable=True, comment="氨氮最大值")
+    ammonia_nitrogen_value_exceed_count = Column(Integer, nullable=False, default=0, comment="氨氮超标数量")
+    
+    # 总磷统计
+    total_phosphorus_value_count = Column(Integer, nullable=False, default=0, comment="总磷有效数量")
+    total_phosphorus_value_sum = Column(Float, nullable=True, comment="总磷合计")
+    total_phosphorus_value_min = Column(Float, nullable=True, comment="总磷最小值")
+    total_phosphorus_value_max = Column(Float, nullable=True, comment="总磷最大值")
+    total_phosphorus_value_exceed_count = Column(Integer, nullable=False, default=0, comment="总磷超标数量")
+    
+    # 高锰酸钾统计
+    potassium_permanganate_value_count = Column(Integer, nullable=False, default=0, comment="高锰酸钾有效数量")
+    potassium_permanganate_value_sum = Column(Float, nullable=True, comment="高锰酸钾合计")
+    potassium_permanganate_value_min = Column(Float, nullable=True, comment="高锰酸钾最小值")
+    potassium_permanganate_value_max = Column(Float, nullable=True, comment="高锰酸钾最大值")
+    potassium_permanganate_value_exceed_count = Column(Integer, nullable=False, default=0, comment="高锰酸钾超标数量")
+    
+    # 系统字段
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment="更新时间")
+    
+    __table_args__ = (
+        Index(
+            "ix_water_quality_rollup_key",
+            "river_name", "method", "month", "comprehensive_quality_level",
+            unique=True
+        ),
+    )
+    
+    def __repr__(self):
+        return (
+            f"<WaterQualityRollup(river_name='{self.river_name}', method='{self.method}', "
+            f"month='{self.month}', level='{self.comprehensive_quality_level}', count={self.sample_count})>"
+        )
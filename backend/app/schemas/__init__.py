@@ -9,6 +9,14 @@ from .water_quality import (
     WaterQualityBase, WaterQualityCreate, WaterQualityUpdate, 
     WaterQualityResponse, WaterQualityListResponse, WaterQualityQuery
 )
+from .recalculation_job import RecalculationJobResponse
+from .grading_standard import (
+    GradingStandardCreate,
+    GradingStandardResponse,
+    GradingLevelCount,
+    GradingLevelTransition,
+    GradingWhatIfResponse
+)
 from .dashboard import (
     OverviewStatistics,
     RiverStatistics,
@@ -48,6 +56,13 @@ __all__ = [
     "WaterQualityResponse",
     "WaterQualityListResponse",
     "WaterQualityQuery",
+    "RecalculationJobResponse",
+    # 等级标准相关
+    "GradingStandardCreate",
+    "GradingStandardResponse",
+    "GradingLevelCount",
+    "GradingLevelTransition",
+    "GradingWhatIfResponse",
     # 大屏相关
     "OverviewStatistics",
     "RiverStatistics",
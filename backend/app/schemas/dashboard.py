@@ -161,6 +161,7 @@ class MethodDashboardResponse(BaseModel):
     indicator_stats: List[MethodIndicatorStatistics] = Field(..., description="指标统计")
     recent_data: List[RecentWaterQuality] = Field(..., description="最新数据(5条)")
     warning_data: List[WarningWaterQuality] = Field(..., description="警告数据(污染严重数据)")
+    unavailable_sections: List[str] = Field(default_factory=list, description="超时或出错而返回空结果的部分")
 
 
 class MethodListResponse(BaseModel):
@@ -178,6 +179,7 @@ class DashboardResponse(BaseModel):
     indicator_stats: List[IndicatorStatistics] = Field(..., description="指标统计")
     recent_data: List[RecentWaterQuality] = Field(..., description="最新数据(5条)")
     warning_data: List[WarningWaterQuality] = Field(..., description="警告数据(污染严重数据)")
+    unavailable_sections: List[str] = Field(default_factory=list, description="超时或出错而返回空结果的部分")
 
 
 class RiverListResponse(BaseModel):
@@ -216,4 +218,15 @@ class WaterQualityLevelStatistics(BaseModel):
     overall_summary: dict = Field(..., description="总体概况")
     qualified_rate: float = Field(..., description="合格率(I-III类)")
     unqualified_rate: float = Field(..., description="不合格率")
-    warning_rate: float = Field(..., description="警告率(轻度+重度污染)") 
\ No newline at end of file
+    warning_rate: float = Field(..., description="警告率(轻度+重度污染)") 
+
+class SnapshotStatus(BaseModel):
+    """大屏列式快照状态"""
+    enabled: bool = Field(..., description="大屏是否使用列式快照")
+    built: bool = Field(..., description="快照是否已构建")
+    data_version: Optional[int] = Field(None, description="快照对应的数据版本号")
+    row_count: int = Field(..., description="有效行数")
+    capacity: int = Field(..., description="已分配行数")
+    column_memory_bytes: int = Field(..., description="列数组占用内存(字节)")
+    bitmap_count: int = Field(..., description="位图索引数量")
+    bitmap_memory_bytes: int = Field(..., description="位图索引占用内存(字节)")
@@ -0,0 +1,69 @@
+"""
+等级标准模式
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, validator
+
+from app.utils.water_quality_calculator import WaterQualityCalculator
+
+
+class GradingStandardCreate(BaseModel):
+    """等级标准创建模式"""
+    
+    name: str = Field(..., min_length=1, max_length=100, description="标准名称（同名标准创建时版本号递增）")
+    description: Optional[str] = Field(None, description="说明")
+    thresholds: Dict[str, Dict[str, float]] = Field(
+        ..., description="各指标Ⅰ类至Ⅴ类阈值（mg/L），结构与GB3838-2002标准相同"
+    )
+    
+    @validator('thresholds')
+    def validate_thresholds(cls, v):
+        """校验阈值完整且按等级非递减"""
+        WaterQualityCalculator.validate_standards(v)
+        return v
+
+
+class GradingStandardResponse(BaseModel):
+    """等级标准响应模式"""
+    
+    id: int = Field(..., description="标准ID")
+    name: str = Field(..., description="标准名称")
+    version: int = Field(..., description="版本号")
+    description: Optional[str] = Field(None, description="说明")
+    thresholds: Dict[str, Dict[str, float]] = Field(..., description="各指标Ⅰ类至Ⅴ类阈值")
+    is_active: bool = Field(..., description="是否生效")
+    created_at: datetime = Field(..., description="创建时间")
+    
+    class Config:
+        from_attributes = True
+
+
+class GradingLevelCount(BaseModel):
+    """等级数量"""
+    
+    level: str = Field(..., description="综合等级（未评级记为'未评级'）")
+    count: int = Field(..., description="数量")
+
+
+class GradingLevelTransition(BaseModel):
+    """等级变化"""
+    
+    from_level: str = Field(..., description="当前存储的综合等级")
+    to_level: str = Field(..., description="按候选标准计算的综合等级")
+    count: int = Field(..., description="数量")
+
+
+class GradingWhatIfResponse(BaseModel):
+    """候选标准重新评级预览响应模式（不修改已存储的等级）"""
+    
+    standard_id: Optional[int] = Field(None, description="候选标准ID（未保存的标准为空）")
+    standard_name: str = Field(..., description="候选标准名称")
+    standard_version: Optional[int] = Field(None, description="候选标准版本号")
+    total_count: int = Field(..., description="数据总数")
+    changed_count: int = Field(..., description="综合等级变化的数量")
+    changed_rate: float = Field(..., description="综合等级变化比例(%)")
+    current_distribution: List[GradingLevelCount] = Field(..., description="当前综合等级分布")
+    candidate_distribution: List[GradingLevelCount] = Field(..., description="候选标准下的综合等级分布")
+    transitions: List[GradingLevelTransition] = Field(..., description="综合等级变化明细")
+    elapsed_seconds: float = Field(..., description="计算耗时（秒）")
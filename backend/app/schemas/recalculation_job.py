@@ -0,0 +1,26 @@
+"""
+等级重新计算任务模式
+"""
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+
+class RecalculationJobResponse(BaseModel):
+    """等级重新计算任务响应模式"""
+    
+    id: int = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态: pending, running, completed, failed")
+    chunk_size: int = Field(..., description="每块数量")
+    last_id: int = Field(..., description="已处理的最大水质数据ID")
+    total_count: int = Field(..., description="总数量")
+    processed_count: int = Field(..., description="已处理数量")
+    changed_count: int = Field(..., description="等级变化数量")
+    progress: float = Field(..., description="进度百分比")
+    error_message: Optional[str] = Field(None, description="错误信息")
+    created_at: datetime = Field(..., description="创建时间")
+    updated_at: datetime = Field(..., description="更新时间")
+    finished_at: Optional[datetime] = Field(None, description="完成时间")
+    
+    class Config:
+        from_attributes = True
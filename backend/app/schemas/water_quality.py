@@ -62,6 +62,18 @@ class WaterQualityBase(BaseModel):
             raise ValueError("水质指标数值必须为正数")
         return v
     
+    @validator(
+        'cod_level', 'ammonia_nitrogen_level', 'total_phosphorus_level',
+        'potassium_permanganate_level', 'comprehensive_quality_level'
+    )
+    def validate_level(cls, v):
+        """验证等级必须为已知等级（空字符串视为未填写）"""
+        if v is None or v.strip() == "":
+            return None
+        if v.strip() not in WaterQualityCalculator.LEVEL_CODES:
+            raise ValueError(f"未知的水质等级: {v}")
+        return v.strip()
+    
     @validator('comprehensive_level_number')
     def validate_level_number(cls, v):
         """验证等级数范围"""
@@ -122,6 +134,18 @@ class WaterQualityUpdate(BaseModel):
                 except ValueError:
                     raise ValueError(f"Invalid date format: {v}")
         return v
+    
+    @validator(
+        'cod_level', 'ammonia_nitrogen_level', 'total_phosphorus_level',
+        'potassium_permanganate_level', 'comprehensive_quality_level'
+    )
+    def validate_level(cls, v):
+        """验证等级必须为已知等级（空字符串视为未填写）"""
+        if v is None or v.strip() == "":
+            return None
+        if v.strip() not in WaterQualityCalculator.LEVEL_CODES:
+            raise ValueError(f"未知的水质等级: {v}")
+        return v.strip()
 
 
 class WaterQualityResponse(WaterQualityBase):
@@ -138,10 +162,13 @@ class WaterQualityResponse(WaterQualityBase):
 class WaterQualityListResponse(BaseModel):
     """水质数据列表响应模式"""
     
-    total: int = Field(..., description="总数")
+    total: Optional[int] = Field(None, description="总数（has_more方式下为空，estimated方式下为估算值）")
     page: int = Field(..., description="当前页码")
     per_page: int = Field(..., description="每页数量")
     items: list[WaterQualityResponse] = Field(..., description="数据列表")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（没有更多数据时为空）")
+    has_more: bool = Field(False, description="是否还有下一页")
+    count_mode: str = Field("exact", description="总数计算方式: exact, estimated, has_more")
 
 
 class WaterQualityQuery(BaseModel):
@@ -154,10 +181,19 @@ class WaterQualityQuery(BaseModel):
     sampling_date_end: Optional[datetime] = Field(None, description="取样结束日期")
     comprehensive_quality_level: Optional[str] = Field(None, description="综合水质等级")
     code: Optional[str] = Field(None, description="编号")
+    cursor: Optional[str] = Field(None, description="分页游标，指定时忽略页码")
+    count_mode: str = Field("exact", description="总数计算方式: exact, estimated, has_more")
     
     @validator('sampling_date_end')
     def validate_date_range(cls, v, values):
         """验证日期范围"""
         if v and values.get('sampling_date_start') and v < values['sampling_date_start']:
             raise ValueError('结束日期不能早于开始日期')
+        return v
+    
+    @validator('count_mode')
+    def validate_count_mode(cls, v):
+        """验证总数计算方式"""
+        if v not in ('exact', 'estimated', 'has_more'):
+            raise ValueError('总数计算方式只能是 exact、estimated 或 has_more')
         return v 
\ No newline at end of file
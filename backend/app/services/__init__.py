@@ -4,5 +4,13 @@
 from app.services.water_quality_service import WaterQualityService
 from app.services.user_service import UserService
 from app.services.dashboard_service import DashboardService
+from app.services.rollup_service import RollupService
+from app.services.recalculation_service import RecalculationService
+from app.services.search_index_service import SearchIndexService
+from app.services.snapshot_service import SnapshotService
+from app.services.import_service import ImportService
+from app.services.export_service import ExportService
+from app.services.grading_standard_service import GradingStandardService
+from app.services.async_service import AsyncWaterQualityService, AsyncDashboardService, AsyncUserService
 
-__all__ = ["WaterQualityService", "UserService", "DashboardService"] 
\ No newline at end of file
+__all__ = ["WaterQualityService", "UserService", "DashboardService", "RollupService", "RecalculationService", "SearchIndexService", "SnapshotService", "ImportService", "ExportService", "GradingStandardService", "AsyncWaterQualityService", "AsyncDashboardService", "AsyncUserService"] 
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+异步服务层（复用同步服务的查询、缓存、汇总表和快照维护逻辑）
+"""
+from datetime import datetime
+from typing import Any, Callable, Optional, TypeVar
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.security import verify_password
+from app.db.async_base import RouteSession, run_with_session
+from app.models.user import User
+from app.services.dashboard_service import DashboardService
+from app.services.user_service import UserService
+from app.services.water_quality_service import WaterQualityService
+
+T = TypeVar("T")
+
+
+def _delegate(name: str) -> Callable[..., Any]:
+    """生成以协程方式调用同步服务同名方法的方法"""
+    async def method(self: "AsyncService", *args, **kwargs):
+        return await self.run(lambda session: getattr(self.service_class(session), name)(*args, **kwargs))
+    
+    method.__name__ = name
+    method.__doc__ = f"异步调用 {name}"
+    return method
+
+
+class AsyncService:
+    """
+    异步服务基类
+    
+    会话为AsyncSession时通过run_sync执行同步服务：同步代码在事件循环线程中以greenlet方式运行，
+    数据库IO由异步驱动完成并让出事件循环，不占用线程池线程；
+    会话为同步Session（未开启异步数据库）时在线程池中执行，与同步路由相同。
+    run_sync中的计算会占用事件循环，CPU密集的操作需另行放到线程池
+    """
+    
+    # 被封装的同步服务类
+    service_class: type = None
+    
+    def __init__(self, db: RouteSession):
+        self.db = db
+    
+    async def run(self, function: Callable[[Session], T]) -> T:
+        """以同步会话执行函数"""
+        return await run_with_session(self.db, function)
+
+
+class AsyncWaterQualityService(AsyncService):
+    """异步水质数据服务"""
+    
+    service_class = WaterQualityService
+    
+    get_water_quality_by_id = _delegate("get_water_quality_by_id")
+    get_water_quality_list = _delegate("get_water_quality_list")
+    create_water_quality = _delegate("create_water_quality")
+    update_water_quality = _delegate("update_water_quality")
+    delete_water_quality = _delegate("delete_water_quality")
+    get_water_quality_statistics = _delegate("get_water_quality_statistics")
+    get_river_list = _delegate("get_river_list")
+    search_field_values = _delegate("search_field_values")
+    get_quality_levels = _delegate("get_quality_levels")
+
+
+class AsyncDashboardService(AsyncService):
+    """异步大屏可视化服务"""
+    
+    service_class = DashboardService
+    
+    get_overview_statistics = _delegate("get_overview_statistics")
+    get_river_statistics = _delegate("get_river_statistics")
+    get_quality_distribution = _delegate("get_quality_distribution")
+    get_monthly_trend = _delegate("get_monthly_trend")
+    get_indicator_statistics = _delegate("get_indicator_statistics")
+    get_recent_water_quality = _delegate("get_recent_water_quality")
+    get_warning_water_quality = _delegate("get_warning_water_quality")
+    get_dashboard_data = _delegate("get_dashboard_data")
+    get_river_list = _delegate("get_river_list")
+    get_river_recent_water_quality = _delegate("get_river_recent_water_quality")
+    get_method_list = _delegate("get_method_list")
+    get_method_statistics = _delegate("get_method_statistics")
+    get_method_overview_statistics = _delegate("get_method_overview_statistics")
+    get_method_river_statistics = _delegate("get_method_river_statistics")
+    get_method_quality_distribution = _delegate("get_method_quality_distribution")
+    get_method_monthly_trend = _delegate("get_method_monthly_trend")
+    get_method_indicator_statistics = _delegate("get_method_indicator_statistics")
+    get_method_recent_water_quality = _delegate("get_method_recent_water_quality")
+    get_method_warning_water_quality = _delegate("get_method_warning_water_quality")
+    get_method_dashboard_data = _delegate("get_method_dashboard_data")
+    get_water_quality_level_statistics = _delegate("get_water_quality_level_statistics")
+
+
+class AsyncUserService(AsyncService):
+    """异步用户服务"""
+    
+    service_class = UserService
+    
+    get_user_by_id = _delegate("get_user_by_id")
+    get_user_by_email = _delegate("get_user_by_email")
+    get_user_by_username = _delegate("get_user_by_username")
+    get_user_by_username_or_email = _delegate("get_user_by_username_or_email")
+    create_access_token_for_user = _delegate("create_access_token_for_user")
+    logout_user = _delegate("logout_user")
+    
+    async def authenticate_user(self, username_or_email: str, password: str) -> Optional[User]:
+        """认证用户（密码哈希校验为CPU密集操作，在线程池中执行以免阻塞事件循环）"""
+        user = await self.get_user_by_username_or_email(username_or_email)
+        if not user:
+            return None
+        
+        if not await run_in_threadpool(verify_password, password, user.hashed_password):
+            return None
+        
+        # 更新最后登录时间
+        def update_last_login(session: Session) -> None:
+            user.last_login = datetime.now()
+            session.commit()
+            # 数据库生成的更新时间在提交后过期，需在会话中重新加载
+            session.refresh(user)
+        
+        await self.run(update_last_login)
+        return user
@@ -1,11 +1,23 @@
 """
 大屏可视化服务层
 """
-from typing import List, Tuple
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, Any, Callable
 from datetime import datetime
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case, and_, desc
+from sqlalchemy import func, case, and_, desc, type_coerce
 from app.models.water_quality import WaterQuality
+from app.models.water_quality_rollup import WaterQualityRollup
+from app.db.base import SessionLocal
+from app.db.routing import get_routing_info, primary_read, use_read_replica
+from app.core.cache import VersionedTTLCache, cached_method
+from app.core.locks import wait_futures
+from app.services.snapshot_service import SnapshotService
+from app.utils.columnar_snapshot import ColumnarSnapshot, MISSING_TIMESTAMP, from_timestamp
+from app.utils.bitmap_index import popcount, to_positions, union
 from app.schemas.dashboard import (
     OverviewStatistics, 
     RiverStatistics, 
@@ -28,13 +40,82 @@ from app.schemas.dashboard import (
     IndicatorLevelStatistics, 
     IndicatorLevelDistribution
 )
+from config import settings
+
+# 大屏结果缓存（按方法名和参数缓存，数据写入后失效）
+dashboard_cache = VersionedTTLCache(
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL,
+    max_size=settings.DASHBOARD_CACHE_MAX_SIZE
+)
+
+
+def _dashboard_cached_method(cache_if: Optional[Callable[[Any], bool]] = None):
+    """大屏结果缓存装饰器，未命中时的计算使用主库（缓存按主库的数据版本号失效，不能缓存副本上的旧数据）"""
+    decorator = cached_method(dashboard_cache, enabled=settings.DASHBOARD_CACHE_ENABLED, cache_if=cache_if)
+    if not settings.DASHBOARD_CACHE_ENABLED:
+        return decorator
+    return lambda func: decorator(primary_read(func))
+
+
+dashboard_cached = _dashboard_cached_method()
+# 完整数据只缓存各部分都成功获取的结果
+dashboard_complete_cached = _dashboard_cached_method(
+    cache_if=lambda response: not response.unavailable_sections
+)
+
+logger = logging.getLogger(__name__)
+
+# 水质分类（下标0为未知），与_classify_water_quality的返回值对应
+CLASSIFICATIONS = ("unknown", "excellent", "good", "poor", "very_poor", "polluted")
+
+# 警告等级的污染严重程度（数字越小越严重）
+WARNING_LEVEL_ORDER = {"重度黑臭": 1, "轻度黑臭": 2, "劣Ⅴ类": 3, "Ⅴ类": 4}
+
+# 由汇总结果构建的完整数据部分（汇总结果不可用时均为空）
+SUMMARY_SECTIONS = ("overview", "river_stats", "quality_distribution", "monthly_trend", "indicator_stats")
+
+# 并行获取完整数据各组成部分的线程池（首次使用时创建）
+_part_executor: Optional[ThreadPoolExecutor] = None
+_part_executor_lock = threading.Lock()
+
+
+def _get_part_executor() -> ThreadPoolExecutor:
+    """获取并行获取大屏组成部分的线程池"""
+    global _part_executor
+    with _part_executor_lock:
+        if _part_executor is None:
+            _part_executor = ThreadPoolExecutor(
+                max_workers=settings.DASHBOARD_PARALLEL_WORKERS,
+                thread_name_prefix="dashboard-part"
+            )
+        return _part_executor
+
+
+def _run_part(part: Callable[["DashboardService"], Any], routing_info: Dict[str, Any]) -> Any:
+    """使用独立的数据库会话执行大屏组成部分（沿用请求会话的路由状态：写后读一致、缓存填充使用主库）"""
+    db = SessionLocal()
+    db.info.update(routing_info)
+    try:
+        return part(DashboardService(db))
+    finally:
+        db.close()
 
 
 class DashboardService:
     """大屏可视化服务"""
     
+    # 指标配置：(指标名称, 数值字段, 单位, 标准值)
+    INDICATORS = [
+        ("COD", "cod_value", "mg/L", 20.0),
+        ("氨氮", "ammonia_nitrogen_value", "mg/L", 1.0),
+        ("总磷", "total_phosphorus_value", "mg/L", 0.2),
+        ("高锰酸钾", "potassium_permanganate_value", "mg/L", 6.0)
+    ]
+    
     def __init__(self, db: Session):
         self.db = db
+        # 大屏只读取数据，查询使用只读副本
+        use_read_replica(db)
     
     def _classify_water_quality(self, level: str) -> str:
         """分类水质等级"""
@@ -76,196 +157,522 @@ class DashboardService:
     def _filter_by_method(self, query, method: str):
         """根据方式过滤查询，处理'其他'方式"""
         if method == "其他":
-            return query.filter(
-                func.coalesce(WaterQuality.method, "") == ""
-            )
+            return query.filter(self.normalized_method_column() == "其他")
         else:
             return query.filter(WaterQuality.method == method)
     
-    def get_overview_statistics(self) -> OverviewStatistics:
-        """获取总览统计数据"""
-        # 获取所有数据的水质等级分布
-        quality_stats = self.db.query(
-            WaterQuality.comprehensive_quality_level,
-            func.count(WaterQuality.id).label('count')
-        ).group_by(WaterQuality.comprehensive_quality_level).all()
+    @classmethod
+    def normalized_method_column(cls):
+        """标准化方式的SQL表达式，空白方式统一为'其他'"""
+        trimmed_method = func.trim(func.coalesce(WaterQuality.method, ""))
+        return case(
+            (trimmed_method == "", "其他"),
+            else_=trimmed_method
+        )
+    
+    @classmethod
+    def aggregate_columns(cls) -> list:
+        """聚合列：数量、最新采样时间以及各指标的count/sum/min/max/超标数"""
+        columns = [
+            func.count(WaterQuality.id).label('sample_count'),
+            func.max(WaterQuality.sampling_date).label('latest_sampling_date')
+        ]
+        for _, column_name, _, standard_value in cls.INDICATORS:
+            column = getattr(WaterQuality, column_name)
+            columns.extend([
+                func.count(column).label(f'{column_name}_count'),
+                func.sum(column).label(f'{column_name}_sum'),
+                func.min(column).label(f'{column_name}_min'),
+                func.max(column).label(f'{column_name}_max'),
+                func.count(case((column > standard_value, 1))).label(f'{column_name}_exceed_count')
+            ])
+        return columns
+    
+    def _query_aggregate_cells(self, method: Optional[str] = None) -> list:
+        """
+        获取聚合单元
         
-        # 统计各个等级的数量
-        total_records = 0
-        excellent_count = 0
-        good_count = 0
-        poor_count = 0
-        very_poor_count = 0
-        polluted_count = 0
+        按(河道, 方式, 月份, 综合等级)分组，数量、最新采样时间和各指标聚合
+        一次取回，供大屏各模块拆分使用。数据来源由DASHBOARD_DATA_SOURCE决定：
+        rollup读取预聚合汇总表，raw直接单次扫描水质数据表
+        """
+        if settings.DASHBOARD_DATA_SOURCE == "rollup":
+            return self._query_rollup_cells(method)
         
-        for level, count in quality_stats:
-            total_records += count
-            classification = self._classify_water_quality(level)
-            
-            if classification == "excellent":
-                excellent_count += count
-            elif classification == "good":
-                good_count += count
-            elif classification == "poor":
-                poor_count += count
-            elif classification == "very_poor":
-                very_poor_count += count
-            elif classification == "polluted":
-                polluted_count += count
-        
-        # 计算优质水质达标率 (I-III类)
-        excellent_rate = (excellent_count / total_records * 100) if total_records > 0 else 0
-        
-        # 获取最新数据更新时间
-        latest_data = self.db.query(WaterQuality).order_by(WaterQuality.sampling_date.desc()).first()
-        latest_update = latest_data.sampling_date if latest_data else datetime.now()
-        
-        return OverviewStatistics(
-            total_records=total_records,
-            excellent_count=excellent_count,
-            good_count=good_count,
-            poor_count=poor_count,
-            very_poor_count=very_poor_count,
-            polluted_count=polluted_count,
-            excellent_rate=round(excellent_rate, 2),
-            latest_update=latest_update
+        month = func.strftime('%Y-%m', WaterQuality.sampling_date)
+        normalized_method = self.normalized_method_column()
+        query = self.db.query(
+            WaterQuality.river_name.label('river_name'),
+            normalized_method.label('method'),
+            month.label('month'),
+            WaterQuality.comprehensive_quality_level.label('level'),
+            *self.aggregate_columns()
         )
+        if method is not None:
+            query = self._filter_by_method(query, method)
+        
+        return query.group_by(
+            WaterQuality.river_name, normalized_method, month, WaterQuality.comprehensive_quality_level
+        ).all()
     
-    def get_river_statistics(self, limit: int = 20) -> List[RiverStatistics]:
-        """获取河道统计数据"""
-        # 获取每个河道的数据统计
-        river_stats = self.db.query(
-            WaterQuality.river_name,
-            func.count(WaterQuality.id).label('total_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["Ⅰ类", "Ⅱ类", "Ⅲ类"]), 1),
-                else_=0
-            )).label('excellent_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅳ类", 1),
-                else_=0
-            )).label('good_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅴ类", 1),
-                else_=0
-            )).label('poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "劣Ⅴ类", 1),
-                else_=0
-            )).label('very_poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["轻度黑臭", "重度黑臭"]), 1),
-                else_=0
-            )).label('polluted_count'),
-            func.max(WaterQuality.sampling_date).label('latest_sampling_date')
-        ).group_by(WaterQuality.river_name)\
-         .order_by(func.count(WaterQuality.id).desc())\
-         .limit(limit).all()
+    def _query_rollup_cells(self, method: Optional[str] = None) -> list:
+        """从汇总表获取聚合单元"""
+        # 空等级（存储代码0）与明细数据一致记为None
+        level = type_coerce(case(
+            (WaterQualityRollup.comprehensive_quality_level == "", None),
+            else_=WaterQualityRollup.comprehensive_quality_level
+        ), WaterQualityRollup.comprehensive_quality_level.type)
+        columns = [
+            WaterQualityRollup.river_name.label('river_name'),
+            WaterQualityRollup.method.label('method'),
+            WaterQualityRollup.month.label('month'),
+            level.label('level'),
+            func.sum(WaterQualityRollup.sample_count).label('sample_count'),
+            func.max(WaterQualityRollup.latest_sampling_date).label('latest_sampling_date')
+        ]
+        for _, column_name, _, _ in self.INDICATORS:
+            columns.extend([
+                func.sum(getattr(WaterQualityRollup, f'{column_name}_count')).label(f'{column_name}_count'),
+                func.sum(getattr(WaterQualityRollup, f'{column_name}_sum')).label(f'{column_name}_sum'),
+                func.min(getattr(WaterQualityRollup, f'{column_name}_min')).label(f'{column_name}_min'),
+                func.max(getattr(WaterQualityRollup, f'{column_name}_max')).label(f'{column_name}_max'),
+                func.sum(getattr(WaterQualityRollup, f'{column_name}_exceed_count')).label(f'{column_name}_exceed_count')
+            ])
+        
+        query = self.db.query(*columns)
+        if method is not None:
+            query = query.filter(WaterQualityRollup.method == method)
+        
+        return query.group_by(
+            WaterQualityRollup.river_name, WaterQualityRollup.method, WaterQualityRollup.month, level
+        ).all()
+    
+    def _get_summary(self, method: Optional[str] = None) -> Dict[str, Any]:
+        """获取(特定方式的)汇总结果"""
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            return self._summarize_snapshot(method)
+        return self._summarize_aggregate_cells(self._query_aggregate_cells(method))
+    
+    def _get_snapshot_positions(self, snapshot: ColumnarSnapshot, method: Optional[str] = None) -> np.ndarray:
+        """获取快照中(特定方式的)有效行位置"""
+        alive = snapshot.column('alive')
+        if method is None:
+            return np.flatnonzero(alive)
+        
+        method_code = snapshot.dictionaries['method'].code_of(method)
+        if method_code is None:
+            return np.flatnonzero(np.zeros(len(alive), dtype=bool))
+        return np.flatnonzero(alive & (snapshot.column('method') == method_code))
+    
+    def _summarize_snapshot_groups(self, codes: np.ndarray, classes: np.ndarray, dates: np.ndarray,
+                                   values: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """按字典代码分组统计数量、各分类数量和最新采样时间"""
+        group_count = len(values)
+        class_count = len(CLASSIFICATIONS)
+        counts = np.bincount(codes * class_count + classes, minlength=group_count * class_count)
+        counts = counts.reshape(group_count, class_count)
+        totals = counts.sum(axis=1)
+        latest = np.full(group_count, MISSING_TIMESTAMP, dtype=np.int64)
+        np.maximum.at(latest, codes, dates)
+        
+        groups = {}
+        for code in np.flatnonzero(totals):
+            group = self._new_group_stats()
+            group['total_count'] = int(totals[code])
+            group['latest_sampling_date'] = from_timestamp(latest[code])
+            for class_index, classification in enumerate(CLASSIFICATIONS[1:], start=1):
+                group[f'{classification}_count'] = int(counts[code, class_index])
+            groups[values[code]] = group
+        return groups
+    
+    def _summarize_snapshot(self, method: Optional[str] = None) -> Dict[str, Any]:
+        """由列式快照向量化计算汇总结果（结构与_summarize_aggregate_cells一致）"""
+        snapshot = SnapshotService(self.db).ensure_fresh()
+        with snapshot.read():
+            positions = self._get_snapshot_positions(snapshot, method)
+            # 全部行有效时直接使用视图，避免逐列复制
+            if len(positions) == snapshot.size:
+                positions = slice(None)
+            dictionaries = snapshot.dictionaries
+            levels = snapshot.column('comprehensive_quality_level')[positions]
+            dates = snapshot.column('sampling_date')[positions]
+            
+            # 综合等级代码 -> 分类下标
+            level_values = dictionaries['comprehensive_quality_level'].values
+            level_classes = np.array(
+                [CLASSIFICATIONS.index(self._classify_water_quality(level)) for level in level_values],
+                dtype=np.int64
+            )
+            classes = level_classes[levels] if len(level_values) else np.zeros(0, dtype=np.int64)
+            
+            level_totals = np.bincount(levels, minlength=len(level_values))
+            level_counts = {level_values[code]: int(level_totals[code]) for code in np.flatnonzero(level_totals)}
+            
+            rivers = self._summarize_snapshot_groups(
+                snapshot.column('river_name')[positions], classes, dates, dictionaries['river_name'].values
+            )
+            methods = self._summarize_snapshot_groups(
+                snapshot.column('method')[positions], classes, dates, dictionaries['method'].values
+            )
+            
+            month_codes = snapshot.column('month')[positions]
+            month_values = dictionaries['month'].values
+            month_totals = np.bincount(month_codes, minlength=len(month_values))
+            month_excellent = np.bincount(
+                month_codes[classes == CLASSIFICATIONS.index("excellent")], minlength=len(month_values)
+            )
+            months = {
+                month_values[code]: {
+                    'total_count': int(month_totals[code]),
+                    'excellent_count': int(month_excellent[code])
+                }
+                for code in np.flatnonzero(month_totals)
+            }
+            
+            indicators = {}
+            for _, column_name, _, standard_value in self.INDICATORS:
+                column = snapshot.column(column_name)[positions]
+                column = column[~np.isnan(column)]
+                indicators[column_name] = {
+                    'count': len(column),
+                    'sum': float(column.sum()),
+                    'min': float(column.min()) if len(column) else None,
+                    'max': float(column.max()) if len(column) else None,
+                    'exceed_count': int(np.count_nonzero(column > standard_value))
+                }
+            
+            latest_update = from_timestamp(dates.max()) if len(dates) else None
         
-        result = []
-        for stat in river_stats:
-            excellent_rate = (stat.excellent_count / stat.total_count * 100) if stat.total_count > 0 else 0
+        return {
+            'level_counts': level_counts,
+            'rivers': rivers,
+            'methods': methods,
+            'months': months,
+            'indicators': indicators,
+            'latest_update': latest_update
+        }
+    
+    def _get_class_bitmaps(self, snapshot: ColumnarSnapshot) -> Dict[str, np.ndarray]:
+        """各水质分类（不含未知）的综合等级位图"""
+        level_values = snapshot.dictionaries['comprehensive_quality_level'].values
+        return {
+            classification: union(
+                [
+                    snapshot.bitmaps.get('comprehensive_quality_level', code)
+                    for code, level in enumerate(level_values)
+                    if self._classify_water_quality(level) == classification
+                ],
+                snapshot.bitmaps.byte_count
+            )
+            for classification in CLASSIFICATIONS[1:]
+        }
+    
+    def _summarize_snapshot_bitmaps(self, method: str, include_rivers: bool = False) -> Dict[str, Any]:
+        """
+        由位图索引计算特定方式的等级数量（和河道统计）
+        
+        各项数量为方式位图与综合等级、河道位图按位与后的popcount；
+        最新采样时间按方式位图的行位置取最大值
+        """
+        snapshot = SnapshotService(self.db).ensure_fresh()
+        with snapshot.read():
+            bitmaps = snapshot.bitmaps
+            dictionaries = snapshot.dictionaries
+            method_bitmap = bitmaps.get('method', dictionaries['method'].code_of(method))
+            
+            level_counts = {}
+            for code, level in enumerate(dictionaries['comprehensive_quality_level'].values):
+                count = popcount(method_bitmap & bitmaps.get('comprehensive_quality_level', code))
+                if count:
+                    level_counts[level] = count
+            
+            positions = to_positions(method_bitmap)
+            dates = snapshot.sampling_dates[positions]
+            latest_update = from_timestamp(dates.max()) if len(dates) else None
+            
+            rivers = {}
+            if include_rivers:
+                class_bitmaps = self._get_class_bitmaps(snapshot)
+                river_values = dictionaries['river_name'].values
+                latest = np.full(len(river_values), MISSING_TIMESTAMP, dtype=np.int64)
+                np.maximum.at(latest, snapshot.codes['river_name'][positions], dates)
+                
+                for code, river_name in enumerate(river_values):
+                    river_bitmap = method_bitmap & bitmaps.get('river_name', code)
+                    total_count = popcount(river_bitmap)
+                    if total_count == 0:
+                        continue
+                    group = self._new_group_stats()
+                    group['total_count'] = total_count
+                    group['latest_sampling_date'] = from_timestamp(latest[code])
+                    for classification, class_bitmap in class_bitmaps.items():
+                        group[f'{classification}_count'] = popcount(river_bitmap & class_bitmap)
+                    rivers[river_name] = group
+        
+        return {
+            'level_counts': level_counts,
+            'rivers': rivers,
+            'latest_update': latest_update
+        }
+    
+    def _get_snapshot_records(self, method: Optional[str], limit: int, warning_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        从列式快照获取最新（或警告）水质数据
+        
+        最新数据按采样时间倒序；警告数据先按污染严重程度、再按采样时间倒序；时间相同时ID大的在前
+        """
+        snapshot = SnapshotService(self.db).ensure_fresh()
+        with snapshot.read():
+            positions = self._get_snapshot_positions(snapshot, method)
+            dates = snapshot.column('sampling_date')[positions]
+            # 排序键升序取前limit个
+            sort_key = -dates
             
-            result.append(RiverStatistics(
-                river_name=stat.river_name,
-                total_count=stat.total_count,
-                excellent_count=stat.excellent_count,
-                good_count=stat.good_count,
-                poor_count=stat.poor_count,
-                very_poor_count=stat.very_poor_count,
-                polluted_count=stat.polluted_count,
-                excellent_rate=round(excellent_rate, 2),
-                latest_sampling_date=stat.latest_sampling_date
+            if warning_only:
+                level_values = snapshot.dictionaries['comprehensive_quality_level'].values
+                level_order = np.array([WARNING_LEVEL_ORDER.get(level, 0) for level in level_values], dtype=np.int64)
+                orders = level_order[snapshot.column('comprehensive_quality_level')[positions]] \
+                    if len(level_values) else np.zeros(0, dtype=np.int64)
+                is_warning = orders > 0
+                positions, dates, orders = positions[is_warning], dates[is_warning], orders[is_warning]
+                # 严重程度放在高位，采样时间（微秒时间戳小于2^53）放在低位
+                sort_key = (orders << 53) - dates
+            
+            if len(positions) > limit > 0:
+                kth = np.partition(sort_key, limit - 1)[limit - 1]
+                candidates = sort_key <= kth
+                positions, sort_key = positions[candidates], sort_key[candidates]
+            order = np.lexsort((-snapshot.column('id')[positions], sort_key))[:limit]
+            positions = positions[order]
+            
+            records = []
+            for position in positions:
+                record = {
+                    'id': int(snapshot.ids[position]),
+                    'river_name': snapshot.dictionaries['river_name'].values[snapshot.codes['river_name'][position]],
+                    'sampling_date': from_timestamp(snapshot.sampling_dates[position]),
+                    'comprehensive_quality_level': snapshot.dictionaries['comprehensive_quality_level'].values[
+                        snapshot.codes['comprehensive_quality_level'][position]
+                    ]
+                }
+                for _, column_name, _, _ in self.INDICATORS:
+                    value = snapshot.values[column_name][position]
+                    record[column_name] = None if np.isnan(value) else float(value)
+                records.append(record)
+        
+        return records
+    
+    def _get_snapshot_values(self, field: str) -> List[Any]:
+        """获取快照中至少有一条有效数据的字段取值"""
+        snapshot = SnapshotService(self.db).ensure_fresh()
+        with snapshot.read():
+            values = snapshot.dictionaries[field].values
+            counts = np.bincount(snapshot.column(field)[snapshot.column('alive')], minlength=len(values))
+            return [values[code] for code in np.flatnonzero(counts)]
+    
+    def _get_recent_records(self, method: Optional[str] = None, limit: int = 10) -> List[RecentWaterQuality]:
+        """从列式快照获取最新水质数据"""
+        return [
+            RecentWaterQuality(**dict(
+                record, comprehensive_quality_level=record['comprehensive_quality_level'] or "未知"
             ))
+            for record in self._get_snapshot_records(method, limit)
+        ]
+    
+    def _get_warning_records(self, method: Optional[str] = None, limit: int = 20) -> List[WarningWaterQuality]:
+        """从列式快照获取警告水质数据"""
+        return [
+            WarningWaterQuality(warning_level=self._get_warning_level(record['comprehensive_quality_level']), **record)
+            for record in self._get_snapshot_records(method, limit, warning_only=True)
+        ]
+    
+    def _new_group_stats(self) -> Dict[str, Any]:
+        """分组统计初始值"""
+        return {
+            'total_count': 0, 'excellent_count': 0, 'good_count': 0, 'poor_count': 0,
+            'very_poor_count': 0, 'polluted_count': 0, 'latest_sampling_date': None
+        }
+    
+    def _summarize_aggregate_cells(self, cells) -> Dict[str, Any]:
+        """将聚合单元汇总为总览、河道、方式、等级、月份和指标维度"""
+        level_counts: Dict[Optional[str], int] = {}
+        rivers: Dict[str, Dict[str, Any]] = {}
+        methods: Dict[str, Dict[str, Any]] = {}
+        months: Dict[str, Dict[str, int]] = {}
+        indicators = {
+            column_name: {'count': 0, 'sum': 0.0, 'min': None, 'max': None, 'exceed_count': 0}
+            for _, column_name, _, _ in self.INDICATORS
+        }
+        latest_update = None
+        
+        for cell in cells:
+            count = cell.sample_count
+            classification = self._classify_water_quality(cell.level)
+            
+            level_counts[cell.level] = level_counts.get(cell.level, 0) + count
+            
+            for group in (
+                rivers.setdefault(cell.river_name, self._new_group_stats()),
+                methods.setdefault(cell.method, self._new_group_stats())
+            ):
+                group['total_count'] += count
+                if classification != "unknown":
+                    group[f'{classification}_count'] += count
+                if cell.latest_sampling_date and (
+                    group['latest_sampling_date'] is None or cell.latest_sampling_date > group['latest_sampling_date']
+                ):
+                    group['latest_sampling_date'] = cell.latest_sampling_date
+            
+            month = months.setdefault(cell.month, {'total_count': 0, 'excellent_count': 0})
+            month['total_count'] += count
+            if classification == "excellent":
+                month['excellent_count'] += count
+            
+            if cell.latest_sampling_date and (latest_update is None or cell.latest_sampling_date > latest_update):
+                latest_update = cell.latest_sampling_date
+            
+            for column_name, stats in indicators.items():
+                value_count = getattr(cell, f'{column_name}_count') or 0
+                if value_count == 0:
+                    continue
+                value_min = getattr(cell, f'{column_name}_min')
+                value_max = getattr(cell, f'{column_name}_max')
+                stats['count'] += value_count
+                stats['sum'] += getattr(cell, f'{column_name}_sum') or 0
+                stats['exceed_count'] += getattr(cell, f'{column_name}_exceed_count') or 0
+                stats['min'] = value_min if stats['min'] is None else min(stats['min'], value_min)
+                stats['max'] = value_max if stats['max'] is None else max(stats['max'], value_max)
         
-        return result
+        return {
+            'level_counts': level_counts,
+            'rivers': rivers,
+            'methods': methods,
+            'months': months,
+            'indicators': indicators,
+            'latest_update': latest_update
+        }
     
-    def get_quality_distribution(self) -> List[QualityLevelDistribution]:
-        """获取水质等级分布"""
-        # 获取水质等级分布
-        quality_stats = self.db.query(
-            WaterQuality.comprehensive_quality_level,
-            func.count(WaterQuality.id).label('count')
-        ).group_by(WaterQuality.comprehensive_quality_level).all()
+    def _build_overview(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """由汇总结果构建总览统计"""
+        counts = {
+            'excellent': 0, 'good': 0, 'poor': 0, 'very_poor': 0, 'polluted': 0
+        }
+        total_records = 0
+        for level, count in summary['level_counts'].items():
+            total_records += count
+            classification = self._classify_water_quality(level)
+            if classification in counts:
+                counts[classification] += count
+        
+        excellent_rate = (counts['excellent'] / total_records * 100) if total_records > 0 else 0
         
-        total_count = sum(stat.count for stat in quality_stats)
+        return {
+            'total_records': total_records,
+            'excellent_count': counts['excellent'],
+            'good_count': counts['good'],
+            'poor_count': counts['poor'],
+            'very_poor_count': counts['very_poor'],
+            'polluted_count': counts['polluted'],
+            'excellent_rate': round(excellent_rate, 2),
+            'latest_update': summary['latest_update'] or datetime.now()
+        }
+    
+    def _build_river_stats(self, summary: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """由汇总结果构建河道统计（按数据量降序）"""
+        ordered = sorted(summary['rivers'].items(), key=lambda item: (-item[1]['total_count'], item[0]))
         
         result = []
-        for stat in quality_stats:
-            percentage = (stat.count / total_count * 100) if total_count > 0 else 0
-            result.append(QualityLevelDistribution(
-                level=stat.comprehensive_quality_level or "未知",
-                count=stat.count,
-                percentage=round(percentage, 2)
-            ))
+        for river_name, stat in ordered[:limit]:
+            excellent_rate = (stat['excellent_count'] / stat['total_count'] * 100) if stat['total_count'] > 0 else 0
+            result.append(dict(stat, river_name=river_name, excellent_rate=round(excellent_rate, 2)))
         
         return result
     
-    def get_monthly_trend(self, limit: int = 12) -> List[MonthlyTrend]:
-        """获取月度趋势数据"""
-        # 获取月度趋势数据
-        monthly_stats = self.db.query(
-            func.strftime('%Y-%m', WaterQuality.sampling_date).label('month'),
-            func.count(WaterQuality.id).label('total_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["Ⅰ类", "Ⅱ类", "Ⅲ类"]), 1),
-                else_=0
-            )).label('excellent_count')
-        ).group_by(func.strftime('%Y-%m', WaterQuality.sampling_date))\
-         .order_by(func.strftime('%Y-%m', WaterQuality.sampling_date).desc())\
-         .limit(limit).all()
+    def _build_quality_distribution(self, summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """由汇总结果构建水质等级分布"""
+        level_counts = summary['level_counts']
+        total_count = sum(level_counts.values())
         
         result = []
-        for stat in monthly_stats:
-            excellent_rate = (stat.excellent_count / stat.total_count * 100) if stat.total_count > 0 else 0
-            result.append(MonthlyTrend(
-                month=stat.month,
-                total_count=stat.total_count,
-                excellent_count=stat.excellent_count,
-                excellent_rate=round(excellent_rate, 2)
-            ))
+        for level in sorted(level_counts, key=lambda x: (x is not None, x or "")):
+            count = level_counts[level]
+            percentage = (count / total_count * 100) if total_count > 0 else 0
+            result.append({
+                'level': level or "未知",
+                'count': count,
+                'percentage': round(percentage, 2)
+            })
         
         return result
     
-    def get_indicator_statistics(self) -> List[IndicatorStatistics]:
-        """获取指标统计数据"""
-        indicators = [
-            ("COD", "cod_value", "mg/L", 20.0),
-            ("氨氮", "ammonia_nitrogen_value", "mg/L", 1.0),
-            ("总磷", "total_phosphorus_value", "mg/L", 0.2),
-            ("高锰酸钾", "potassium_permanganate_value", "mg/L", 6.0)
-        ]
+    def _build_monthly_trend(self, summary: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        """由汇总结果构建月度趋势（按月份降序）"""
+        result = []
+        for month in sorted(summary['months'], reverse=True)[:limit]:
+            stat = summary['months'][month]
+            excellent_rate = (stat['excellent_count'] / stat['total_count'] * 100) if stat['total_count'] > 0 else 0
+            result.append({
+                'month': month,
+                'total_count': stat['total_count'],
+                'excellent_count': stat['excellent_count'],
+                'excellent_rate': round(excellent_rate, 2)
+            })
         
+        return result
+    
+    def _build_indicator_stats(self, summary: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """由汇总结果构建指标统计"""
         result = []
-        for indicator_name, column_name, unit, standard_value in indicators:
-            # 获取指标统计数据
-            stats = self.db.query(
-                func.avg(getattr(WaterQuality, column_name)).label('avg_value'),
-                func.max(getattr(WaterQuality, column_name)).label('max_value'),
-                func.min(getattr(WaterQuality, column_name)).label('min_value'),
-                func.count(case(
-                    (getattr(WaterQuality, column_name) > standard_value, 1)
-                )).label('exceed_count'),
-                func.count(getattr(WaterQuality, column_name)).label('total_count')
-            ).filter(getattr(WaterQuality, column_name).is_not(None)).first()
+        for indicator_name, column_name, unit, standard_value in self.INDICATORS:
+            stats = summary['indicators'][column_name]
+            if stats['count'] == 0:
+                continue
             
-            if stats and stats.total_count > 0:
-                exceed_rate = (stats.exceed_count / stats.total_count * 100) if stats.total_count > 0 else 0
-                
-                result.append(IndicatorStatistics(
-                    indicator_name=indicator_name,
-                    avg_value=round(stats.avg_value, 2) if stats.avg_value else None,
-                    max_value=round(stats.max_value, 2) if stats.max_value else None,
-                    min_value=round(stats.min_value, 2) if stats.min_value else None,
-                    unit=unit,
-                    standard_value=standard_value,
-                    exceed_rate=round(exceed_rate, 2)
-                ))
+            avg_value = stats['sum'] / stats['count']
+            exceed_rate = stats['exceed_count'] / stats['count'] * 100
+            result.append({
+                'indicator_name': indicator_name,
+                'avg_value': round(avg_value, 2) if avg_value else None,
+                'max_value': round(stats['max'], 2) if stats['max'] else None,
+                'min_value': round(stats['min'], 2) if stats['min'] else None,
+                'unit': unit,
+                'standard_value': standard_value,
+                'exceed_rate': round(exceed_rate, 2)
+            })
         
         return result
     
+    @dashboard_cached
+    def get_overview_statistics(self) -> OverviewStatistics:
+        """获取总览统计数据"""
+        return OverviewStatistics(**self._build_overview(self._get_summary()))
+    
+    @dashboard_cached
+    def get_river_statistics(self, limit: int = 20) -> List[RiverStatistics]:
+        """获取河道统计数据"""
+        return [RiverStatistics(**stat) for stat in self._build_river_stats(self._get_summary(), limit=limit)]
+    
+    @dashboard_cached
+    def get_quality_distribution(self) -> List[QualityLevelDistribution]:
+        """获取水质等级分布"""
+        return [QualityLevelDistribution(**stat) for stat in self._build_quality_distribution(self._get_summary())]
+    
+    @dashboard_cached
+    def get_monthly_trend(self, limit: int = 12) -> List[MonthlyTrend]:
+        """获取月度趋势数据"""
+        return [MonthlyTrend(**stat) for stat in self._build_monthly_trend(self._get_summary(), limit=limit)]
+    
+    @dashboard_cached
+    def get_indicator_statistics(self) -> List[IndicatorStatistics]:
+        """获取指标统计数据"""
+        return [IndicatorStatistics(**stat) for stat in self._build_indicator_stats(self._get_summary())]
+    
+    @dashboard_cached
     def get_recent_water_quality(self, limit: int = 10) -> List[RecentWaterQuality]:
         """获取最新水质数据"""
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            return self._get_recent_records(limit=limit)
+        
         recent_data = self.db.query(WaterQuality)\
             .order_by(WaterQuality.sampling_date.desc())\
             .limit(limit).all()
@@ -285,21 +692,17 @@ class DashboardService:
         
         return result
     
+    @dashboard_cached
     def get_warning_water_quality(self, limit: int = 20) -> List[WarningWaterQuality]:
         """获取警告水质数据，优先展示污染严重的数据"""
-        # 定义污染严重程度排序（数字越小越严重）
-        pollution_order = case(
-            (WaterQuality.comprehensive_quality_level == "重度黑臭", 1),
-            (WaterQuality.comprehensive_quality_level == "轻度黑臭", 2),
-            (WaterQuality.comprehensive_quality_level == "劣Ⅴ类", 3),
-            (WaterQuality.comprehensive_quality_level == "Ⅴ类", 4),
-            else_=5
-        )
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            return self._get_warning_records(limit=limit)
         
-        # 获取警告数据，按污染严重程度和时间排序
+        # 获取警告数据（Ⅴ类及更差），按污染严重程度和时间排序
+        # 等级存储代码越大越严重，过滤和排序为代码范围扫描
         warning_data = self.db.query(WaterQuality)\
-            .filter(WaterQuality.comprehensive_quality_level.in_(["Ⅴ类", "劣Ⅴ类", "轻度黑臭", "重度黑臭"]))\
-            .order_by(pollution_order, desc(WaterQuality.sampling_date))\
+            .filter(WaterQuality.comprehensive_quality_level >= "Ⅴ类")\
+            .order_by(desc(WaterQuality.comprehensive_quality_level), desc(WaterQuality.sampling_date))\
             .limit(limit).all()
         
         result = []
@@ -318,44 +721,142 @@ class DashboardService:
         
         return result
     
+    def _run_parts(self, parts: Dict[str, Callable[["DashboardService"], Any]]) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        获取完整数据的各组成部分，返回(结果, 不可用的部分)
+        
+        DASHBOARD_PARALLEL_ENABLED开启时各部分在线程池中并行执行，每部分使用独立会话（连接池中的不同连接），
+        耗时接近最慢的部分；超过DASHBOARD_PART_TIMEOUT或出错的部分不可用。未开启时在当前会话中依次执行
+        """
+        if not settings.DASHBOARD_PARALLEL_ENABLED:
+            return {name: part(self) for name, part in parts.items()}, []
+        
+        executor = _get_part_executor()
+        routing_info = get_routing_info(self.db)
+        futures = {name: executor.submit(_run_part, part, routing_info) for name, part in parts.items()}
+        wait_futures(futures.values(), timeout=settings.DASHBOARD_PART_TIMEOUT)
+        
+        results = {}
+        unavailable = []
+        for name, future in futures.items():
+            if not future.done():
+                # 尚未开始的取消执行，已开始的在后台执行完毕后丢弃结果
+                future.cancel()
+                logger.warning(f"大屏数据部分 {name} 超过 {settings.DASHBOARD_PART_TIMEOUT} 秒未完成，返回空结果")
+                unavailable.append(name)
+            elif future.exception() is not None:
+                logger.warning(f"大屏数据部分 {name} 获取失败，返回空结果: {future.exception()}")
+                unavailable.append(name)
+            else:
+                results[name] = future.result()
+        return results, unavailable
+    
+    def _get_dashboard_parts(self, method: Optional[str] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        获取(特定方式的)完整数据的相互独立部分：汇总结果、最新数据和警告数据
+        
+        返回(结果, 不可用的响应字段)，不可用部分的结果为空
+        """
+        if method is None:
+            parts = {
+                'summary': lambda service: service._get_summary(),
+                'recent_data': lambda service: service.get_recent_water_quality(limit=10),
+                'warning_data': lambda service: service.get_warning_water_quality(limit=10)
+            }
+        else:
+            parts = {
+                'summary': lambda service: service._get_summary(method),
+                'recent_data': lambda service: service.get_method_recent_water_quality(method, limit=10),
+                'warning_data': lambda service: service.get_method_warning_water_quality(method, limit=10)
+            }
+        
+        results, unavailable = self._run_parts(parts)
+        
+        unavailable_sections = []
+        if 'summary' in unavailable:
+            results['summary'] = self._summarize_aggregate_cells([])
+            unavailable_sections.extend(SUMMARY_SECTIONS)
+        for name in ('recent_data', 'warning_data'):
+            if name in unavailable:
+                results[name] = []
+                unavailable_sections.append(name)
+        return results, unavailable_sections
+    
+    @dashboard_complete_cached
     def get_dashboard_data(self) -> DashboardResponse:
-        """获取大屏完整数据"""
+        """获取大屏完整数据（统计部分单次扫描聚合，可与最新数据、警告数据并行获取）"""
+        parts, unavailable_sections = self._get_dashboard_parts()
+        summary = parts['summary']
+        
         return DashboardResponse(
-            overview=self.get_overview_statistics(),
-            river_stats=self.get_river_statistics(),
-            quality_distribution=self.get_quality_distribution(),
-            monthly_trend=self.get_monthly_trend(),
-            indicator_stats=self.get_indicator_statistics(),
-            recent_data=self.get_recent_water_quality(limit=10),
-            warning_data=self.get_warning_water_quality(limit=10)
+            overview=OverviewStatistics(**self._build_overview(summary)),
+            river_stats=[RiverStatistics(**stat) for stat in self._build_river_stats(summary, limit=20)],
+            quality_distribution=[
+                QualityLevelDistribution(**stat) for stat in self._build_quality_distribution(summary)
+            ],
+            monthly_trend=[MonthlyTrend(**stat) for stat in self._build_monthly_trend(summary, limit=12)],
+            indicator_stats=[IndicatorStatistics(**stat) for stat in self._build_indicator_stats(summary)],
+            recent_data=parts['recent_data'],
+            warning_data=parts['warning_data'],
+            unavailable_sections=unavailable_sections
         )
     
+    @dashboard_cached
     def get_river_list(self) -> RiverListResponse:
         """获取河道列表"""
-        rivers = self.db.query(WaterQuality.river_name)\
-            .distinct()\
-            .order_by(WaterQuality.river_name)\
-            .all()
-        
-        river_names = [river[0] for river in rivers if river[0]]
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            river_names = sorted(river for river in self._get_snapshot_values('river_name') if river)
+        else:
+            rivers = self.db.query(WaterQuality.river_name)\
+                .distinct()\
+                .order_by(WaterQuality.river_name)\
+                .all()
+            river_names = [river[0] for river in rivers if river[0]]
         
         return RiverListResponse(
             rivers=river_names,
             total_count=len(river_names)
         )
     
+    def get_river_recent_water_quality(self, river_name: str, limit: int = 20) -> List[RecentWaterQuality]:
+        """获取特定河道的最新水质数据"""
+        recent_data = self.db.query(WaterQuality)\
+            .filter(WaterQuality.river_name == river_name)\
+            .order_by(WaterQuality.sampling_date.desc())\
+            .limit(limit).all()
+        
+        result = []
+        for data in recent_data:
+            result.append(RecentWaterQuality(
+                id=data.id,
+                river_name=data.river_name,
+                sampling_date=data.sampling_date,
+                comprehensive_quality_level=data.comprehensive_quality_level or "未知",
+                cod_value=data.cod_value,
+                ammonia_nitrogen_value=data.ammonia_nitrogen_value,
+                total_phosphorus_value=data.total_phosphorus_value,
+                potassium_permanganate_value=data.potassium_permanganate_value
+            ))
+        
+        return result
+    
     # 新增方式细分相关方法
+    @dashboard_cached
     def get_method_list(self) -> MethodListResponse:
         """获取方式列表"""
-        methods = self.db.query(WaterQuality.method)\
-            .distinct()\
-            .all()
-        
-        # 使用集合来去重，因为空白方式都会被标准化为"其他"
-        method_names = set()
-        for method in methods:
-            normalized_method = self._normalize_method(method[0])
-            method_names.add(normalized_method)
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            # 快照中的方式已标准化
+            method_names = set(self._get_snapshot_values('method'))
+        else:
+            methods = self.db.query(WaterQuality.method)\
+                .distinct()\
+                .all()
+            
+            # 使用集合来去重，因为空白方式都会被标准化为"其他"
+            method_names = set()
+            for method in methods:
+                normalized_method = self._normalize_method(method[0])
+                method_names.add(normalized_method)
         
         # 转换为列表并排序
         method_names_list = sorted(list(method_names))
@@ -365,257 +866,70 @@ class DashboardService:
             total_count=len(method_names_list)
         )
     
+    @dashboard_cached
     def get_method_statistics(self) -> List[MethodStatistics]:
         """获取方式统计数据"""
-        # 使用case语句将空白方式转换为"其他"
-        normalized_method = case(
-            (func.coalesce(WaterQuality.method, "") == "", "其他"),
-            else_=func.coalesce(WaterQuality.method, "其他")
-        )
-        
-        method_stats = self.db.query(
-            normalized_method.label('method'),
-            func.count(WaterQuality.id).label('total_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["Ⅰ类", "Ⅱ类", "Ⅲ类"]), 1),
-                else_=0
-            )).label('excellent_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅳ类", 1),
-                else_=0
-            )).label('good_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅴ类", 1),
-                else_=0
-            )).label('poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "劣Ⅴ类", 1),
-                else_=0
-            )).label('very_poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["轻度黑臭", "重度黑臭"]), 1),
-                else_=0
-            )).label('polluted_count'),
-            func.max(WaterQuality.sampling_date).label('latest_sampling_date')
-        ).group_by(normalized_method)\
-         .order_by(func.count(WaterQuality.id).desc())\
-         .all()
+        methods = self._get_summary()['methods']
+        ordered = sorted(methods.items(), key=lambda item: (-item[1]['total_count'], item[0]))
         
         result = []
-        for stat in method_stats:
-            excellent_rate = (stat.excellent_count / stat.total_count * 100) if stat.total_count > 0 else 0
-            
-            result.append(MethodStatistics(
-                method=stat.method,
-                total_count=stat.total_count,
-                excellent_count=stat.excellent_count,
-                good_count=stat.good_count,
-                poor_count=stat.poor_count,
-                very_poor_count=stat.very_poor_count,
-                polluted_count=stat.polluted_count,
-                excellent_rate=round(excellent_rate, 2),
-                latest_sampling_date=stat.latest_sampling_date
-            ))
+        for method, stat in ordered:
+            excellent_rate = (stat['excellent_count'] / stat['total_count'] * 100) if stat['total_count'] > 0 else 0
+            result.append(MethodStatistics(method=method, excellent_rate=round(excellent_rate, 2), **stat))
         
         return result
     
+    @dashboard_cached
     def get_method_overview_statistics(self, method: str) -> MethodOverviewStatistics:
         """获取特定方式的总览统计数据"""
-        query = self.db.query(
-            WaterQuality.comprehensive_quality_level,
-            func.count(WaterQuality.id).label('count')
-        )
-        query = self._filter_by_method(query, method)
-        quality_stats = query.group_by(WaterQuality.comprehensive_quality_level).all()
-        
-        # 统计各个等级的数量
-        total_records = 0
-        excellent_count = 0
-        good_count = 0
-        poor_count = 0
-        very_poor_count = 0
-        polluted_count = 0
-        
-        for level, count in quality_stats:
-            total_records += count
-            classification = self._classify_water_quality(level)
-            
-            if classification == "excellent":
-                excellent_count += count
-            elif classification == "good":
-                good_count += count
-            elif classification == "poor":
-                poor_count += count
-            elif classification == "very_poor":
-                very_poor_count += count
-            elif classification == "polluted":
-                polluted_count += count
-        
-        # 计算优质水质达标率
-        excellent_rate = (excellent_count / total_records * 100) if total_records > 0 else 0
-        
-        # 获取最新数据更新时间
-        latest_query = self.db.query(WaterQuality)
-        latest_query = self._filter_by_method(latest_query, method)
-        latest_data = latest_query.order_by(WaterQuality.sampling_date.desc()).first()
-        latest_update = latest_data.sampling_date if latest_data else datetime.now()
-        
-        return MethodOverviewStatistics(
-            method=method,
-            total_records=total_records,
-            excellent_count=excellent_count,
-            good_count=good_count,
-            poor_count=poor_count,
-            very_poor_count=very_poor_count,
-            polluted_count=polluted_count,
-            excellent_rate=round(excellent_rate, 2),
-            latest_update=latest_update
-        )
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            summary = self._summarize_snapshot_bitmaps(method)
+        else:
+            summary = self._get_summary(method)
+        return MethodOverviewStatistics(method=method, **self._build_overview(summary))
     
+    @dashboard_cached
     def get_method_river_statistics(self, method: str, limit: int = 20) -> List[MethodRiverStatistics]:
         """获取特定方式的河道统计数据"""
-        query = self.db.query(
-            WaterQuality.river_name,
-            func.count(WaterQuality.id).label('total_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["Ⅰ类", "Ⅱ类", "Ⅲ类"]), 1),
-                else_=0
-            )).label('excellent_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅳ类", 1),
-                else_=0
-            )).label('good_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "Ⅴ类", 1),
-                else_=0
-            )).label('poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level == "劣Ⅴ类", 1),
-                else_=0
-            )).label('very_poor_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["轻度黑臭", "重度黑臭"]), 1),
-                else_=0
-            )).label('polluted_count'),
-            func.max(WaterQuality.sampling_date).label('latest_sampling_date')
-        )
-        query = self._filter_by_method(query, method)
-        river_stats = query.group_by(WaterQuality.river_name)\
-                          .order_by(func.count(WaterQuality.id).desc())\
-                          .limit(limit).all()
-        
-        result = []
-        for stat in river_stats:
-            excellent_rate = (stat.excellent_count / stat.total_count * 100) if stat.total_count > 0 else 0
-            
-            result.append(MethodRiverStatistics(
-                method=method,
-                river_name=stat.river_name,
-                total_count=stat.total_count,
-                excellent_count=stat.excellent_count,
-                good_count=stat.good_count,
-                poor_count=stat.poor_count,
-                very_poor_count=stat.very_poor_count,
-                polluted_count=stat.polluted_count,
-                excellent_rate=round(excellent_rate, 2),
-                latest_sampling_date=stat.latest_sampling_date
-            ))
-        
-        return result
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            summary = self._summarize_snapshot_bitmaps(method, include_rivers=True)
+        else:
+            summary = self._get_summary(method)
+        return [
+            MethodRiverStatistics(method=method, **stat)
+            for stat in self._build_river_stats(summary, limit=limit)
+        ]
     
+    @dashboard_cached
     def get_method_quality_distribution(self, method: str) -> List[MethodQualityDistribution]:
         """获取特定方式的水质等级分布"""
-        query = self.db.query(
-            WaterQuality.comprehensive_quality_level,
-            func.count(WaterQuality.id).label('count')
-        )
-        query = self._filter_by_method(query, method)
-        quality_stats = query.group_by(WaterQuality.comprehensive_quality_level).all()
-        
-        total_count = sum(stat.count for stat in quality_stats)
-        
-        result = []
-        for stat in quality_stats:
-            percentage = (stat.count / total_count * 100) if total_count > 0 else 0
-            result.append(MethodQualityDistribution(
-                method=method,
-                level=stat.comprehensive_quality_level or "未知",
-                count=stat.count,
-                percentage=round(percentage, 2)
-            ))
-        
-        return result
+        return [
+            MethodQualityDistribution(method=method, **stat)
+            for stat in self._build_quality_distribution(self._get_summary(method))
+        ]
     
+    @dashboard_cached
     def get_method_monthly_trend(self, method: str, limit: int = 12) -> List[MethodMonthlyTrend]:
         """获取特定方式的月度趋势数据"""
-        query = self.db.query(
-            func.strftime('%Y-%m', WaterQuality.sampling_date).label('month'),
-            func.count(WaterQuality.id).label('total_count'),
-            func.sum(case(
-                (WaterQuality.comprehensive_quality_level.in_(["Ⅰ类", "Ⅱ类", "Ⅲ类"]), 1),
-                else_=0
-            )).label('excellent_count')
-        )
-        query = self._filter_by_method(query, method)
-        monthly_stats = query.group_by(func.strftime('%Y-%m', WaterQuality.sampling_date))\
-                            .order_by(func.strftime('%Y-%m', WaterQuality.sampling_date).desc())\
-                            .limit(limit).all()
-        
-        result = []
-        for stat in monthly_stats:
-            excellent_rate = (stat.excellent_count / stat.total_count * 100) if stat.total_count > 0 else 0
-            result.append(MethodMonthlyTrend(
-                method=method,
-                month=stat.month,
-                total_count=stat.total_count,
-                excellent_count=stat.excellent_count,
-                excellent_rate=round(excellent_rate, 2)
-            ))
-        
-        return result
+        return [
+            MethodMonthlyTrend(method=method, **stat)
+            for stat in self._build_monthly_trend(self._get_summary(method), limit=limit)
+        ]
     
+    @dashboard_cached
     def get_method_indicator_statistics(self, method: str) -> List[MethodIndicatorStatistics]:
         """获取特定方式的指标统计数据"""
-        indicators = [
-            ("COD", "cod_value", "mg/L", 20.0),
-            ("氨氮", "ammonia_nitrogen_value", "mg/L", 1.0),
-            ("总磷", "total_phosphorus_value", "mg/L", 0.2),
-            ("高锰酸钾", "potassium_permanganate_value", "mg/L", 6.0)
+        return [
+            MethodIndicatorStatistics(method=method, **stat)
+            for stat in self._build_indicator_stats(self._get_summary(method))
         ]
-        
-        result = []
-        for indicator_name, column_name, unit, standard_value in indicators:
-            # 获取指标统计数据
-            query = self.db.query(
-                func.avg(getattr(WaterQuality, column_name)).label('avg_value'),
-                func.max(getattr(WaterQuality, column_name)).label('max_value'),
-                func.min(getattr(WaterQuality, column_name)).label('min_value'),
-                func.count(case(
-                    (getattr(WaterQuality, column_name) > standard_value, 1)
-                )).label('exceed_count'),
-                func.count(getattr(WaterQuality, column_name)).label('total_count')
-            )
-            query = self._filter_by_method(query, method)
-            stats = query.filter(getattr(WaterQuality, column_name).is_not(None)).first()
-            
-            if stats and stats.total_count > 0:
-                exceed_rate = (stats.exceed_count / stats.total_count * 100) if stats.total_count > 0 else 0
-                
-                result.append(MethodIndicatorStatistics(
-                    method=method,
-                    indicator_name=indicator_name,
-                    avg_value=round(stats.avg_value, 2) if stats.avg_value else None,
-                    max_value=round(stats.max_value, 2) if stats.max_value else None,
-                    min_value=round(stats.min_value, 2) if stats.min_value else None,
-                    unit=unit,
-                    standard_value=standard_value,
-                    exceed_rate=round(exceed_rate, 2)
-                ))
-        
-        return result
     
+    @dashboard_cached
     def get_method_recent_water_quality(self, method: str, limit: int = 10) -> List[RecentWaterQuality]:
         """获取特定方式的最新水质数据"""
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            return self._get_recent_records(method, limit=limit)
+        
         query = self.db.query(WaterQuality)
         query = self._filter_by_method(query, method)
         recent_data = query.order_by(WaterQuality.sampling_date.desc()).limit(limit).all()
@@ -635,22 +949,20 @@ class DashboardService:
         
         return result
     
+    @dashboard_cached
     def get_method_warning_water_quality(self, method: str, limit: int = 20) -> List[WarningWaterQuality]:
         """获取特定方式的警告水质数据"""
-        # 定义污染严重程度排序
-        pollution_order = case(
-            (WaterQuality.comprehensive_quality_level == "重度黑臭", 1),
-            (WaterQuality.comprehensive_quality_level == "轻度黑臭", 2),
-            (WaterQuality.comprehensive_quality_level == "劣Ⅴ类", 3),
-            (WaterQuality.comprehensive_quality_level == "Ⅴ类", 4),
-            else_=5
-        )
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            return self._get_warning_records(method, limit=limit)
         
+        # 等级存储代码越大越严重（Ⅴ类及更差）
         query = self.db.query(WaterQuality)
         query = self._filter_by_method(query, method)
         warning_data = query.filter(
-            WaterQuality.comprehensive_quality_level.in_(["Ⅴ类", "劣Ⅴ类", "轻度黑臭", "重度黑臭"])
-        ).order_by(pollution_order, desc(WaterQuality.sampling_date)).limit(limit).all()
+            WaterQuality.comprehensive_quality_level >= "Ⅴ类"
+        ).order_by(
+            desc(WaterQuality.comprehensive_quality_level), desc(WaterQuality.sampling_date)
+        ).limit(limit).all()
         
         result = []
         for data in warning_data:
@@ -668,19 +980,33 @@ class DashboardService:
         
         return result
     
+    @dashboard_complete_cached
     def get_method_dashboard_data(self, method: str) -> MethodDashboardResponse:
-        """获取特定方式的大屏完整数据"""
+        """获取特定方式的大屏完整数据（统计部分单次扫描聚合，可与最新数据、警告数据并行获取）"""
+        parts, unavailable_sections = self._get_dashboard_parts(method)
+        summary = parts['summary']
+        
         return MethodDashboardResponse(
             method=method,
-            overview=self.get_method_overview_statistics(method),
-            river_stats=self.get_method_river_statistics(method),
-            quality_distribution=self.get_method_quality_distribution(method),
-            monthly_trend=self.get_method_monthly_trend(method),
-            indicator_stats=self.get_method_indicator_statistics(method),
-            recent_data=self.get_method_recent_water_quality(method, limit=10),
-            warning_data=self.get_method_warning_water_quality(method, limit=10)
+            overview=MethodOverviewStatistics(method=method, **self._build_overview(summary)),
+            river_stats=[
+                MethodRiverStatistics(method=method, **stat) for stat in self._build_river_stats(summary, limit=20)
+            ],
+            quality_distribution=[
+                MethodQualityDistribution(method=method, **stat) for stat in self._build_quality_distribution(summary)
+            ],
+            monthly_trend=[
+                MethodMonthlyTrend(method=method, **stat) for stat in self._build_monthly_trend(summary, limit=12)
+            ],
+            indicator_stats=[
+                MethodIndicatorStatistics(method=method, **stat) for stat in self._build_indicator_stats(summary)
+            ],
+            recent_data=parts['recent_data'],
+            warning_data=parts['warning_data'],
+            unavailable_sections=unavailable_sections
         ) 
     
+    @dashboard_cached
     def get_water_quality_level_statistics(self) -> WaterQualityLevelStatistics:
         """获取水质等级统计数据"""
         
@@ -722,13 +1048,7 @@ class DashboardService:
         """获取单个指标的等级统计"""
         
         # 获取指标等级分布
-        level_stats = self.db.query(
-            getattr(WaterQuality, level_field).label('level'),
-            func.count(WaterQuality.id).label('count')
-        ).filter(
-            getattr(WaterQuality, level_field).is_not(None),
-            getattr(WaterQuality, level_field) != ""
-        ).group_by(getattr(WaterQuality, level_field)).all()
+        level_stats = self._query_indicator_level_counts(level_field)
         
         # 计算总数
         total_count = sum(count for _, count in level_stats)
@@ -785,6 +1105,28 @@ class DashboardService:
             warning_rate=round(warning_rate, 2)
         )
     
+    def _query_indicator_level_counts(self, level_field: str) -> List[Tuple[str, int]]:
+        """获取指标等级分布 [(等级, 数量)]，按等级排序，不含空等级"""
+        if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+            # 位图索引只包含有效行，各等级数量即位图的popcount
+            snapshot = SnapshotService(self.db).ensure_fresh()
+            with snapshot.read():
+                level_counts = [
+                    (level, popcount(snapshot.bitmaps.get(level_field, code)))
+                    for code, level in enumerate(snapshot.dictionaries[level_field].values)
+                    if level is not None
+                ]
+            return sorted((level, count) for level, count in level_counts if count)
+        
+        level_stats = self.db.query(
+            getattr(WaterQuality, level_field).label('level'),
+            func.count(WaterQuality.id).label('count')
+        ).filter(
+            getattr(WaterQuality, level_field).is_not(None)
+        ).group_by(getattr(WaterQuality, level_field)).all()
+        # 数据库按存储代码分组，按等级字符串重新排序
+        return sorted((level, count) for level, count in level_stats)
+    
     def _calculate_overall_level_summary(self, indicator_stats: List[IndicatorLevelStatistics]) -> dict:
         """计算总体等级概况"""
         total_records = sum(stat.total_count for stat in indicator_stats)
@@ -816,7 +1158,7 @@ class DashboardService:
             'level_summary': level_summary,
             'indicator_count': len(indicator_stats)
         } 
-
+    
     def _calculate_quality_rates(self, overall_summary: dict) -> Tuple[float, float, float]:
         """
         计算水质合格率、不合格率和警告率。
@@ -826,7 +1168,7 @@ class DashboardService:
         """
         total_records = overall_summary['total_records']
         level_summary = overall_summary['level_summary']
-
+        
         # 合格率：一类二类三类的占比
         qualified_count = sum(level_summary.get(level, {}).get('count', 0) for level in ["Ⅰ类", "Ⅱ类", "Ⅲ类"])
         qualified_rate = (qualified_count / total_records * 100) if total_records > 0 else 0
@@ -837,5 +1179,5 @@ class DashboardService:
         # 警告率：轻度污染和重度污染占比
         warning_count = sum(level_summary.get(level, {}).get('count', 0) for level in ["Ⅴ类", "劣Ⅴ类", "轻度黑臭", "重度黑臭"])
         warning_rate = (warning_count / total_records * 100) if total_records > 0 else 0
-
+        
         return round(qualified_rate, 2), round(unqualified_rate, 2), round(warning_rate, 2) 
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+水质数据导出服务层（服务端游标分批读取、边查询边输出）
+"""
+from typing import Iterator, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
+from app.db.base import SessionLocal
+from app.models.water_quality import WaterQuality
+from app.schemas.water_quality import WaterQualityQuery
+from app.services.water_quality_service import WaterQualityService
+from app.utils.arrow_io import iter_parquet_chunks
+from app.utils.data_export import iter_csv_chunks, iter_ndjson_chunks, iter_gzip_chunks
+from config import settings
+
+# 导出格式: (媒体类型, 文件扩展名, 编码函数)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv', iter_csv_chunks),
+    'ndjson': ('application/x-ndjson', '.ndjson', iter_ndjson_chunks),
+    'parquet': ('application/vnd.apache.parquet', '.parquet', iter_parquet_chunks)
+}
+
+# Parquet文件自带列压缩，不再额外gzip
+GZIP_FORMATS = ('csv', 'ndjson')
+
+
+class ExportService:
+    """水质数据导出服务"""
+    
+    # 导出字段（按顺序）
+    EXPORT_FIELDS = [
+        'id',
+        'sampling_date',
+        'sampling_time',
+        'detection_date',
+        'code',
+        'river_name',
+        'method',
+        'cod_value',
+        'cod_level',
+        'ammonia_nitrogen_value',
+        'ammonia_nitrogen_level',
+        'total_phosphorus_value',
+        'total_phosphorus_level',
+        'potassium_permanganate_value',
+        'potassium_permanganate_level',
+        'comprehensive_quality_level',
+        'comprehensive_level_number',
+        'remarks',
+        'created_at',
+        'updated_at'
+    ]
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def iter_batches(self, query: WaterQualityQuery, batch_size: Optional[int] = None) -> Iterator[List[tuple]]:
+        """
+        按列表过滤条件分批读取导出数据（按ID顺序，使用服务端游标，内存占用与导出总量无关）
+        
+        Args:
+            query: 列表查询参数（只使用过滤条件，忽略分页参数）
+            batch_size: 每批行数，默认取配置EXPORT_BATCH_SIZE
+        
+        Returns:
+            行批次迭代器，每行为按EXPORT_FIELDS顺序的元组
+        """
+        batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+        statement = select(*[getattr(WaterQuality, field) for field in self.EXPORT_FIELDS]).order_by(WaterQuality.id)
+        
+        conditions = WaterQualityService(self.db)._build_list_conditions(query)
+        if conditions:
+            statement = statement.where(and_(*conditions))
+        
+        result = self.db.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+    
+    def iter_chunks(self, query: WaterQualityQuery, export_format: str, gzip: bool = False,
+                    batch_size: Optional[int] = None) -> Iterator[bytes]:
+        """
+        按导出格式逐批输出文件内容
+        
+        Args:
+            query: 列表查询参数（只使用过滤条件）
+            export_format: 导出格式（csv/ndjson/parquet）
+            gzip: 是否gzip压缩（仅csv/ndjson）
+            batch_size: 每批行数，默认取配置EXPORT_BATCH_SIZE
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}")
+        if gzip and export_format not in GZIP_FORMATS:
+            raise ValueError(f"{export_format}格式不支持gzip压缩")
+        
+        encode = EXPORT_FORMATS[export_format][2]
+        chunks = encode(self.iter_batches(query, batch_size), self.EXPORT_FIELDS)
+        yield from iter_gzip_chunks(chunks) if gzip else chunks
+
+
+def stream_export(query: WaterQualityQuery, export_format: str, gzip: bool = False) -> Iterator[bytes]:
+    """流式导出水质数据（使用独立的数据库会话，随响应输出完毕关闭）"""
+    db = SessionLocal()
+    try:
+        yield from ExportService(db).iter_chunks(query, export_format, gzip=gzip)
+    finally:
+        db.close()
@@ -0,0 +1,202 @@
+"""
+等级标准服务层（版本化标准、编译缓存与候选标准重新评级预览）
+"""
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import SmallInteger, func, select, type_coerce
+from app.models.grading_standard import GradingStandard
+from app.models.water_quality import WaterQuality
+from app.schemas.grading_standard import GradingStandardCreate
+from app.utils.water_quality_calculator import CompiledStandard, DEFAULT_STANDARD, WaterQualityCalculator
+from config import settings
+
+# 编译后的等级标准缓存（标准ID -> 编译结果）；标准创建后不可修改，缓存无需失效
+_compiled_standards: Dict[int, CompiledStandard] = {}
+_compiled_lock = threading.Lock()
+
+# 预览统计使用的综合等级名称（下标为存储代码，代码0为未评级）
+_LEVEL_NAMES = ["未评级"] + sorted(WaterQualityCalculator.LEVEL_CODES, key=WaterQualityCalculator.LEVEL_CODES.get)
+
+
+class GradingStandardService:
+    """等级标准服务"""
+    
+    # 内置标准名称
+    DEFAULT_NAME = "GB3838-2002"
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_standards(self) -> List[GradingStandard]:
+        """获取全部等级标准（按名称和版本排列）"""
+        return self.db.query(GradingStandard)\
+            .order_by(GradingStandard.name, GradingStandard.version.desc())\
+            .all()
+    
+    def get_standard(self, standard_id: int) -> Optional[GradingStandard]:
+        """根据ID获取等级标准"""
+        return self.db.query(GradingStandard).filter(GradingStandard.id == standard_id).first()
+    
+    def get_active_standard(self) -> Optional[GradingStandard]:
+        """获取当前生效的等级标准"""
+        return self.db.query(GradingStandard).filter(GradingStandard.is_active.is_(True)).first()
+    
+    def create_standard(self, standard_data: GradingStandardCreate) -> GradingStandard:
+        """创建等级标准（同名标准的版本号递增，新标准不自动生效）"""
+        latest_version = self.db.query(func.max(GradingStandard.version))\
+            .filter(GradingStandard.name == standard_data.name)\
+            .scalar()
+        
+        standard = GradingStandard(
+            name=standard_data.name,
+            version=(latest_version or 0) + 1,
+            description=standard_data.description,
+            rules=json.dumps(standard_data.thresholds, ensure_ascii=False),
+            is_active=False
+        )
+        self.db.add(standard)
+        self.db.commit()
+        self.db.refresh(standard)
+        return standard
+    
+    def activate_standard(self, standard_id: int) -> Optional[GradingStandard]:
+        """
+        设置生效的等级标准
+        
+        只影响之后新增、修改、导入和重新计算的数据，已存储的等级不会自动重新计算
+        """
+        standard = self.get_standard(standard_id)
+        if not standard:
+            return None
+        
+        self.db.query(GradingStandard)\
+            .filter(GradingStandard.id != standard_id, GradingStandard.is_active.is_(True))\
+            .update({GradingStandard.is_active: False}, synchronize_session=False)
+        standard.is_active = True
+        self.db.commit()
+        self.db.refresh(standard)
+        return standard
+    
+    def ensure_default(self) -> bool:
+        """等级标准表为空时写入内置的GB3838-2002标准并设为生效，返回是否写入"""
+        if self.db.query(GradingStandard.id).first() is not None:
+            return False
+        
+        self.db.add(GradingStandard(
+            name=self.DEFAULT_NAME,
+            version=1,
+            description="地表水环境质量标准（内置）",
+            rules=json.dumps(WaterQualityCalculator.QUALITY_STANDARDS, ensure_ascii=False),
+            is_active=True
+        ))
+        self.db.commit()
+        return True
+    
+    @staticmethod
+    def compile(standard: GradingStandard) -> CompiledStandard:
+        """编译等级标准（按标准ID缓存）"""
+        with _compiled_lock:
+            compiled = _compiled_standards.get(standard.id)
+        if compiled is not None:
+            return compiled
+        
+        compiled = CompiledStandard(standard.thresholds, standard.name, standard.version)
+        with _compiled_lock:
+            return _compiled_standards.setdefault(standard.id, compiled)
+    
+    def get_active_compiled(self) -> CompiledStandard:
+        """获取当前生效标准的编译结果（未设置生效标准时为内置的GB3838-2002）"""
+        active_id = self.db.query(GradingStandard.id)\
+            .filter(GradingStandard.is_active.is_(True))\
+            .limit(1)\
+            .scalar()
+        if active_id is None:
+            return DEFAULT_STANDARD
+        
+        with _compiled_lock:
+            compiled = _compiled_standards.get(active_id)
+        if compiled is not None:
+            return compiled
+        return self.compile(self.get_standard(active_id))
+    
+    def what_if(self, compiled: CompiledStandard, standard_id: Optional[int] = None,
+                chunk_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        按候选标准对全部历史数据重新评级，并与当前存储的综合等级比较（只读，不修改已存储的等级）
+        
+        按块流式读取指标数值和综合等级代码，批量计算候选标准下的综合等级，按(当前等级, 候选等级)计数
+        
+        Args:
+            compiled: 候选标准的编译结果
+            standard_id: 候选标准ID（未保存的标准为空）
+            chunk_size: 每块行数，默认取配置RECALCULATE_CHUNK_SIZE
+            
+        Returns:
+            等级分布和变化统计
+        """
+        start_time = time.perf_counter()
+        chunk_size = chunk_size or settings.RECALCULATE_CHUNK_SIZE
+        level_count = len(_LEVEL_NAMES)
+        
+        # 当前综合等级按存储代码读取，空等级记为代码0
+        stored_level = func.coalesce(type_coerce(WaterQuality.comprehensive_quality_level, SmallInteger), 0)
+        statement = select(
+            WaterQuality.cod_value,
+            WaterQuality.ammonia_nitrogen_value,
+            WaterQuality.total_phosphorus_value,
+            WaterQuality.potassium_permanganate_value,
+            stored_level
+        ).execution_options(yield_per=chunk_size)
+        
+        pair_counts = np.zeros(level_count * level_count, dtype=np.int64)
+        for partition in self.db.execute(statement).partitions():
+            # Row对象直接构造数组很慢，先转换为元组
+            columns = np.array([tuple(row) for row in partition], dtype=np.float64)
+            codes = WaterQualityCalculator.calculate_level_codes_batch(
+                *columns[:, :4].T, standard=compiled
+            )['comprehensive_quality_level']
+            
+            # 批量计算的等级代码+1即为存储代码，缺失(-1)对应未评级(0)
+            candidate_codes = codes.astype(np.int64) + 1
+            stored_codes = columns[:, 4].astype(np.int64)
+            pair_counts += np.bincount(stored_codes * level_count + candidate_codes, minlength=level_count ** 2)
+        
+        matrix = pair_counts.reshape(level_count, level_count)
+        total_count = int(matrix.sum())
+        changed_count = total_count - int(np.trace(matrix))
+        
+        # 按等级由好到差排列，未评级排在最后
+        level_order = list(range(1, level_count)) + [0]
+        
+        def distribution(counts: np.ndarray) -> List[Dict[str, Any]]:
+            return [
+                {'level': _LEVEL_NAMES[code], 'count': int(counts[code])}
+                for code in level_order if counts[code]
+            ]
+        
+        transitions = []
+        for from_code, to_code in zip(*np.nonzero(matrix)):
+            if from_code != to_code:
+                transitions.append({
+                    'from_level': _LEVEL_NAMES[from_code],
+                    'to_level': _LEVEL_NAMES[to_code],
+                    'count': int(matrix[from_code, to_code])
+                })
+        transitions.sort(key=lambda item: item['count'], reverse=True)
+        
+        return {
+            'standard_id': standard_id,
+            'standard_name': compiled.name,
+            'standard_version': compiled.version,
+            'total_count': total_count,
+            'changed_count': changed_count,
+            'changed_rate': round(changed_count / total_count * 100, 2) if total_count else 0.0,
+            'current_distribution': distribution(matrix.sum(axis=1)),
+            'candidate_distribution': distribution(matrix.sum(axis=0)),
+            'transitions': transitions,
+            'elapsed_seconds': round(time.perf_counter() - start_time, 3)
+        }
@@ -0,0 +1,341 @@
+"""
+水质数据导入服务层（流式分块批量导入）
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, inspect, select
+from sqlalchemy.exc import IntegrityError
+from app.models.water_quality import WaterQuality
+from app.models.import_manifest import ImportManifest
+from app.core.cache import bump_data_version
+from app.services.grading_standard_service import GradingStandardService
+from app.services.rollup_service import RollupService
+from app.services.search_index_service import SearchIndexService
+from app.utils.data_import import iter_file_records, parse_file, compute_file_hash
+from config import settings
+
+# 导入模式：insert直接插入；upsert按自然键插入或更新
+IMPORT_MODES = ('insert', 'upsert')
+
+# 按自然键查询已有数据时每次IN查询的键数量（受SQLite绑定参数数量限制）
+NATURAL_KEY_LOOKUP_SIZE = 500
+
+# 按自然键更新时不覆盖的字段
+UPSERT_EXCLUDED_FIELDS = ('id', 'natural_key', 'created_at')
+
+
+class ImportService:
+    """水质数据导入服务"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def count_water_quality(self) -> int:
+        """获取现有水质数据数量"""
+        return self.db.query(WaterQuality).count()
+    
+    def clear_water_quality(self) -> int:
+        """清空水质数据和文件导入清单，返回删除数量"""
+        deleted_count = self.db.query(WaterQuality).delete(synchronize_session=False)
+        self.db.query(ImportManifest).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted_count
+    
+    def _get_upsert_insert(self):
+        """获取当前数据库方言支持ON CONFLICT的insert构造函数"""
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect_name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            raise ValueError(f"upsert导入不支持当前数据库: {dialect_name}")
+        return dialect_insert
+    
+    def _check_upsert_ready(self) -> None:
+        """检查自然键唯一索引是否存在（ON CONFLICT依赖该索引），不存在时抛出ValueError"""
+        indexes = inspect(self.db.get_bind()).get_indexes(WaterQuality.__tablename__)
+        if not any(index['unique'] and index['column_names'] == ['natural_key'] for index in indexes):
+            raise ValueError(
+                "自然键唯一索引不存在（历史数据存在重复自然键时启动无法创建，见启动日志），"
+                "upsert导入不可用；请清理重复数据后重启应用，或使用insert模式"
+            )
+    
+    def _get_existing_hashes(self, natural_keys: List[str]) -> Dict[str, Optional[str]]:
+        """按自然键查询已有数据的内容哈希"""
+        existing_hashes = {}
+        for start in range(0, len(natural_keys), NATURAL_KEY_LOOKUP_SIZE):
+            rows = self.db.execute(
+                select(WaterQuality.natural_key, WaterQuality.content_hash)
+                .where(WaterQuality.natural_key.in_(natural_keys[start:start + NATURAL_KEY_LOOKUP_SIZE]))
+            ).all()
+            existing_hashes.update({row.natural_key: row.content_hash for row in rows})
+        return existing_hashes
+    
+    def _upsert_records(self, records: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        按自然键插入或更新一批记录，内容哈希未变化的记录跳过
+        
+        Returns:
+            本批统计：inserted_count, updated_count, unchanged_count, duplicate_count
+            （duplicate_count为同一批内被后面自然键相同的记录覆盖的记录数）
+        """
+        # 同一批内自然键重复时以最后一条为准
+        records_by_key = {record['natural_key']: record for record in records}
+        existing_hashes = self._get_existing_hashes(list(records_by_key.keys()))
+        
+        changed_records = []
+        inserted_count = 0
+        for natural_key, record in records_by_key.items():
+            if natural_key not in existing_hashes:
+                inserted_count += 1
+                changed_records.append(record)
+            elif existing_hashes[natural_key] != record['content_hash']:
+                changed_records.append(record)
+        
+        if changed_records:
+            dialect_insert = self._get_upsert_insert()
+            statement = dialect_insert(WaterQuality)
+            update_columns = {
+                key: statement.excluded[key]
+                for key in changed_records[0].keys()
+                if key not in UPSERT_EXCLUDED_FIELDS
+            }
+            statement = statement.on_conflict_do_update(
+                index_elements=[WaterQuality.natural_key],
+                set_=update_columns,
+                # 并发导入时再次按内容哈希判断，相同内容不重复写入
+                where=WaterQuality.content_hash.is_distinct_from(statement.excluded.content_hash)
+            )
+            self.db.execute(statement, changed_records)
+        
+        return {
+            'inserted_count': inserted_count,
+            'updated_count': len(changed_records) - inserted_count,
+            'unchanged_count': len(records_by_key) - len(changed_records),
+            'duplicate_count': len(records) - len(records_by_key)
+        }
+    
+    def _write_records(self, records: List[Dict[str, Any]], mode: str) -> Dict[str, int]:
+        """按导入模式写入一批记录（不提交），insert模式下自然键与已有数据重复时抛出ValueError"""
+        if mode == 'upsert':
+            return self._upsert_records(records)
+        try:
+            self.db.execute(insert(WaterQuality), records)
+        except IntegrityError as e:
+            if 'natural_key' not in str(e.orig):
+                raise
+            raise ValueError(
+                "存在自然键(编号+河道+取样日期+取样时间)重复的数据（文件可能已导入过或文件内有重复行），"
+                "写入失败；重复导入请使用upsert模式"
+            ) from e
+        return {'inserted_count': len(records), 'updated_count': 0, 'unchanged_count': 0, 'duplicate_count': 0}
+    
+    def _after_import(self) -> None:
+        """批量导入后重建大屏汇总数据，并使结果缓存、快照和搜索索引失效"""
+        RollupService(self.db).rebuild()
+        bump_data_version()
+        SearchIndexService.invalidate()
+    
+    def import_file(self, file_path: str, batch_size: Optional[int] = None,
+                    progress_callback: Optional[Callable[[int, float], None]] = None,
+                    mode: str = 'insert') -> Dict[str, Any]:
+        """
+        流式导入文件（分块读取、按列转换、Core批量写入，每批提交一次）
+        
+        Args:
+            file_path: 文件路径（.xlsx/.xlsm/.xls/.csv/.parquet/.arrow）
+            batch_size: 每批行数，默认取配置IMPORT_BATCH_SIZE
+            progress_callback: 进度回调 (已处理数量, 已用秒数)
+            mode: 导入模式，insert直接插入（自然键与已有数据重复时该批失败并抛出ValueError，
+                此前的批次已提交，汇总数据仍会同步）；upsert按自然键(编号+河道+取样日期+取样时间)
+                插入新数据、更新内容变化的数据并跳过未变化的数据，可重复执行
+        
+        Returns:
+            导入统计：inserted_count, updated_count, unchanged_count, duplicate_count, skipped_count,
+            elapsed_seconds, rows_per_second
+        """
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"不支持的导入模式: {mode}")
+        if mode == 'upsert':
+            self._check_upsert_ready()
+        
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        start_time = time.perf_counter()
+        stats = {'inserted_count': 0, 'updated_count': 0, 'unchanged_count': 0, 'duplicate_count': 0}
+        processed_count = 0
+        skipped_count = 0
+        # 缺失的等级按生效的等级标准补全
+        standard = GradingStandardService(self.db).get_active_compiled()
+        
+        # 是否已提交过写入数据的批次：后面的批次失败时，已提交的批次仍需同步汇总数据
+        committed_changes = False
+        try:
+            for records, chunk_skipped_count in iter_file_records(file_path, batch_size, standard):
+                skipped_count += chunk_skipped_count
+                if not records:
+                    continue
+                
+                batch_stats = self._write_records(records, mode)
+                self.db.commit()
+                for key, value in batch_stats.items():
+                    stats[key] += value
+                if batch_stats['inserted_count'] or batch_stats['updated_count']:
+                    committed_changes = True
+                processed_count += len(records)
+                
+                if progress_callback:
+                    progress_callback(processed_count, time.perf_counter() - start_time)
+        finally:
+            if committed_changes:
+                # 回滚失败批次未提交的写入后再重建
+                self.db.rollback()
+                self._after_import()
+        
+        elapsed_seconds = time.perf_counter() - start_time
+        return {
+            **stats,
+            'skipped_count': skipped_count,
+            'elapsed_seconds': elapsed_seconds,
+            'rows_per_second': processed_count / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        }
+    
+    def _get_manifest(self, file_path: str, file_hash: str, mode: str) -> ImportManifest:
+        """获取或创建文件的导入清单"""
+        manifest = self.db.query(ImportManifest).filter(ImportManifest.file_hash == file_hash).first()
+        if manifest is None:
+            manifest = ImportManifest(file_hash=file_hash)
+            self.db.add(manifest)
+        manifest.file_path = file_path
+        manifest.file_size = os.path.getsize(file_path)
+        manifest.mode = mode
+        return manifest
+    
+    def _write_file(self, file_path: str, file_hash: str, batches: List[List[Dict[str, Any]]],
+                    skipped_count: int, mode: str) -> ImportManifest:
+        """在一个事务中写入单个文件的全部记录和导入清单"""
+        stats = {'inserted_count': 0, 'updated_count': 0, 'unchanged_count': 0, 'duplicate_count': 0}
+        for records in batches:
+            for key, value in self._write_records(records, mode).items():
+                stats[key] += value
+        
+        manifest = self._get_manifest(file_path, file_hash, mode)
+        for key, value in stats.items():
+            setattr(manifest, key, value)
+        manifest.skipped_count = skipped_count
+        manifest.status = "completed"
+        manifest.error_message = None
+        manifest.finished_at = datetime.now()
+        self.db.commit()
+        return manifest
+    
+    def _record_failure(self, file_path: str, file_hash: str, mode: str, error: Exception) -> ImportManifest:
+        """回滚未完成的写入并记录失败的导入清单（失败的文件下次导入时重试）"""
+        self.db.rollback()
+        manifest = self._get_manifest(file_path, file_hash, mode)
+        manifest.status = "failed"
+        # 数据库异常只记录驱动层错误信息，不记录SQL语句和参数
+        manifest.error_message = str(getattr(error, 'orig', None) or error)
+        manifest.finished_at = datetime.now()
+        self.db.commit()
+        return manifest
+    
+    def import_files(self, file_paths: List[str], workers: Optional[int] = None,
+                     batch_size: Optional[int] = None, mode: str = 'insert', force: bool = False,
+                     progress_callback: Optional[Callable[[ImportManifest], None]] = None) -> Dict[str, Any]:
+        """
+        并行导入多个文件：进程池中读取、清理并计算等级，主进程单连接按文件事务批量写入
+        
+        Args:
+            file_paths: 文件路径列表
+            workers: 解析进程数，默认取配置IMPORT_WORKERS（0表示全部CPU核数）
+            batch_size: 每批行数，默认取配置IMPORT_BATCH_SIZE
+            mode: 导入模式，insert或upsert（insert模式下文件中有自然键与已有数据重复的记录时该文件导入失败）
+            force: 是否忽略导入清单，重新导入已导入过的文件
+            progress_callback: 每个文件完成或失败后的回调 (导入清单)
+        
+        Returns:
+            导入统计：file_count, completed_count, failed_count, already_imported_count,
+            inserted_count, updated_count, unchanged_count, duplicate_count, skipped_count,
+            elapsed_seconds, rows_per_second
+        """
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"不支持的导入模式: {mode}")
+        if mode == 'upsert':
+            self._check_upsert_ready()
+        
+        workers = workers or settings.IMPORT_WORKERS or os.cpu_count() or 1
+        batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        start_time = time.perf_counter()
+        result = {
+            'file_count': len(file_paths),
+            'completed_count': 0,
+            'failed_count': 0,
+            'already_imported_count': 0,
+            'inserted_count': 0,
+            'updated_count': 0,
+            'unchanged_count': 0,
+            'duplicate_count': 0,
+            'skipped_count': 0
+        }
+        
+        # 按文件内容哈希对照导入清单，跳过已成功导入的文件（同一内容的文件只导入一次）
+        completed_hashes = {
+            file_hash for (file_hash,) in
+            self.db.query(ImportManifest.file_hash).filter(ImportManifest.status == "completed").all()
+        }
+        # 缺失的等级按生效的等级标准补全（编译结果随任务传给解析进程）
+        standard = GradingStandardService(self.db).get_active_compiled()
+        self.db.commit()
+        file_hashes: Dict[str, str] = {}
+        for file_path in file_paths:
+            file_hash = compute_file_hash(file_path)
+            if (file_hash in completed_hashes and not force) or file_hash in file_hashes.values():
+                result['already_imported_count'] += 1
+                continue
+            file_hashes[file_path] = file_hash
+        
+        if file_hashes:
+            with ProcessPoolExecutor(max_workers=min(workers, len(file_hashes))) as executor:
+                pending = {}
+                queued_paths = list(file_hashes.keys())
+                
+                while queued_paths or pending:
+                    # 限制同时解析的文件数，避免解析结果堆积占用内存
+                    while queued_paths and len(pending) < workers * 2:
+                        file_path = queued_paths.pop(0)
+                        pending[executor.submit(parse_file, file_path, batch_size, standard)] = file_path
+                    
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = pending.pop(future)
+                        file_hash = file_hashes[file_path]
+                        try:
+                            batches, skipped_count = future.result()
+                            manifest = self._write_file(file_path, file_hash, batches, skipped_count, mode)
+                        except Exception as e:
+                            manifest = self._record_failure(file_path, file_hash, mode, e)
+                            result['failed_count'] += 1
+                        else:
+                            result['completed_count'] += 1
+                            for key in ('inserted_count', 'updated_count', 'unchanged_count', 'duplicate_count',
+                                        'skipped_count'):
+                                result[key] += getattr(manifest, key)
+                        
+                        if progress_callback:
+                            progress_callback(manifest)
+        
+        if result['inserted_count'] or result['updated_count']:
+            self._after_import()
+        
+        elapsed_seconds = time.perf_counter() - start_time
+        processed_count = (
+            result['inserted_count'] + result['updated_count'] + result['unchanged_count'] + result['duplicate_count']
+        )
+        result['elapsed_seconds'] = elapsed_seconds
+        result['rows_per_second'] = processed_count / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        return result
@@ -0,0 +1,185 @@
+"""
+等级重新计算任务服务层（流式分块、可续算）
+"""
+import logging
+import threading
+from typing import List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+from app.db.base import SessionLocal
+from app.models.water_quality import WaterQuality
+from app.models.recalculation_job import RecalculationJob
+from app.core.cache import bump_data_version
+from app.services.grading_standard_service import GradingStandardService
+from app.services.rollup_service import RollupService
+from app.utils.water_quality_calculator import WaterQualityCalculator
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 当前进程中正在执行的任务ID
+_running_job_ids = set()
+_running_job_lock = threading.Lock()
+
+
+class RecalculationService:
+    """等级重新计算任务服务"""
+    
+    # 批量计算结果中的等级列
+    LEVEL_FIELDS = [
+        'cod_level',
+        'ammonia_nitrogen_level',
+        'total_phosphorus_level',
+        'potassium_permanganate_level',
+        'comprehensive_quality_level',
+        'comprehensive_level_number'
+    ]
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def is_job_running(job_id: int) -> bool:
+        """任务是否正在当前进程中执行"""
+        with _running_job_lock:
+            return job_id in _running_job_ids
+    
+    def get_job(self, job_id: int) -> Optional[RecalculationJob]:
+        """根据ID获取任务"""
+        return self.db.query(RecalculationJob).filter(RecalculationJob.id == job_id).first()
+    
+    def get_jobs(self, limit: int = 20) -> List[RecalculationJob]:
+        """获取最近的任务列表"""
+        return self.db.query(RecalculationJob)\
+            .order_by(RecalculationJob.id.desc())\
+            .limit(limit)\
+            .all()
+    
+    def create_job(self, chunk_size: Optional[int] = None) -> RecalculationJob:
+        """创建任务"""
+        job = RecalculationJob(
+            status="pending",
+            chunk_size=chunk_size or settings.RECALCULATE_CHUNK_SIZE,
+            last_id=0,
+            total_count=self.db.query(func.count(WaterQuality.id)).scalar() or 0
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    def _process_chunk(self, job: RecalculationJob) -> int:
+        """
+        处理检查点之后的一块数据，返回本块数量（0表示已处理完）
+        
+        按主键键集分页读取，只写回等级发生变化的行，并与检查点在同一事务中提交
+        """
+        rows = self.db.query(
+            WaterQuality.id,
+            WaterQuality.river_name,
+            WaterQuality.method,
+            WaterQuality.sampling_date,
+            WaterQuality.cod_value,
+            WaterQuality.ammonia_nitrogen_value,
+            WaterQuality.total_phosphorus_value,
+            WaterQuality.potassium_permanganate_value,
+            *[getattr(WaterQuality, field) for field in self.LEVEL_FIELDS]
+        ).filter(WaterQuality.id > job.last_id)\
+            .order_by(WaterQuality.id)\
+            .limit(job.chunk_size)\
+            .all()
+        
+        if not rows:
+            return 0
+        
+        # 按生效的等级标准计算（任务执行期间切换标准时，之后的块按新标准计算）
+        levels = WaterQualityCalculator.calculate_all_levels_batch(
+            cod_values=[row.cod_value for row in rows],
+            ammonia_nitrogen_values=[row.ammonia_nitrogen_value for row in rows],
+            total_phosphorus_values=[row.total_phosphorus_value for row in rows],
+            potassium_permanganate_values=[row.potassium_permanganate_value for row in rows],
+            standard=GradingStandardService(self.db).get_active_compiled()
+        )
+        
+        update_params = []
+        cell_keys = []
+        for index, row in enumerate(rows):
+            new_levels = {field: levels[field][index] for field in self.LEVEL_FIELDS}
+            if all(getattr(row, field) == value for field, value in new_levels.items()):
+                continue
+            
+            update_params.append(dict(new_levels, id=row.id))
+            cell_keys.append(RollupService.make_cell_key(
+                row.river_name, row.method, row.sampling_date, row.comprehensive_quality_level
+            ))
+            cell_keys.append(RollupService.make_cell_key(
+                row.river_name, row.method, row.sampling_date, new_levels['comprehensive_quality_level']
+            ))
+        
+        if update_params:
+            self.db.execute(update(WaterQuality), update_params)
+            self.db.flush()
+            # 增量维护大屏汇总数据（变化前后所属单元）
+            RollupService(self.db).refresh_cells(cell_keys)
+        
+        job.last_id = rows[-1].id
+        job.processed_count += len(rows)
+        job.changed_count += len(update_params)
+        self.db.commit()
+        
+        if update_params:
+            bump_data_version()
+        
+        return len(rows)
+    
+    def run_job(self, job_id: int) -> Optional[RecalculationJob]:
+        """
+        执行任务（从检查点继续），每块提交一次
+        
+        同一任务在当前进程中只允许一个执行者
+        """
+        with _running_job_lock:
+            if job_id in _running_job_ids:
+                return None
+            _running_job_ids.add(job_id)
+        
+        try:
+            job = self.get_job(job_id)
+            if not job or job.status == "completed":
+                return job
+            
+            job.status = "running"
+            job.error_message = None
+            self.db.commit()
+            
+            try:
+                while self._process_chunk(job):
+                    logger.info(
+                        f"等级重新计算任务 {job.id} 进度: {job.processed_count}/{job.total_count}，"
+                        f"已变更 {job.changed_count} 条"
+                    )
+                
+                job.status = "completed"
+                job.finished_at = datetime.now()
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                job.status = "failed"
+                job.error_message = str(e)
+                self.db.commit()
+                logger.error(f"等级重新计算任务 {job.id} 失败: {e}")
+            
+            return job
+        finally:
+            with _running_job_lock:
+                _running_job_ids.discard(job_id)
+
+
+def run_recalculation_job(job_id: int) -> None:
+    """后台执行等级重新计算任务（使用独立的数据库会话）"""
+    db = SessionLocal()
+    try:
+        RecalculationService(db).run_job(job_id)
+    finally:
+        db.close()
@@ -0,0 +1,186 @@
+"""
+水质数据汇总服务层（大屏统计预聚合）
+"""
+from typing import Iterable, Optional, Tuple
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import SmallInteger, func, insert, type_coerce
+from app.models.water_quality import WaterQuality
+from app.models.water_quality_rollup import WaterQualityRollup
+from app.services.dashboard_service import DashboardService
+
+
+# 汇总单元键：(河道名称, 标准化方式, 月份, 综合等级)
+RollupKey = Tuple[str, str, str, str]
+
+
+class RollupService:
+    """水质数据汇总服务"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @staticmethod
+    def normalize_method(method: Optional[str]) -> str:
+        """标准化方式名称，空白方式记为'其他'"""
+        if not method or method.strip() == "":
+            return "其他"
+        return method.strip()
+    
+    @classmethod
+    def get_cell_key(cls, water_quality: WaterQuality) -> Optional[RollupKey]:
+        """获取水质数据所属的汇总单元键"""
+        return cls.make_cell_key(
+            water_quality.river_name,
+            water_quality.method,
+            water_quality.sampling_date,
+            water_quality.comprehensive_quality_level
+        )
+    
+    @classmethod
+    def make_cell_key(cls, river_name: Optional[str], method: Optional[str],
+                      sampling_date: Optional[datetime], level: Optional[str]) -> Optional[RollupKey]:
+        """
+        根据字段值生成汇总单元键（用于只查询了部分列的场景）
+        
+        空河道名称与全量重建一致，作为单独的汇总单元（河道名称为空字符串）
+        """
+        if sampling_date is None or river_name is None:
+            return None
+        
+        return (
+            river_name,
+            cls.normalize_method(method),
+            sampling_date.strftime('%Y-%m'),
+            level or ""
+        )
+    
+    @staticmethod
+    def get_month_range(month: str) -> Tuple[datetime, datetime]:
+        """获取月份(YYYY-MM)的起止时间，返回(月初, 下月初)"""
+        month_start = datetime.strptime(month, '%Y-%m')
+        if month_start.month == 12:
+            month_end = month_start.replace(year=month_start.year + 1, month=1)
+        else:
+            month_end = month_start.replace(month=month_start.month + 1)
+        return month_start, month_end
+    
+    def _cell_conditions(self, key: RollupKey) -> list:
+        """汇总单元对应的水质数据过滤条件（按日期范围过滤以便利用索引）"""
+        river_name, method, month, level = key
+        month_start, month_end = self.get_month_range(month)
+        
+        if level:
+            level_condition = WaterQuality.comprehensive_quality_level == level
+        else:
+            level_condition = WaterQuality.comprehensive_quality_level.is_(None)
+        
+        return [
+            WaterQuality.river_name == river_name,
+            WaterQuality.sampling_date >= month_start,
+            WaterQuality.sampling_date < month_end,
+            DashboardService.normalized_method_column() == method,
+            level_condition
+        ]
+    
+    def _cell_filter(self, key: RollupKey) -> list:
+        """汇总单元对应的汇总表过滤条件"""
+        river_name, method, month, level = key
+        return [
+            WaterQualityRollup.river_name == river_name,
+            WaterQualityRollup.method == method,
+            WaterQualityRollup.month == month,
+            WaterQualityRollup.comprehensive_quality_level == level
+        ]
+    
+    def _ensure_cell(self, key: RollupKey) -> None:
+        """汇总单元不存在时插入空的单元行（已存在时不做任何事），以便随后加行锁"""
+        river_name, method, month, level = key
+        values = {
+            'river_name': river_name,
+            'method': method,
+            'month': month,
+            'comprehensive_quality_level': level,
+            'sample_count': 0
+        }
+        dialect_name = self.db.get_bind().dialect.name
+        if dialect_name in ('sqlite', 'postgresql'):
+            if dialect_name == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(WaterQualityRollup).values(**values).on_conflict_do_nothing(
+                index_elements=['river_name', 'method', 'month', 'comprehensive_quality_level']
+            )
+        elif dialect_name == 'mysql':
+            statement = insert(WaterQualityRollup).values(**values).prefix_with('IGNORE')
+        else:
+            raise ValueError(f"汇总增量维护不支持当前数据库: {dialect_name}")
+        self.db.execute(statement)
+    
+    def refresh_cells(self, keys: Iterable[Optional[RollupKey]]) -> None:
+        """
+        增量维护：重新计算受影响的汇总单元
+        
+        先确保单元行存在并加行锁（SELECT ... FOR UPDATE，SQLite由写锁串行化），再重新聚合并更新该行，
+        并发写入同一单元时依次执行，后执行的聚合能看到先提交的变更；单元按键排序加锁以免死锁。
+        调用方需在同一事务中先flush水质数据的变更，本方法不提交事务
+        """
+        for key in sorted(set(k for k in keys if k is not None)):
+            # 等待行锁期间单元被并发事务删除时重新插入
+            cell = None
+            while cell is None:
+                self._ensure_cell(key)
+                cell = self.db.query(WaterQualityRollup)\
+                    .filter(*self._cell_filter(key))\
+                    .with_for_update()\
+                    .populate_existing()\
+                    .first()
+            
+            stats = self.db.query(*DashboardService.aggregate_columns())\
+                .filter(*self._cell_conditions(key))\
+                .one()
+            
+            if not stats.sample_count:
+                self.db.delete(cell)
+                continue
+            
+            for name, value in stats._asdict().items():
+                setattr(cell, name, value)
+        
+        self.db.flush()
+    
+    def rebuild(self) -> int:
+        """全量重建汇总表（批量导入后执行），返回汇总单元数量"""
+        normalized_method = DashboardService.normalized_method_column()
+        month = func.strftime('%Y-%m', WaterQuality.sampling_date)
+        # 按存储代码分组，空等级记为代码0
+        level = func.coalesce(type_coerce(WaterQuality.comprehensive_quality_level, SmallInteger), 0)
+        aggregate_columns = DashboardService.aggregate_columns()
+        
+        select_query = self.db.query(
+            WaterQuality.river_name,
+            normalized_method,
+            month,
+            level,
+            *aggregate_columns
+        ).group_by(WaterQuality.river_name, normalized_method, month, level)
+        
+        target_columns = ['river_name', 'method', 'month', 'comprehensive_quality_level']
+        target_columns += [column.name for column in aggregate_columns]
+        
+        self.db.query(WaterQualityRollup).delete(synchronize_session=False)
+        self.db.execute(insert(WaterQualityRollup).from_select(target_columns, select_query.statement))
+        self.db.commit()
+        
+        return self.db.query(WaterQualityRollup).count()
+    
+    def ensure_built(self) -> bool:
+        """汇总表为空而水质数据不为空时全量重建，返回是否执行了重建"""
+        if self.db.query(WaterQualityRollup.id).first() is not None:
+            return False
+        if self.db.query(WaterQuality.id).first() is None:
+            return False
+        
+        self.rebuild()
+        return True
@@ -0,0 +1,156 @@
+"""
+列表子串搜索索引服务层
+在进程内维护河道名称的n-gram索引，将 LIKE '%x%' 过滤转换为可走B树索引的 IN 过滤
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models.water_quality import WaterQuality
+from app.core.cache import get_data_version
+from app.core.locks import AsyncSafeLock
+from app.db.routing import primary_read
+from app.utils.ngram_index import NgramIndex
+from config import settings
+
+# 可搜索字段的n-gram索引（进程内共享）。编号的取值数量随数据量线性增长，不建索引
+_indexes: Dict[str, NgramIndex] = {
+    'river_name': NgramIndex()
+}
+# 上次全量刷新时间（None表示尚未构建或已失效）
+_refreshed_at: Optional[float] = None
+# 索引对应的数据版本号
+_index_version = -1
+# 全量刷新时数据的最大ID，更大ID的数据（之后其他进程写入的）不一定在索引中
+_indexed_max_id = 0
+# 刷新锁（持有期间查询数据库，异步会话中等待时让出事件循环）
+_refresh_lock = AsyncSafeLock()
+
+
+class SearchIndexService:
+    """列表子串搜索索引服务"""
+    
+    SEARCH_FIELDS = tuple(_indexes.keys())
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @primary_read
+    def rebuild(self) -> None:
+        """从数据库全量重建索引"""
+        global _refreshed_at, _index_version, _indexed_max_id
+        # 先取版本号和最大ID再查询，查询期间发生的写入由版本号和ID范围覆盖
+        version = get_data_version()
+        max_id = self.db.query(func.max(WaterQuality.id)).scalar() or 0
+        for field, index in _indexes.items():
+            column = getattr(WaterQuality, field)
+            value_counts = self.db.query(column, func.count(WaterQuality.id)).group_by(column).all()
+            index.rebuild(value_counts)
+        _indexed_max_id = max_id
+        _index_version = version
+        _refreshed_at = time.monotonic()
+    
+    @staticmethod
+    def _is_fresh() -> bool:
+        """索引已构建、与当前数据版本一致且未超过刷新间隔"""
+        return (
+            _refreshed_at is not None
+            and _index_version == get_data_version()
+            and time.monotonic() - _refreshed_at < settings.SEARCH_INDEX_REFRESH_SECONDS
+        )
+    
+    def ensure_fresh(self) -> None:
+        """索引未构建、数据版本变化（批量导入等）或超过刷新间隔（覆盖其他进程的写入）时全量重建"""
+        if self._is_fresh():
+            return
+        
+        with _refresh_lock:
+            if self._is_fresh():
+                return
+            self.rebuild()
+    
+    def find_values(self, field: str, term: str) -> Optional[List[str]]:
+        """
+        查找包含子串的所有取值（用于输入联想和总数估算，不包含索引构建后其他进程新写入的取值）
+        
+        Args:
+            field: 字段名 (river_name)
+            term: 查询子串
+        
+        Returns:
+            匹配的取值列表；索引未启用、字段无索引或匹配数量超过上限时返回None，调用方应退回LIKE查询
+        """
+        result = self.find_indexed_values(field, term)
+        return None if result is None else result[0]
+    
+    def find_indexed_values(self, field: str, term: str) -> Optional[Tuple[List[str], int]]:
+        """
+        查找包含子串的所有取值，以及索引覆盖的最大数据ID
+        
+        ID不超过该值的数据取值都在索引中；更大ID的数据调用方需以LIKE过滤，使过滤结果与数据库一致
+        
+        Returns:
+            (匹配的取值列表, 索引覆盖的最大ID)；无法使用索引时返回None
+        """
+        if not settings.SEARCH_INDEX_ENABLED or field not in _indexes:
+            return None
+        
+        self.ensure_fresh()
+        # 先取最大ID再查索引：之后的全量刷新只会扩大索引覆盖的范围
+        max_id = _indexed_max_id
+        values = _indexes[field].search(term)
+        if len(values) > settings.SEARCH_INDEX_MAX_MATCHES:
+            return None
+        return sorted(values), max_id
+    
+    @staticmethod
+    def invalidate() -> None:
+        """使索引失效（批量导入后调用），下次查询时全量重建"""
+        global _refreshed_at
+        with _refresh_lock:
+            _refreshed_at = None
+    
+    @staticmethod
+    def _apply(version: int, apply) -> None:
+        """
+        按数据版本号增量同步索引
+        
+        仅当索引恰好落后一个版本时应用并推进版本号；版本不连续（并发写入、批量写入）时
+        保持原版本号，下次查询时全量重建
+        """
+        global _index_version
+        with _refresh_lock:
+            if _refreshed_at is None or _index_version != version - 1:
+                return
+            apply()
+            _index_version = version
+    
+    @staticmethod
+    def on_insert(water_quality: WaterQuality, version: int) -> None:
+        """新增数据后同步索引（version为写入提交后的数据版本号）"""
+        def apply():
+            for field, index in _indexes.items():
+                index.add(getattr(water_quality, field))
+        
+        SearchIndexService._apply(version, apply)
+    
+    @staticmethod
+    def on_delete(water_quality: WaterQuality, version: int) -> None:
+        """删除数据后同步索引"""
+        def apply():
+            for field, index in _indexes.items():
+                index.remove(getattr(water_quality, field))
+        
+        SearchIndexService._apply(version, apply)
+    
+    @staticmethod
+    def on_update(old_values: Dict[str, Optional[str]], water_quality: WaterQuality, version: int) -> None:
+        """更新数据后同步索引（old_values为更新前的可搜索字段值）"""
+        def apply():
+            for field, index in _indexes.items():
+                new_value = getattr(water_quality, field)
+                if old_values.get(field) != new_value:
+                    index.remove(old_values.get(field))
+                    index.add(new_value)
+        
+        SearchIndexService._apply(version, apply)
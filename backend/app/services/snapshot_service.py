@@ -0,0 +1,130 @@
+"""
+大屏列式快照服务层
+在进程内维护水质数据的NumPy列式快照，API写入实时同步，供大屏统计做向量化聚合
+"""
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from app.models.water_quality import WaterQuality
+from app.core.cache import get_data_version
+from app.core.locks import AsyncSafeLock
+from app.db.routing import primary_read
+from app.utils.columnar_snapshot import ColumnarSnapshot, SNAPSHOT_FIELDS
+from config import settings
+
+# 列式快照（进程内共享）
+_snapshot = ColumnarSnapshot()
+# 快照对应的数据版本号和上次全量刷新时间（None表示尚未构建）
+_snapshot_version: Optional[int] = None
+_refreshed_at: Optional[float] = None
+# 刷新锁（持有期间查询数据库，异步会话中等待时让出事件循环）
+_refresh_lock = AsyncSafeLock(reentrant=True)
+
+# 全量构建时每批读取行数
+_LOAD_BATCH_SIZE = 10000
+
+
+def _normalize_method(method: Optional[str]) -> str:
+    """标准化方式名称，空白方式记为'其他'"""
+    if not method or method.strip() == "":
+        return "其他"
+    return method.strip()
+
+
+def _to_row(water_quality: WaterQuality) -> Dict[str, Any]:
+    """水质数据转换为快照行"""
+    row = {field: getattr(water_quality, field) for field in SNAPSHOT_FIELDS}
+    row['method'] = _normalize_method(row['method'])
+    return row
+
+
+class SnapshotService:
+    """大屏列式快照服务"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    @primary_read
+    def rebuild(self) -> None:
+        """从数据库全量重建快照"""
+        global _snapshot_version, _refreshed_at
+        with _refresh_lock:
+            # 先取版本号再查询，查询期间发生写入时下次读取会再次重建
+            version = get_data_version()
+            statement = select(*[getattr(WaterQuality, field) for field in SNAPSHOT_FIELDS])
+            result = self.db.execute(statement.execution_options(yield_per=_LOAD_BATCH_SIZE))
+            method_index = SNAPSHOT_FIELDS.index('method')
+            rows = (
+                row[:method_index] + (_normalize_method(row[method_index]),) + row[method_index + 1:]
+                for row in result
+            )
+            _snapshot.load(rows)
+            _snapshot_version = version
+            _refreshed_at = time.monotonic()
+    
+    def _is_fresh(self) -> bool:
+        """快照已构建、与当前数据版本一致且未超过刷新间隔"""
+        return (
+            _refreshed_at is not None
+            and _snapshot_version == get_data_version()
+            and time.monotonic() - _refreshed_at < settings.DASHBOARD_SNAPSHOT_REFRESH_SECONDS
+        )
+    
+    def ensure_fresh(self) -> ColumnarSnapshot:
+        """
+        快照未构建、数据版本变化（批量导入、重新计算等）或超过刷新间隔（覆盖导入脚本等其他进程的写入）时全量重建
+        
+        Returns:
+            列式快照，读取时请使用 read() 上下文
+        """
+        if not self._is_fresh():
+            with _refresh_lock:
+                if not self._is_fresh():
+                    self.rebuild()
+        return _snapshot
+    
+    @staticmethod
+    def _apply(version: int, apply) -> None:
+        """
+        按数据版本号增量同步快照
+        
+        仅当快照恰好落后一个版本时应用并推进版本号；版本不连续（并发写入、批量写入）时
+        保持原版本号，下次读取时全量重建
+        """
+        global _snapshot_version
+        with _refresh_lock:
+            if _refreshed_at is None or _snapshot_version != version - 1:
+                return
+            apply()
+            _snapshot_version = version
+    
+    @staticmethod
+    def on_insert(water_quality: WaterQuality, version: int) -> None:
+        """新增数据后同步快照（version为写入提交后的数据版本号）"""
+        SnapshotService._apply(version, lambda: _snapshot.upsert(_to_row(water_quality)))
+    
+    @staticmethod
+    def on_update(water_quality: WaterQuality, version: int) -> None:
+        """更新数据后同步快照"""
+        SnapshotService._apply(version, lambda: _snapshot.upsert(_to_row(water_quality)))
+    
+    @staticmethod
+    def on_delete(water_quality_id: int, version: int) -> None:
+        """删除数据后同步快照"""
+        SnapshotService._apply(version, lambda: _snapshot.delete(water_quality_id))
+
+    @staticmethod
+    def get_status() -> Dict[str, Any]:
+        """快照状态（行数和列数组、位图索引占用的内存）"""
+        with _snapshot.read() as snapshot:
+            return {
+                'enabled': settings.DASHBOARD_DATA_SOURCE == "snapshot",
+                'built': _refreshed_at is not None,
+                'data_version': _snapshot_version,
+                'row_count': len(snapshot.positions),
+                'capacity': len(snapshot.ids),
+                'column_memory_bytes': snapshot.memory_bytes(),
+                'bitmap_count': snapshot.bitmaps.bitmap_count,
+                'bitmap_memory_bytes': snapshot.bitmaps.memory_bytes()
+            }
@@ -1,19 +1,44 @@
 """
 水质数据服务层
 """
-from typing import List, Optional
+import logging
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, select, update, case, literal, false
 from app.models.water_quality import WaterQuality
+from app.models.water_quality_rollup import WaterQualityRollup
 from app.schemas.water_quality import WaterQualityCreate, WaterQualityUpdate, WaterQualityQuery
-from app.utils.water_quality_calculator import WaterQualityCalculator
+from app.core.cache import VersionedTTLCache, bump_data_version
+from app.db.routing import read_from_primary, replica_read
+from app.services.grading_standard_service import GradingStandardService
+from app.services.rollup_service import RollupService
+from app.services.search_index_service import SearchIndexService
+from app.services.snapshot_service import SnapshotService
+from app.utils.water_quality_calculator import CompiledStandard, DEFAULT_STANDARD, WaterQualityCalculator
+from app.utils.common import encode_cursor, decode_cursor
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+# 列表精确总数缓存（按过滤条件缓存，数据写入后失效）
+list_count_cache = VersionedTTLCache(
+    ttl_seconds=settings.LIST_COUNT_CACHE_TTL,
+    max_size=settings.LIST_COUNT_CACHE_MAX_SIZE
+)
+
 
 class WaterQualityService:
     """水质数据服务"""
     
+    # 指标类型与数值列、等级列的对应关系
+    INDICATOR_COLUMNS = [
+        ('cod', 'cod_value', 'cod_level'),
+        ('ammonia_nitrogen', 'ammonia_nitrogen_value', 'ammonia_nitrogen_level'),
+        ('total_phosphorus', 'total_phosphorus_value', 'total_phosphorus_level'),
+        ('potassium_permanganate', 'potassium_permanganate_value', 'potassium_permanganate_level')
+    ]
+    
     def __init__(self, db: Session):
         self.db = db
     
@@ -21,19 +46,42 @@ class WaterQualityService:
         """根据ID获取水质数据"""
         return self.db.query(WaterQuality).filter(WaterQuality.id == water_quality_id).first()
     
-    def get_water_quality_list(self, query: WaterQualityQuery) -> tuple[List[WaterQuality], int]:
-        """获取水质数据列表"""
-        # 构建查询条件
+    def _substring_condition(self, column, term: str):
+        """
+        子串过滤条件：优先通过搜索索引转换为IN过滤，索引不可用时退回LIKE
+        
+        索引构建后其他进程（导入脚本、其他工作进程）新增的数据不一定在索引中，对其仍以LIKE过滤
+        """
+        result = SearchIndexService(self.db).find_indexed_values(column.key, term)
+        if result is None:
+            return column.like(f"%{term}%")
+        values, max_id = result
+        new_rows_condition = and_(WaterQuality.id > max_id, column.like(f"%{term}%"))
+        if not values:
+            return new_rows_condition
+        return or_(column.in_(values), new_rows_condition)
+    
+    @staticmethod
+    def _level_condition(column, level: str):
+        """等级过滤条件（等级列存储为等级代码，未知等级不匹配任何数据）"""
+        if level.strip() not in WaterQualityCalculator.LEVEL_CODES:
+            return false()
+        return column == level
+    
+    def _build_list_conditions(self, query: WaterQualityQuery) -> list:
+        """构建列表查询条件"""
         conditions = []
         
         if query.river_name:
-            conditions.append(WaterQuality.river_name.like(f"%{query.river_name}%"))
+            conditions.append(self._substring_condition(WaterQuality.river_name, query.river_name))
         
         if query.code:
-            conditions.append(WaterQuality.code.like(f"%{query.code}%"))
+            conditions.append(self._substring_condition(WaterQuality.code, query.code))
         
         if query.comprehensive_quality_level:
-            conditions.append(WaterQuality.comprehensive_quality_level == query.comprehensive_quality_level)
+            conditions.append(
+                self._level_condition(WaterQuality.comprehensive_quality_level, query.comprehensive_quality_level)
+            )
         
         if query.sampling_date_start:
             conditions.append(WaterQuality.sampling_date >= query.sampling_date_start)
@@ -41,31 +89,139 @@ class WaterQualityService:
         if query.sampling_date_end:
             conditions.append(WaterQuality.sampling_date <= query.sampling_date_end)
         
+        return conditions
+    
+    def _get_exact_list_count(self, query: WaterQualityQuery, base_query) -> int:
+        """获取精确总数（按过滤条件缓存，计数使用主库）"""
+        filter_signature = (
+            'water_quality_list_count',
+            query.river_name,
+            query.code,
+            query.comprehensive_quality_level,
+            query.sampling_date_start,
+            query.sampling_date_end
+        )
+        
+        def count() -> int:
+            with read_from_primary(self.db):
+                return base_query.count()
+        
+        return list_count_cache.get_or_compute(filter_signature, count)
+    
+    def _estimate_list_count(self, query: WaterQualityQuery) -> Optional[int]:
+        """
+        根据大屏汇总表估算总数
+        
+        日期范围只覆盖部分月份时按覆盖天数比例折算；汇总表不含编号，按编号过滤时无法估算返回None
+        """
+        if query.code:
+            return None
+        
+        month_counts = self.db.query(
+            WaterQualityRollup.month,
+            func.sum(WaterQualityRollup.sample_count)
+        )
+        
+        if query.river_name:
+            river_names = SearchIndexService(self.db).find_values('river_name', query.river_name)
+            if river_names is None:
+                month_counts = month_counts.filter(WaterQualityRollup.river_name.like(f"%{query.river_name}%"))
+            else:
+                month_counts = month_counts.filter(WaterQualityRollup.river_name.in_(river_names))
+        
+        if query.comprehensive_quality_level:
+            month_counts = month_counts.filter(
+                self._level_condition(WaterQualityRollup.comprehensive_quality_level, query.comprehensive_quality_level)
+            )
+        
+        if query.sampling_date_start:
+            month_counts = month_counts.filter(WaterQualityRollup.month >= query.sampling_date_start.strftime('%Y-%m'))
+        
+        if query.sampling_date_end:
+            month_counts = month_counts.filter(WaterQualityRollup.month <= query.sampling_date_end.strftime('%Y-%m'))
+        
+        estimate = 0.0
+        for month, count in month_counts.group_by(WaterQualityRollup.month).all():
+            month_start, month_end = RollupService.get_month_range(month)
+            covered_start = max(month_start, query.sampling_date_start or month_start)
+            covered_end = min(month_end, query.sampling_date_end or month_end)
+            covered_seconds = max((covered_end - covered_start).total_seconds(), 0)
+            estimate += (count or 0) * covered_seconds / (month_end - month_start).total_seconds()
+        
+        return int(round(estimate))
+    
+    @replica_read
+    def get_water_quality_list(self, query: WaterQualityQuery) -> tuple[List[WaterQuality], Optional[int], Optional[str]]:
+        """
+        获取水质数据列表
+        
+        按(取样日期, ID)倒序排列。指定游标时使用键集分页（不受页深影响），否则按页码分页
+        
+        总数计算方式由query.count_mode决定：
+        - exact: 精确总数（按过滤条件缓存，数据写入后失效）
+        - estimated: 根据汇总表估算（无法估算时退回精确总数）
+        - has_more: 不计算总数，只通过下一页游标表示是否还有数据
+        
+        Returns:
+            (数据列表, 总数, 下一页游标)
+        """
         # 构建查询
         base_query = self.db.query(WaterQuality)
+        conditions = self._build_list_conditions(query)
         if conditions:
             base_query = base_query.filter(and_(*conditions))
         
         # 获取总数
-        total = base_query.count()
+        total = None
+        if query.count_mode == "estimated":
+            total = self._estimate_list_count(query)
+            if total is None:
+                total = self._get_exact_list_count(query, base_query)
+        elif query.count_mode != "has_more":
+            total = self._get_exact_list_count(query, base_query)
+        
+        ordered_query = base_query.order_by(WaterQuality.sampling_date.desc(), WaterQuality.id.desc())
+        
+        if query.cursor:
+            # 游标分页：取游标位置之后的数据
+            cursor_date, cursor_id = decode_cursor(query.cursor)
+            page_query = ordered_query.filter(
+                WaterQuality.sampling_date <= cursor_date,
+                or_(WaterQuality.sampling_date < cursor_date, WaterQuality.id < cursor_id)
+            )
+        else:
+            # 页码分页
+            page_query = ordered_query.offset((query.page - 1) * query.per_page)
         
-        # 分页查询
-        offset = (query.page - 1) * query.per_page
-        items = base_query.order_by(WaterQuality.sampling_date.desc()).offset(offset).limit(query.per_page).all()
+        # 多取一条判断是否还有下一页
+        items = page_query.limit(query.per_page + 1).all()
+        next_cursor = None
+        if len(items) > query.per_page:
+            items = items[:query.per_page]
+            next_cursor = encode_cursor(items[-1].sampling_date, items[-1].id)
         
-        return items, total
+        return items, total, next_cursor
+    
+    def _check_natural_key(self, db_water_quality: WaterQuality) -> None:
+        """检查自然键(编号+河道+取样日期+取样时间)是否与其他数据重复"""
+        query = self.db.query(WaterQuality.id).filter(WaterQuality.natural_key == db_water_quality.natural_key)
+        if db_water_quality.id is not None:
+            query = query.filter(WaterQuality.id != db_water_quality.id)
+        if query.first() is not None:
+            raise ValueError("相同编号、河道名称、取样日期和取样时间的水质数据已存在")
     
     def create_water_quality(self, water_quality_data: WaterQualityCreate) -> WaterQuality:
         """创建水质数据，自动计算等级"""
         # 创建数据字典
         data_dict = water_quality_data.dict()
         
-        # 自动计算等级
+        # 按生效的等级标准自动计算等级
         levels = WaterQualityCalculator.calculate_all_levels(
             cod_value=data_dict.get('cod_value'),
             ammonia_nitrogen_value=data_dict.get('ammonia_nitrogen_value'),
             total_phosphorus_value=data_dict.get('total_phosphorus_value'),
-            potassium_permanganate_value=data_dict.get('potassium_permanganate_value')
+            potassium_permanganate_value=data_dict.get('potassium_permanganate_value'),
+            standard=GradingStandardService(self.db).get_active_compiled()
         )
         
         # 更新计算得到的等级（如果用户没有手动设置）
@@ -84,8 +240,17 @@ class WaterQualityService:
         
         # 创建数据库对象
         db_water_quality = WaterQuality(**data_dict)
+        db_water_quality.refresh_hashes()
+        self._check_natural_key(db_water_quality)
         self.db.add(db_water_quality)
+        self.db.flush()
+        
+        # 增量维护大屏汇总数据
+        RollupService(self.db).refresh_cells([RollupService.get_cell_key(db_water_quality)])
         self.db.commit()
+        version = bump_data_version()
+        SearchIndexService.on_insert(db_water_quality, version)
+        SnapshotService.on_insert(db_water_quality, version)
         self.db.refresh(db_water_quality)
         return db_water_quality
     
@@ -95,6 +260,10 @@ class WaterQualityService:
         if not db_water_quality:
             return None
         
+        # 记录更新前所属的汇总单元
+        old_cell_key = RollupService.get_cell_key(db_water_quality)
+        old_search_values = {field: getattr(db_water_quality, field) for field in SearchIndexService.SEARCH_FIELDS}
+        
         # 更新数据
         update_data = water_quality_data.dict(exclude_unset=True)
         for key, value in update_data.items():
@@ -106,12 +275,13 @@ class WaterQualityService:
         ])
         
         if indicator_values_updated:
-            # 重新计算等级
+            # 按生效的等级标准重新计算等级
             levels = WaterQualityCalculator.calculate_all_levels(
                 cod_value=db_water_quality.cod_value,
                 ammonia_nitrogen_value=db_water_quality.ammonia_nitrogen_value,
                 total_phosphorus_value=db_water_quality.total_phosphorus_value,
-                potassium_permanganate_value=db_water_quality.potassium_permanganate_value
+                potassium_permanganate_value=db_water_quality.potassium_permanganate_value,
+                standard=GradingStandardService(self.db).get_active_compiled()
             )
             
             # 更新等级（如果用户没有手动设置）
@@ -128,7 +298,16 @@ class WaterQualityService:
             if 'comprehensive_level_number' not in update_data:
                 db_water_quality.comprehensive_level_number = levels['comprehensive_level_number']
         
+        db_water_quality.refresh_hashes()
+        self._check_natural_key(db_water_quality)
+        self.db.flush()
+        
+        # 增量维护大屏汇总数据（更新前后所属单元）
+        RollupService(self.db).refresh_cells([old_cell_key, RollupService.get_cell_key(db_water_quality)])
         self.db.commit()
+        version = bump_data_version()
+        SearchIndexService.on_update(old_search_values, db_water_quality, version)
+        SnapshotService.on_update(db_water_quality, version)
         self.db.refresh(db_water_quality)
         return db_water_quality
     
@@ -138,10 +317,19 @@ class WaterQualityService:
         if not db_water_quality:
             return False
         
+        cell_key = RollupService.get_cell_key(db_water_quality)
         self.db.delete(db_water_quality)
+        self.db.flush()
+        
+        # 增量维护大屏汇总数据
+        RollupService(self.db).refresh_cells([cell_key])
         self.db.commit()
+        version = bump_data_version()
+        SearchIndexService.on_delete(db_water_quality, version)
+        SnapshotService.on_delete(water_quality_id, version)
         return True
     
+    @replica_read
     def get_water_quality_statistics(self) -> dict:
         """获取水质数据统计"""
         total_count = self.db.query(WaterQuality).count()
@@ -184,41 +372,202 @@ class WaterQualityService:
             'monthly_stats': [{'month': m[0], 'count': m[1]} for m in monthly_stats]
         }
     
+    @replica_read
     def get_river_list(self) -> List[str]:
         """获取河道列表"""
         rivers = self.db.query(WaterQuality.river_name).distinct().all()
         return [river[0] for river in rivers if river[0]]
     
+    @replica_read
+    def search_field_values(self, field: str, keyword: str, limit: int = 20) -> List[str]:
+        """搜索包含关键字的河道名称或编号（用于输入联想）"""
+        values = SearchIndexService(self.db).find_values(field, keyword)
+        if values is None:
+            column = getattr(WaterQuality, field)
+            rows = self.db.query(column).filter(column.like(f"%{keyword}%")).distinct().limit(limit).all()
+            return [row[0] for row in rows if row[0]]
+        return values[:limit]
+    
+    @replica_read
     def get_quality_levels(self) -> List[str]:
         """获取水质等级列表"""
         levels = self.db.query(WaterQuality.comprehensive_quality_level).distinct().all()
         return [level[0] for level in levels if level[0]]
     
     def recalculate_all_levels(self) -> int:
-        """重新计算所有水质数据的等级"""
-        # 获取所有水质数据
-        all_water_quality = self.db.query(WaterQuality).all()
-        updated_count = 0
+        """重新计算所有水质数据的等级（批量向量化计算）"""
+        # 只读取主键和指标数值列
+        rows = self.db.query(
+            WaterQuality.id,
+            WaterQuality.cod_value,
+            WaterQuality.ammonia_nitrogen_value,
+            WaterQuality.total_phosphorus_value,
+            WaterQuality.potassium_permanganate_value
+        ).all()
         
-        for water_quality in all_water_quality:
-            # 重新计算等级
-            levels = WaterQualityCalculator.calculate_all_levels(
-                cod_value=water_quality.cod_value,
-                ammonia_nitrogen_value=water_quality.ammonia_nitrogen_value,
-                total_phosphorus_value=water_quality.total_phosphorus_value,
-                potassium_permanganate_value=water_quality.potassium_permanganate_value
-            )
-            
-            # 更新等级
-            water_quality.cod_level = levels['cod_level']
-            water_quality.ammonia_nitrogen_level = levels['ammonia_nitrogen_level']
-            water_quality.total_phosphorus_level = levels['total_phosphorus_level']
-            water_quality.potassium_permanganate_level = levels['potassium_permanganate_level']
-            water_quality.comprehensive_quality_level = levels['comprehensive_quality_level']
-            water_quality.comprehensive_level_number = levels['comprehensive_level_number']
-            
-            updated_count += 1
+        if not rows:
+            return 0
+        
+        ids, cod_values, ammonia_nitrogen_values, total_phosphorus_values, potassium_permanganate_values = zip(*rows)
+        
+        # 按生效的等级标准批量计算等级
+        levels = WaterQualityCalculator.calculate_all_levels_batch(
+            cod_values=cod_values,
+            ammonia_nitrogen_values=ammonia_nitrogen_values,
+            total_phosphorus_values=total_phosphorus_values,
+            potassium_permanganate_values=potassium_permanganate_values,
+            standard=GradingStandardService(self.db).get_active_compiled()
+        )
+        
+        # 按主键批量更新等级
+        level_keys = list(levels.keys())
+        update_params = [
+            dict(zip(level_keys, values), id=water_quality_id)
+            for water_quality_id, *values in zip(ids, *levels.values())
+        ]
+        self.db.execute(update(WaterQuality), update_params)
+        updated_count = len(update_params)
         
         # 批量提交
         self.db.commit()
-        return updated_count 
\ No newline at end of file
+        
+        # 等级变化会改变汇总单元，全量重建汇总数据
+        RollupService(self.db).rebuild()
+        bump_data_version()
+        return updated_count
+    
+    @staticmethod
+    def _reach_level_condition(indicator_type: str, value_column, level_code: int,
+                               standard: CompiledStandard):
+        """
+        生成"指标等级不优于指定等级"的SQL条件（由等级标准的阈值生成）
+        
+        等级代码0=Ⅰ类 ... 5=劣Ⅴ类，代码k对应 value > 第k-1级阈值
+        """
+        if level_code == 0:
+            return value_column.isnot(None)
+        
+        thresholds = standard.threshold_lists[indicator_type]
+        threshold = thresholds[level_code - 1]
+        
+        # 与上一等级阈值相同时（如COD的Ⅰ类和Ⅱ类均为15），等于该阈值判为较差的等级
+        if level_code < len(thresholds) and thresholds[level_code] == threshold:
+            return value_column >= threshold
+        return value_column > threshold
+    
+    @classmethod
+    def build_level_case_expressions(cls, standard: Optional[CompiledStandard] = None) -> Dict[str, object]:
+        """
+        生成各等级列的CASE表达式，计算结果与WaterQualityCalculator.calculate_all_levels一致
+        
+        Args:
+            standard: 等级标准，默认为GB3838-2002
+        
+        Returns:
+            等级列名到SQL表达式的映射
+        """
+        standard = standard or DEFAULT_STANDARD
+        levels = WaterQualityCalculator.INDICATOR_LEVELS
+        level_codes = range(len(levels) - 1, -1, -1)
+        # 等级字面量按等级列类型绑定为存储代码
+        level_type = WaterQuality.comprehensive_quality_level.type
+        expressions = {}
+        
+        for indicator_type, value_field, level_field in cls.INDICATOR_COLUMNS:
+            value_column = getattr(WaterQuality, value_field)
+            expressions[level_field] = case(
+                *[
+                    (
+                        cls._reach_level_condition(indicator_type, value_column, code, standard),
+                        literal(levels[code], level_type)
+                    )
+                    for code in level_codes
+                ],
+                else_=None
+            )
+        
+        # 综合等级取最差等级：任一指标达到该等级即为该等级
+        comprehensive_conditions = [
+            or_(*[
+                cls._reach_level_condition(indicator_type, getattr(WaterQuality, value_field), code, standard)
+                for indicator_type, value_field, _ in cls.INDICATOR_COLUMNS
+            ])
+            for code in level_codes
+        ]
+        expressions['comprehensive_quality_level'] = case(
+            *[
+                (condition, literal(levels[code], level_type))
+                for condition, code in zip(comprehensive_conditions, level_codes)
+            ],
+            else_=None
+        )
+        expressions['comprehensive_level_number'] = case(
+            *[(condition, literal(code + 1)) for condition, code in zip(comprehensive_conditions, level_codes)],
+            else_=None
+        )
+        return expressions
+    
+    def recalculate_all_levels_sql(self, chunk_size: Optional[int] = None,
+                                   progress_callback: Optional[Callable[[int, int, int], None]] = None) -> Dict[str, int]:
+        """
+        在数据库中重新计算所有水质数据的等级（基于集合的UPDATE，按主键键集分块提交）
+        
+        Args:
+            chunk_size: 每块数据条数，默认取配置RECALCULATE_CHUNK_SIZE
+            progress_callback: 进度回调 (已处理数量, 总数量, 已变更数量)
+        
+        Returns:
+            {'total_count': 总数量, 'changed_count': 等级发生变化的数量}
+        """
+        chunk_size = chunk_size or settings.RECALCULATE_CHUNK_SIZE
+        total_count = self.db.query(func.count(WaterQuality.id)).scalar()
+        
+        if not total_count:
+            return {'total_count': 0, 'changed_count': 0}
+        
+        expressions = self.build_level_case_expressions(GradingStandardService(self.db).get_active_compiled())
+        # 只更新等级实际发生变化的行，rowcount即为变更数量
+        changed_condition = or_(*[
+            getattr(WaterQuality, field).is_distinct_from(expression)
+            for field, expression in expressions.items()
+        ])
+        
+        processed_count = 0
+        changed_count = 0
+        last_id = 0
+        try:
+            while True:
+                # 按主键键集分页取下一块的末尾主键和条数（主键不连续时每块条数仍为chunk_size）
+                chunk_ids = select(WaterQuality.id)\
+                    .where(WaterQuality.id > last_id)\
+                    .order_by(WaterQuality.id)\
+                    .limit(chunk_size)\
+                    .subquery()
+                end_id, row_count = self.db.execute(
+                    select(func.max(chunk_ids.c.id), func.count(chunk_ids.c.id))
+                ).one()
+                if not row_count:
+                    break
+                
+                result = self.db.execute(
+                    update(WaterQuality)
+                    .where(WaterQuality.id > last_id, WaterQuality.id <= end_id, changed_condition)
+                    .values(**expressions)
+                    .execution_options(synchronize_session=False)
+                )
+                self.db.commit()
+                
+                last_id = end_id
+                changed_count += result.rowcount
+                processed_count += row_count
+                logger.info(f"重新计算等级进度: {processed_count}/{total_count}，已变更 {changed_count} 条")
+                if progress_callback:
+                    progress_callback(processed_count, total_count, changed_count)
+        finally:
+            if changed_count:
+                # 等级变化会改变汇总单元，全量重建汇总数据（中途失败时已提交的块同样需要重建）
+                self.db.rollback()
+                RollupService(self.db).rebuild()
+                bump_data_version()
+        
+        return {'total_count': total_count, 'changed_count': changed_count} 
\ No newline at end of file
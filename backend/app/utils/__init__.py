@@ -4,6 +4,8 @@
 from app.utils.common import (
     parse_datetime,
     format_datetime,
+    encode_cursor,
+    decode_cursor,
     validate_email,
     sanitize_string,
     safe_float,
@@ -17,6 +19,8 @@ from app.utils.common import (
 __all__ = [
     "parse_datetime",
     "format_datetime",
+    "encode_cursor",
+    "decode_cursor",
     "validate_email",
     "sanitize_string",
     "safe_float",
@@ -0,0 +1,257 @@
+"""
+Apache Arrow/Parquet读写工具
+pyarrow为可选依赖，仅在导入导出Parquet/Arrow文件时加载
+"""
+import io
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from app.utils.water_quality_calculator import CompiledStandard, WaterQualityCalculator
+from app.utils.record_hash import compute_natural_key, compute_content_hash
+
+# 支持的Arrow格式文件（.arrow为Arrow IPC文件或流格式）
+ARROW_SUFFIXES = ('.parquet', '.arrow')
+
+# 导出Parquet使用的压缩算法
+PARQUET_COMPRESSION = 'zstd'
+
+# 水质数据字段对应的Arrow类型
+FIELD_TYPES = {
+    'id': 'int64',
+    'sampling_date': 'timestamp',
+    'sampling_time': 'string',
+    'detection_date': 'timestamp',
+    'code': 'string',
+    'river_name': 'string',
+    'method': 'string',
+    'cod_value': 'float64',
+    'cod_level': 'string',
+    'ammonia_nitrogen_value': 'float64',
+    'ammonia_nitrogen_level': 'string',
+    'total_phosphorus_value': 'float64',
+    'total_phosphorus_level': 'string',
+    'potassium_permanganate_value': 'float64',
+    'potassium_permanganate_level': 'string',
+    'comprehensive_quality_level': 'string',
+    'comprehensive_level_number': 'int64',
+    'remarks': 'string',
+    'created_at': 'timestamp',
+    'updated_at': 'timestamp'
+}
+
+VALUE_FIELDS = ['cod_value', 'ammonia_nitrogen_value', 'total_phosphorus_value', 'potassium_permanganate_value']
+LEVEL_FIELDS = [
+    'cod_level',
+    'ammonia_nitrogen_level',
+    'total_phosphorus_level',
+    'potassium_permanganate_level',
+    'comprehensive_quality_level'
+]
+TEXT_FIELDS = ['sampling_time', 'code', 'river_name', 'method', 'remarks']
+DATE_FIELDS = ['sampling_date', 'detection_date']
+
+
+def import_pyarrow():
+    """延迟导入pyarrow，未安装时给出提示"""
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.ipc  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImportError("读写Parquet/Arrow文件需要安装pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def get_arrow_type(field: str):
+    """获取字段对应的Arrow类型"""
+    pa = import_pyarrow()
+    type_name = FIELD_TYPES[field]
+    if type_name == 'timestamp':
+        return pa.timestamp('us')
+    return getattr(pa, type_name)()
+
+
+def get_arrow_schema(fields: Sequence[str]):
+    """根据字段列表构建Arrow schema"""
+    pa = import_pyarrow()
+    return pa.schema([(field, get_arrow_type(field)) for field in fields])
+
+
+class _ChunkSink(io.RawIOBase):
+    """只追加的内存输出流，写入的数据可分段取出（用于边写边输出Parquet）"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        """取出并清空已写入的数据"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet_chunks(row_batches: Iterable[Sequence[tuple]], fields: Sequence[str]) -> Iterator[bytes]:
+    """
+    将行批次逐批写为Parquet（每批一个行组），边写边输出字节块
+    
+    Args:
+        row_batches: 行批次迭代器，每行为按fields顺序的元组
+        fields: 字段列表
+    
+    Returns:
+        Parquet文件内容的字节块迭代器
+    """
+    pa = import_pyarrow()
+    schema = get_arrow_schema(fields)
+    sink = _ChunkSink()
+    writer = pa.parquet.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION)
+    
+    try:
+        for rows in row_batches:
+            if not rows:
+                continue
+            columns = list(zip(*rows))
+            table = pa.Table.from_arrays(
+                [pa.array(column, type=schema.field(index).type) for index, column in enumerate(columns)],
+                schema=schema
+            )
+            writer.write_table(table)
+            data = sink.drain()
+            if data:
+                yield data
+    except BaseException:
+        writer.close()
+        raise
+    
+    # 关闭时写入文件尾（元数据）
+    writer.close()
+    yield sink.drain()
+
+
+def iter_arrow_batches(file_path: str, batch_size: int) -> Iterator[Any]:
+    """
+    分批读取Parquet或Arrow IPC文件
+    
+    Args:
+        file_path: 文件路径（.parquet/.arrow）
+        batch_size: 每批行数
+    
+    Returns:
+        RecordBatch迭代器
+    """
+    pa = import_pyarrow()
+    suffix = Path(file_path).suffix.lower()
+    
+    if suffix == '.parquet':
+        yield from pa.parquet.ParquetFile(file_path).iter_batches(batch_size=batch_size)
+        return
+    
+    if suffix != '.arrow':
+        raise ValueError(f"不支持的文件格式: {suffix}")
+    
+    with pa.memory_map(file_path) as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(index) for index in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            # 不是IPC文件格式时按IPC流格式读取
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+        
+        for batch in batches:
+            for offset in range(0, batch.num_rows, batch_size):
+                yield batch.slice(offset, batch_size)
+
+
+def record_batch_to_records(batch, column_mapping: Dict[str, str],
+                            standard: Optional[CompiledStandard] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    将RecordBatch按列转换为批量插入记录，缺失的等级按指标数值批量计算补全
+    
+    Args:
+        batch: RecordBatch，列名可以是字段名或源文件列名
+        column_mapping: 源文件列名到字段名的映射
+        standard: 补全等级使用的等级标准，默认为GB3838-2002
+    
+    Returns:
+        (记录列表, 因缺少取样日期、检测日期或河道名称而跳过的行数)
+    """
+    pa = import_pyarrow()
+    pc = pa.compute
+    row_count = batch.num_rows
+    source_columns = {
+        column_mapping.get(name, name): batch.column(index)
+        for index, name in enumerate(batch.schema.names)
+    }
+    
+    def read_column(field: str) -> list:
+        arrow_type = get_arrow_type(field)
+        column = source_columns.get(field)
+        if column is None:
+            return [None] * row_count
+        if FIELD_TYPES[field] == 'string':
+            if pa.types.is_floating(column.type):
+                # 数值型编号等去掉多余的小数部分
+                column = pc.cast(pc.cast(column, pa.int64(), safe=False), pa.string())
+            column = pc.utf8_trim_whitespace(pc.cast(column, arrow_type))
+            return [value or None for value in column.to_pylist()]
+        return pc.cast(column, arrow_type).to_pylist()
+    
+    columns = {field: read_column(field) for field in DATE_FIELDS + TEXT_FIELDS + VALUE_FIELDS + LEVEL_FIELDS}
+    columns['comprehensive_level_number'] = read_column('comprehensive_level_number')
+    
+    valid_rows = [
+        index for index in range(row_count)
+        if columns['sampling_date'][index] is not None
+        and columns['detection_date'][index] is not None
+        and columns['river_name'][index] is not None
+    ]
+    skipped_count = row_count - len(valid_rows)
+    if skipped_count:
+        columns = {field: [values[index] for index in valid_rows] for field, values in columns.items()}
+    
+    # 源数据缺失的等级（包括未知等级）按指标数值批量计算补全
+    levels = WaterQualityCalculator.calculate_all_levels_batch(
+        *[np.array(columns[field], dtype=np.float64) for field in VALUE_FIELDS], standard=standard
+    )
+    for field in LEVEL_FIELDS:
+        columns[field] = [
+            given if given in WaterQualityCalculator.LEVEL_CODES else computed
+            for given, computed in zip(columns[field], levels[field].tolist())
+        ]
+    columns['comprehensive_level_number'] = [
+        given if given is not None else computed
+        for given, computed in zip(columns['comprehensive_level_number'], levels['comprehensive_level_number'].tolist())
+    ]
+    
+    # 添加系统字段
+    now = datetime.now()
+    columns['created_at'] = [now] * len(valid_rows)
+    columns['updated_at'] = [now] * len(valid_rows)
+    
+    keys = list(columns.keys())
+    records = [dict(zip(keys, values)) for values in zip(*columns.values())]
+    
+    # 自然键和内容哈希，用于幂等导入
+    for record in records:
+        record['natural_key'] = compute_natural_key(
+            record['code'], record['river_name'], record['sampling_date'], record['sampling_time']
+        )
+        record['content_hash'] = compute_content_hash(record)
+    return records, skipped_count
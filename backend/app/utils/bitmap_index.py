@@ -0,0 +1,104 @@
+"""
+按行位置的位图索引
+每个(字段, 字典代码)对应一个按位打包的uint8位图（第p行对应第p//8个字节的第p%8位），
+过滤条件的组合转换为位图按位与，计数转换为popcount
+"""
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+def popcount(bitmap: np.ndarray) -> int:
+    """位图中置位的数量（展开后计数，比按字节查表快）"""
+    return int(np.count_nonzero(np.unpackbits(bitmap)))
+
+
+def intersect(bitmaps: Iterable[np.ndarray]) -> np.ndarray:
+    """多个位图按位与"""
+    return np.bitwise_and.reduce(list(bitmaps))
+
+
+def union(bitmaps: Iterable[np.ndarray], byte_count: int) -> np.ndarray:
+    """多个位图按位或（没有位图时返回全0位图）"""
+    bitmaps = list(bitmaps)
+    if not bitmaps:
+        return np.zeros(byte_count, dtype=np.uint8)
+    return np.bitwise_or.reduce(bitmaps)
+
+
+def to_positions(bitmap: np.ndarray) -> np.ndarray:
+    """位图中置位的行位置"""
+    return np.flatnonzero(np.unpackbits(bitmap, bitorder='little'))
+
+
+def _byte_count(capacity: int) -> int:
+    """容纳capacity行所需的字节数"""
+    return (capacity + 7) // 8
+
+
+class BitmapIndex:
+    """
+    位图索引
+    
+    只记录有效行；行的取值变化或删除时由调用方先清除旧代码对应的位
+    """
+    
+    def __init__(self, fields: Iterable[str], capacity: int):
+        self.byte_count = _byte_count(capacity)
+        self.bitmaps: Dict[str, List[np.ndarray]] = {field: [] for field in fields}
+    
+    def _get_or_create(self, field: str, code: int) -> np.ndarray:
+        """获取位图，代码对应的位图不存在时创建"""
+        bitmaps = self.bitmaps[field]
+        while len(bitmaps) <= code:
+            bitmaps.append(np.zeros(self.byte_count, dtype=np.uint8))
+        return bitmaps[code]
+    
+    def get(self, field: str, code: Optional[int]) -> np.ndarray:
+        """获取位图（代码不存在时返回全0位图，不可修改返回值）"""
+        bitmaps = self.bitmaps[field]
+        if code is None or code >= len(bitmaps):
+            return np.zeros(self.byte_count, dtype=np.uint8)
+        return bitmaps[code]
+    
+    def grow(self, capacity: int) -> None:
+        """扩容（保留已有位）"""
+        byte_count = _byte_count(capacity)
+        if byte_count <= self.byte_count:
+            return
+        for field, bitmaps in self.bitmaps.items():
+            self.bitmaps[field] = [
+                np.concatenate([bitmap, np.zeros(byte_count - self.byte_count, dtype=np.uint8)])
+                for bitmap in bitmaps
+            ]
+        self.byte_count = byte_count
+    
+    def build(self, codes: Dict[str, np.ndarray], alive: np.ndarray) -> None:
+        """由代码列全量构建（alive为有效行标记，长度与代码列相同）"""
+        for field in self.bitmaps:
+            column = codes[field]
+            code_count = int(column[alive].max()) + 1 if alive.any() else 0
+            bitmaps = []
+            for code in range(code_count):
+                packed = np.packbits((column == code) & alive, bitorder='little')
+                bitmap = np.zeros(self.byte_count, dtype=np.uint8)
+                bitmap[:len(packed)] = packed
+                bitmaps.append(bitmap)
+            self.bitmaps[field] = bitmaps
+    
+    def set(self, field: str, code: int, position: int) -> None:
+        """置位"""
+        self._get_or_create(field, code)[position >> 3] |= np.uint8(1 << (position & 7))
+    
+    def unset(self, field: str, code: int, position: int) -> None:
+        """清除位"""
+        bitmaps = self.bitmaps[field]
+        if code < len(bitmaps):
+            bitmaps[code][position >> 3] &= np.uint8(~(1 << (position & 7)) & 0xFF)
+    
+    @property
+    def bitmap_count(self) -> int:
+        """位图数量"""
+        return sum(len(bitmaps) for bitmaps in self.bitmaps.values())
+    
+    def memory_bytes(self) -> int:
+        """位图占用的内存（字节）"""
+        return self.bitmap_count * self.byte_count
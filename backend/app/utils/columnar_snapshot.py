@@ -0,0 +1,270 @@
+"""
+水质数据列式快照
+在进程内以NumPy数组按列保存水质数据：指标数值为float64（缺失为NaN），取样日期为int64微秒时间戳，
+河道、方式、月份和各等级为字典编码的整数代码，供大屏统计做向量化聚合；
+编码字段同时维护按行位置的位图索引，供组合过滤计数使用
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from app.utils.bitmap_index import BitmapIndex
+
+# 快照字段（按顺序），方式已标准化
+SNAPSHOT_FIELDS = [
+    'id',
+    'sampling_date',
+    'river_name',
+    'method',
+    'comprehensive_quality_level',
+    'cod_value',
+    'ammonia_nitrogen_value',
+    'total_phosphorus_value',
+    'potassium_permanganate_value',
+    'cod_level',
+    'ammonia_nitrogen_level',
+    'total_phosphorus_level',
+    'potassium_permanganate_level'
+]
+
+VALUE_FIELDS = ['cod_value', 'ammonia_nitrogen_value', 'total_phosphorus_value', 'potassium_permanganate_value']
+
+# 字典编码的字段（等级为空时编码为None）
+CODED_FIELDS = [
+    'river_name',
+    'method',
+    'month',
+    'comprehensive_quality_level',
+    'cod_level',
+    'ammonia_nitrogen_level',
+    'total_phosphorus_level',
+    'potassium_permanganate_level'
+]
+
+# 缺失日期的时间戳
+MISSING_TIMESTAMP = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+
+# 初始容量，追加超出容量时按1.25倍扩容
+_INITIAL_CAPACITY = 1024
+
+
+def to_timestamp(value: Optional[datetime]) -> int:
+    """日期时间转换为微秒时间戳"""
+    if value is None:
+        return MISSING_TIMESTAMP
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def from_timestamp(value: int) -> Optional[datetime]:
+    """微秒时间戳转换为日期时间"""
+    if value == MISSING_TIMESTAMP:
+        return None
+    return np.datetime64(int(value), 'us').astype(datetime)
+
+
+class DictionaryEncoder:
+    """字典编码：取值与整数代码一一对应，代码按首次出现顺序分配且不回收"""
+    
+    def __init__(self):
+        self.values: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.values)
+    
+    def encode(self, value: Any) -> int:
+        """获取取值的代码，新取值分配新代码"""
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+    
+    def code_of(self, value: Any) -> Optional[int]:
+        """获取已有取值的代码，不存在时返回None"""
+        return self._codes.get(value)
+
+
+class ColumnarSnapshot:
+    """
+    水质数据列式快照
+    
+    删除的行只标记为无效（alive=False），无效行超过一半时压缩。
+    所有读写在同一把锁内进行，读取请使用 read() 上下文
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self) -> None:
+        """清空快照"""
+        with self._lock:
+            self.size = 0
+            self.dead_count = 0
+            self.positions: Dict[int, int] = {}
+            self.dictionaries = {field: DictionaryEncoder() for field in CODED_FIELDS}
+            self.bitmaps = BitmapIndex(CODED_FIELDS, _INITIAL_CAPACITY)
+            self._allocate(_INITIAL_CAPACITY)
+    
+    def _allocate(self, capacity: int) -> None:
+        """按容量分配数组"""
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.sampling_dates = np.full(capacity, MISSING_TIMESTAMP, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.values = {field: np.full(capacity, np.nan, dtype=np.float64) for field in VALUE_FIELDS}
+        self.codes = {field: np.zeros(capacity, dtype=np.int32) for field in CODED_FIELDS}
+    
+    def _grow(self, min_capacity: int) -> None:
+        """扩容（保留已有数据）"""
+        capacity = len(self.ids)
+        if min_capacity <= capacity:
+            return
+        new_capacity = max(min_capacity, capacity + capacity // 4)
+        
+        ids, sampling_dates, alive = self.ids, self.sampling_dates, self.alive
+        values, codes = self.values, self.codes
+        self._allocate(new_capacity)
+        self.ids[:self.size] = ids[:self.size]
+        self.sampling_dates[:self.size] = sampling_dates[:self.size]
+        self.alive[:self.size] = alive[:self.size]
+        for field in VALUE_FIELDS:
+            self.values[field][:self.size] = values[field][:self.size]
+        for field in CODED_FIELDS:
+            self.codes[field][:self.size] = codes[field][:self.size]
+        self.bitmaps.grow(new_capacity)
+    
+    def _encode_row(self, row: Dict[str, Any]) -> Dict[str, int]:
+        """字典编码一行数据"""
+        sampling_date = row['sampling_date']
+        encoded = {
+            'month': self.dictionaries['month'].encode(sampling_date.strftime('%Y-%m') if sampling_date else None)
+        }
+        for field in CODED_FIELDS:
+            if field != 'month':
+                encoded[field] = self.dictionaries[field].encode(row[field] or None)
+        return encoded
+    
+    def _unset_bitmaps(self, position: int) -> None:
+        """清除有效行在位图索引中的位"""
+        if not self.alive[position]:
+            return
+        for field in CODED_FIELDS:
+            self.bitmaps.unset(field, int(self.codes[field][position]), position)
+    
+    def _write_row(self, position: int, row: Dict[str, Any]) -> None:
+        """写入指定位置（同步位图索引）"""
+        self._unset_bitmaps(position)
+        self.ids[position] = row['id']
+        self.sampling_dates[position] = to_timestamp(row['sampling_date'])
+        self.alive[position] = True
+        for field in VALUE_FIELDS:
+            value = row[field]
+            self.values[field][position] = np.nan if value is None else value
+        for field, code in self._encode_row(row).items():
+            self.codes[field][position] = code
+            self.bitmaps.set(field, code, position)
+    
+    def load(self, rows: Iterable[Sequence[Any]]) -> None:
+        """
+        全量加载
+        
+        Args:
+            rows: 按SNAPSHOT_FIELDS顺序的行（方式需已标准化）
+        """
+        columns: Dict[str, list] = {field: [] for field in SNAPSHOT_FIELDS}
+        for row in rows:
+            for field, value in zip(SNAPSHOT_FIELDS, row):
+                columns[field].append(value)
+        row_count = len(columns['id'])
+        
+        with self._lock:
+            self.clear()
+            self._grow(row_count)
+            self.size = row_count
+            self.ids[:row_count] = columns['id']
+            self.sampling_dates[:row_count] = [to_timestamp(value) for value in columns['sampling_date']]
+            self.alive[:row_count] = True
+            for field in VALUE_FIELDS:
+                self.values[field][:row_count] = np.array(columns[field], dtype=np.float64)
+            
+            columns['month'] = [value.strftime('%Y-%m') if value else None for value in columns['sampling_date']]
+            for field in CODED_FIELDS:
+                encoder = self.dictionaries[field]
+                self.codes[field][:row_count] = [encoder.encode(value or None) for value in columns[field]]
+            
+            self.positions = {row_id: position for position, row_id in enumerate(columns['id'])}
+            self._build_bitmaps()
+    
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """新增或更新一行（row包含SNAPSHOT_FIELDS中的字段，方式需已标准化）"""
+        with self._lock:
+            position = self.positions.get(row['id'])
+            if position is None:
+                self._grow(self.size + 1)
+                position = self.size
+                self.size += 1
+                self.positions[row['id']] = position
+            self._write_row(position, row)
+    
+    def delete(self, row_id: int) -> None:
+        """删除一行（只标记为无效，无效行过多时压缩）"""
+        with self._lock:
+            position = self.positions.pop(row_id, None)
+            if position is None:
+                return
+            self._unset_bitmaps(position)
+            self.alive[position] = False
+            self.dead_count += 1
+            if self.dead_count > _INITIAL_CAPACITY and self.dead_count * 2 > self.size:
+                self._compact()
+    
+    def _compact(self) -> None:
+        """移除无效行"""
+        keep = np.flatnonzero(self.alive[:self.size])
+        self.ids[:len(keep)] = self.ids[keep]
+        self.sampling_dates[:len(keep)] = self.sampling_dates[keep]
+        for field in VALUE_FIELDS:
+            self.values[field][:len(keep)] = self.values[field][keep]
+        for field in CODED_FIELDS:
+            self.codes[field][:len(keep)] = self.codes[field][keep]
+        self.alive[:len(keep)] = True
+        self.alive[len(keep):self.size] = False
+        self.size = len(keep)
+        self.dead_count = 0
+        self.positions = {int(row_id): position for position, row_id in enumerate(self.ids[:self.size])}
+        self._build_bitmaps()
+    
+    def _build_bitmaps(self) -> None:
+        """由代码列全量构建位图索引"""
+        self.bitmaps.build(
+            {field: self.codes[field][:self.size] for field in CODED_FIELDS}, self.alive[:self.size]
+        )
+    
+    @contextmanager
+    def read(self) -> Iterator["ColumnarSnapshot"]:
+        """读取上下文（持有锁期间写入阻塞，数组按size截取后使用）"""
+        with self._lock:
+            yield self
+    
+    def column(self, field: str) -> np.ndarray:
+        """获取有效长度内的列（编码字段返回代码，数值字段返回数值）"""
+        if field == 'id':
+            return self.ids[:self.size]
+        if field == 'sampling_date':
+            return self.sampling_dates[:self.size]
+        if field == 'alive':
+            return self.alive[:self.size]
+        if field in self.values:
+            return self.values[field][:self.size]
+        return self.codes[field][:self.size]
+    
+    def memory_bytes(self) -> int:
+        """列数组占用的内存（字节，不含位图索引）"""
+        arrays = [self.ids, self.sampling_dates, self.alive, *self.values.values(), *self.codes.values()]
+        return int(sum(array.nbytes for array in arrays))
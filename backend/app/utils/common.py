@@ -2,7 +2,9 @@
 通用工具函数
 """
 from datetime import datetime
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
+import base64
+import json
 import re
 
 
@@ -32,6 +34,22 @@ def parse_datetime(date_str: Optional[str]) -> Optional[datetime]:
     raise ValueError(f"无效的日期格式: {date_str}")
 
 
+def encode_cursor(sampling_date: datetime, record_id: int) -> str:
+    """将(取样日期, ID)编码为不透明的分页游标"""
+    payload = json.dumps({"d": sampling_date.isoformat(), "i": record_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析分页游标，返回(取样日期, ID)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
 def format_datetime(dt: datetime, fmt: str = "%Y-%m-%d %H:%M:%S") -> str:
     """格式化日期时间"""
     return dt.strftime(fmt)
@@ -0,0 +1,78 @@
+"""
+水质数据导出工具
+将行批次逐批编码为CSV或NDJSON字节块，并支持边输出边gzip压缩
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Iterable, Iterator, Sequence
+
+# 导出的日期时间格式（与导入时可解析的格式一致）
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# gzip压缩级别（流式导出优先速度）
+GZIP_LEVEL = 6
+
+
+def _format_value(value: Any) -> Any:
+    """格式化导出值"""
+    if isinstance(value, datetime):
+        return value.strftime(DATETIME_FORMAT)
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def iter_csv_chunks(row_batches: Iterable[Sequence[tuple]], fields: Sequence[str]) -> Iterator[bytes]:
+    """
+    将行批次逐批编码为CSV（UTF-8带BOM，便于Excel直接打开）
+    
+    Args:
+        row_batches: 行批次迭代器，每行为按fields顺序的元组
+        fields: 字段列表（作为表头）
+    
+    Returns:
+        CSV内容的字节块迭代器
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue().encode('utf-8-sig')
+    
+    for rows in row_batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_format_value(value) for value in row] for row in rows])
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_ndjson_chunks(row_batches: Iterable[Sequence[tuple]], fields: Sequence[str]) -> Iterator[bytes]:
+    """
+    将行批次逐批编码为NDJSON（每行一个JSON对象）
+    
+    Args:
+        row_batches: 行批次迭代器，每行为按fields顺序的元组
+        fields: 字段列表（作为JSON键）
+    
+    Returns:
+        NDJSON内容的字节块迭代器
+    """
+    for rows in row_batches:
+        lines = [
+            json.dumps(dict(zip(fields, [_format_value(value) for value in row])), ensure_ascii=False)
+            for row in rows
+        ]
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def iter_gzip_chunks(chunks: Iterable[bytes], level: int = GZIP_LEVEL) -> Iterator[bytes]:
+    """边输出边gzip压缩字节块"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
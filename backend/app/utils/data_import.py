@@ -0,0 +1,285 @@
+"""
+水质数据导入工具
+负责分块读取源文件、清理转换数据，并转换为可批量插入的记录
+"""
+import glob
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from app.utils.water_quality_calculator import CompiledStandard, WaterQualityCalculator
+from app.utils.record_hash import compute_natural_key, compute_content_hash
+from app.utils.arrow_io import ARROW_SUFFIXES, iter_arrow_batches, record_batch_to_records
+
+# 源文件列名映射
+COLUMN_MAPPING = {
+    '取样日期': 'sampling_date',
+    '取样时间': 'sampling_time',
+    '检测日期': 'detection_date',
+    '编号': 'code',
+    '河道名称': 'river_name',
+    'COD': 'cod_value',
+    'COD等级': 'cod_level',
+    '氨氮': 'ammonia_nitrogen_value',
+    '氨氮等级': 'ammonia_nitrogen_level',
+    '总磷': 'total_phosphorus_value',
+    '总磷等级': 'total_phosphorus_level',
+    '高锰酸钾': 'potassium_permanganate_value',
+    '高锰酸钾等级': 'potassium_permanganate_level',
+    '综合水质等级': 'comprehensive_quality_level',
+    '综合等级数': 'comprehensive_level_number',
+    '方式': 'method'
+}
+
+NUMERIC_COLUMNS = ['cod_value', 'ammonia_nitrogen_value', 'total_phosphorus_value', 'potassium_permanganate_value']
+LEVEL_COLUMNS = [
+    'cod_level',
+    'ammonia_nitrogen_level',
+    'total_phosphorus_level',
+    'potassium_permanganate_level',
+    'comprehensive_quality_level'
+]
+TEXT_COLUMNS = ['sampling_time', 'code', 'river_name', 'method']
+DATE_COLUMNS = ['sampling_date', 'detection_date']
+
+# 支持流式读取的文件格式
+EXCEL_SUFFIXES = ('.xlsx', '.xlsm')
+CSV_SUFFIXES = ('.csv',)
+
+# 支持导入的全部文件格式
+SUPPORTED_SUFFIXES = EXCEL_SUFFIXES + CSV_SUFFIXES + ('.xls',) + ARROW_SUFFIXES
+
+
+def iter_dataframe_chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    分块读取源文件（Excel使用openpyxl只读模式，CSV使用分块读取）
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数
+    
+    Returns:
+        原始列名的DataFrame迭代器
+    """
+    suffix = Path(file_path).suffix.lower()
+    
+    if suffix in CSV_SUFFIXES:
+        yield from pd.read_csv(file_path, chunksize=chunk_size, encoding='utf-8-sig')
+        return
+    
+    if suffix == '.xls':
+        # 旧版Excel格式不支持流式读取
+        df = pd.read_excel(file_path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+    
+    if suffix not in EXCEL_SUFFIXES:
+        raise ValueError(f"不支持的文件格式: {suffix}")
+    
+    import openpyxl
+    
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        
+        buffer = []
+        for row in rows:
+            # 跳过空行
+            if all(value is None for value in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+
+def clean_and_convert_data(df: pd.DataFrame, standard: Optional[CompiledStandard] = None) -> pd.DataFrame:
+    """清理和转换数据（缺失的等级按standard计算补全，默认为GB3838-2002）"""
+    # 重命名列，源文件缺失的列补为空
+    df = df.rename(columns=COLUMN_MAPPING)
+    df = df.reindex(columns=list(COLUMN_MAPPING.values()))
+    
+    # 处理缺失值
+    df['sampling_time'] = df['sampling_time'].fillna("")
+    df['code'] = df['code'].fillna("")
+    df['method'] = df['method'].fillna("")
+    
+    # 数值型字段保持NaN，稍后处理
+    for col in NUMERIC_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    # 字符串型字段用空字符串填充，未知等级视为缺失（稍后按指标数值补全）
+    for col in LEVEL_COLUMNS:
+        values = df[col].fillna("").astype(str).str.strip()
+        df[col] = values.where(values.isin(WaterQualityCalculator.LEVEL_CODES.keys()), "")
+    
+    # 综合等级数字段
+    df['comprehensive_level_number'] = pd.to_numeric(df['comprehensive_level_number'], errors='coerce')
+    
+    # 源数据缺失的等级按指标数值批量计算补全
+    levels = WaterQualityCalculator.calculate_all_levels_batch(
+        cod_values=df['cod_value'],
+        ammonia_nitrogen_values=df['ammonia_nitrogen_value'],
+        total_phosphorus_values=df['total_phosphorus_value'],
+        potassium_permanganate_values=df['potassium_permanganate_value'],
+        standard=standard
+    )
+    for col in LEVEL_COLUMNS:
+        computed = pd.Series(levels[col], index=df.index).fillna("")
+        df[col] = df[col].where(df[col] != "", computed)
+    computed_level_number = pd.to_numeric(pd.Series(levels['comprehensive_level_number'], index=df.index))
+    df['comprehensive_level_number'] = df['comprehensive_level_number'].fillna(computed_level_number)
+    
+    # 确保日期类型正确
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    
+    return df
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """转换为文本，空值返回None（整数值的浮点数去掉小数部分）"""
+    if value is None or value == "" or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip() or None
+
+
+def dataframe_to_records(df: pd.DataFrame) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    将清理后的数据按列转换为批量插入记录
+    
+    Args:
+        df: clean_and_convert_data处理后的DataFrame
+    
+    Returns:
+        (记录列表, 因缺少取样日期、检测日期或河道名称而跳过的行数)
+    """
+    river_names = [_to_text(value) for value in df['river_name'].tolist()]
+    valid = (
+        df['sampling_date'].notna().to_numpy()
+        & df['detection_date'].notna().to_numpy()
+        & pd.notna(pd.Series(river_names, dtype=object)).to_numpy()
+    )
+    skipped_count = int(len(df) - valid.sum())
+    df = df[valid]
+    
+    columns: Dict[str, list] = {}
+    for col in DATE_COLUMNS:
+        columns[col] = [value.to_pydatetime() for value in df[col]]
+    for col in TEXT_COLUMNS:
+        columns[col] = [_to_text(value) for value in df[col].tolist()]
+    for col in NUMERIC_COLUMNS:
+        columns[col] = [None if pd.isna(value) else float(value) for value in df[col].tolist()]
+    for col in LEVEL_COLUMNS:
+        columns[col] = [value or None for value in df[col].tolist()]
+    columns['comprehensive_level_number'] = [
+        None if pd.isna(value) else int(value) for value in df['comprehensive_level_number'].tolist()
+    ]
+    
+    # 添加系统字段
+    now = datetime.now()
+    row_count = len(df)
+    columns['created_at'] = [now] * row_count
+    columns['updated_at'] = [now] * row_count
+    columns['remarks'] = [None] * row_count
+    
+    keys = list(columns.keys())
+    records = [dict(zip(keys, values)) for values in zip(*columns.values())]
+    
+    # 自然键和内容哈希，用于幂等导入
+    for record in records:
+        record['natural_key'] = compute_natural_key(
+            record['code'], record['river_name'], record['sampling_date'], record['sampling_time']
+        )
+        record['content_hash'] = compute_content_hash(record)
+    return records, skipped_count
+
+
+def iter_file_records(file_path: str, chunk_size: int,
+                      standard: Optional[CompiledStandard] = None) -> Iterator[Tuple[List[Dict[str, Any]], int]]:
+    """
+    分块读取文件并转换为批量写入记录
+    Parquet/Arrow文件直接按记录批次转换，不经过pandas
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每块行数
+        standard: 补全等级使用的等级标准，默认为GB3838-2002
+    
+    Returns:
+        (记录列表, 跳过的行数)迭代器
+    """
+    if Path(file_path).suffix.lower() in ARROW_SUFFIXES:
+        for batch in iter_arrow_batches(file_path, chunk_size):
+            yield record_batch_to_records(batch, COLUMN_MAPPING, standard)
+        return
+    
+    for chunk in iter_dataframe_chunks(file_path, chunk_size):
+        yield dataframe_to_records(clean_and_convert_data(chunk, standard))
+
+
+def parse_file(file_path: str, chunk_size: int,
+               standard: Optional[CompiledStandard] = None) -> Tuple[List[List[Dict[str, Any]]], int]:
+    """
+    读取、清理文件并按指标数值补全等级，转换为批量写入记录
+    （多文件导入时在进程池工作进程中执行，不访问数据库，等级标准由主进程传入）
+    
+    Args:
+        file_path: 文件路径
+        chunk_size: 每批行数
+        standard: 补全等级使用的等级标准，默认为GB3838-2002
+    
+    Returns:
+        (记录批次列表, 跳过的行数)
+    """
+    batches = []
+    skipped_count = 0
+    for records, chunk_skipped_count in iter_file_records(file_path, chunk_size, standard):
+        skipped_count += chunk_skipped_count
+        if records:
+            batches.append(records)
+    return batches, skipped_count
+
+
+def compute_file_hash(file_path: str) -> str:
+    """计算文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def expand_file_paths(patterns: List[str]) -> List[str]:
+    """
+    展开目录和通配符为支持导入的文件列表（目录递归查找，结果去重并排序）
+    
+    Args:
+        patterns: 文件路径、目录或通配符（如 data/2024-*.xlsx）
+    """
+    file_paths = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.rglob('*')
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = [Path(matched) for matched in glob.glob(pattern, recursive=True)]
+        for candidate in candidates:
+            # 跳过Excel打开时生成的临时文件
+            if candidate.is_file() and candidate.suffix.lower() in SUPPORTED_SUFFIXES and not candidate.name.startswith('~$'):
+                file_paths.add(str(candidate))
+    return sorted(file_paths)
@@ -0,0 +1,102 @@
+"""
+N-gram子串索引
+用于在取值数量较少的字段（如河道名称）上做子串匹配，将LIKE '%x%'转换为精确的IN过滤
+"""
+import string
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# 只转换ASCII字母的小写映射（SQLite LIKE只忽略ASCII大小写，str.lower会同时转换非ASCII字母）
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+class NgramIndex:
+    """N-gram子串索引（按取值计数，计数归零时移除）"""
+    
+    def __init__(self, n: int = 2):
+        self.n = n
+        self._value_counts: Dict[str, int] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(value: str) -> str:
+        """标准化取值（与SQLite LIKE一致，忽略ASCII大小写）"""
+        return value.translate(_ASCII_LOWER)
+    
+    def _grams(self, value: str) -> Set[str]:
+        """拆分取值的n-gram"""
+        value = self.normalize(value)
+        return {value[i:i + self.n] for i in range(len(value) - self.n + 1)}
+    
+    def add(self, value: Optional[str], count: int = 1) -> None:
+        """增加取值计数"""
+        if not value:
+            return
+        
+        with self._lock:
+            if value not in self._value_counts:
+                self._value_counts[value] = 0
+                for gram in self._grams(value):
+                    self._postings.setdefault(gram, set()).add(value)
+            self._value_counts[value] += count
+    
+    def remove(self, value: Optional[str], count: int = 1) -> None:
+        """减少取值计数，归零时从索引中移除"""
+        if not value:
+            return
+        
+        with self._lock:
+            if value not in self._value_counts:
+                return
+            
+            self._value_counts[value] -= count
+            if self._value_counts[value] > 0:
+                return
+            
+            del self._value_counts[value]
+            for gram in self._grams(value):
+                values = self._postings.get(gram)
+                if values is not None:
+                    values.discard(value)
+                    if not values:
+                        del self._postings[gram]
+    
+    def rebuild(self, value_counts: Iterable[Tuple[Optional[str], int]]) -> None:
+        """用(取值, 数量)全量重建索引（在锁外构建后整体替换，重建期间查询仍使用旧索引）"""
+        new_value_counts: Dict[str, int] = {}
+        new_postings: Dict[str, Set[str]] = {}
+        for value, count in value_counts:
+            if not value:
+                continue
+            if value not in new_value_counts:
+                new_value_counts[value] = 0
+                for gram in self._grams(value):
+                    new_postings.setdefault(gram, set()).add(value)
+            new_value_counts[value] += count
+        
+        with self._lock:
+            self._value_counts = new_value_counts
+            self._postings = new_postings
+    
+    def search(self, term: str) -> Set[str]:
+        """查找包含子串的所有取值"""
+        term = self.normalize(term)
+        
+        with self._lock:
+            if len(term) < self.n:
+                # 查询词短于n-gram时直接遍历取值集合
+                candidates = self._value_counts.keys()
+            else:
+                grams = sorted(self._grams(term), key=lambda gram: len(self._postings.get(gram, ())))
+                candidates = set(self._postings.get(grams[0], ()))
+                for gram in grams[1:]:
+                    candidates &= self._postings.get(gram, set())
+                    if not candidates:
+                        break
+            
+            # n-gram命中只是候选，仍需确认子串
+            return {value for value in candidates if term in self.normalize(value)}
+    
+    def __len__(self) -> int:
+        return len(self._value_counts)
@@ -0,0 +1,56 @@
+"""
+水质数据自然键和内容哈希
+自然键由(编号, 河道名称, 取样日期, 取样时间)确定，用于导入时去重和幂等更新
+"""
+import hashlib
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+# 自然键字段
+NATURAL_KEY_FIELDS = ['code', 'river_name', 'sampling_date', 'sampling_time']
+
+# 参与内容哈希的字段（除自然键和系统字段外的业务字段）
+CONTENT_FIELDS = [
+    'detection_date',
+    'method',
+    'cod_value',
+    'cod_level',
+    'ammonia_nitrogen_value',
+    'ammonia_nitrogen_level',
+    'total_phosphorus_value',
+    'total_phosphorus_level',
+    'potassium_permanganate_value',
+    'potassium_permanganate_level',
+    'comprehensive_quality_level',
+    'comprehensive_level_number',
+    'remarks'
+]
+
+# 字段分隔符（不会出现在业务数据中）
+_SEPARATOR = "\x1f"
+
+
+def _normalize(value: Any) -> str:
+    """标准化字段值，保证导入和接口写入得到相同的哈希"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d 00:00:00')
+    if isinstance(value, float):
+        return repr(int(value)) if value.is_integer() else repr(value)
+    return str(value).strip()
+
+
+def compute_natural_key(code: Optional[str], river_name: Optional[str],
+                        sampling_date: Optional[datetime], sampling_time: Optional[str]) -> str:
+    """计算自然键哈希"""
+    raw = _SEPARATOR.join(_normalize(value) for value in (code, river_name, sampling_date, sampling_time))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def compute_content_hash(values: Dict[str, Any]) -> str:
+    """计算内容哈希"""
+    raw = _SEPARATOR.join(_normalize(values.get(field)) for field in CONTENT_FIELDS)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
@@ -2,7 +2,9 @@
 水质等级计算工具
 基于中国地表水环境质量标准（GB3838-2002）
 """
+from bisect import bisect_left, bisect_right
 from typing import Optional, Dict, Any
+import numpy as np
 
 
 class WaterQualityCalculator:
@@ -40,6 +42,10 @@ class WaterQualityCalculator:
         }
     }
     
+    # 单指标等级（由好到差），批量计算时等级代码即其下标，缺失值代码为-1
+    INDICATOR_LEVELS = ['Ⅰ类', 'Ⅱ类', 'Ⅲ类', 'Ⅳ类', 'Ⅴ类', '劣Ⅴ类']
+    MISSING_LEVEL_CODE = -1
+    
     # 等级优先级（数值越小，等级越差）
     LEVEL_PRIORITY = {
         '重度黑臭': 0,
@@ -52,40 +58,60 @@ class WaterQualityCalculator:
         'Ⅰ类': 6
     }
     
+    # 等级存储代码（数据库等级列存储的小整数，代码越大等级越差，与LEVEL_PRIORITY顺序相反；
+    # Ⅰ类至劣Ⅴ类的存储代码为批量计算的等级代码+1）
+    LEVEL_CODES = {
+        'Ⅰ类': 1,
+        'Ⅱ类': 2,
+        'Ⅲ类': 3,
+        'Ⅳ类': 4,
+        'Ⅴ类': 5,
+        '劣Ⅴ类': 6,
+        '轻度黑臭': 7,
+        '重度黑臭': 8
+    }
+    
+    # 综合等级对应的等级数
+    LEVEL_NUMBERS = {
+        '重度黑臭': 0,
+        '轻度黑臭': 0,
+        '劣Ⅴ类': 6,
+        'Ⅴ类': 5,
+        'Ⅳ类': 4,
+        'Ⅲ类': 3,
+        'Ⅱ类': 2,
+        'Ⅰ类': 1
+    }
+    
     @classmethod
-    def calculate_indicator_level(cls, indicator_type: str, value: Optional[float]) -> Optional[str]:
+    def calculate_indicator_level(cls, indicator_type: str, value: Optional[float],
+                                  standard: Optional["CompiledStandard"] = None) -> Optional[str]:
         """
         计算单个指标的等级
         
         Args:
             indicator_type: 指标类型 (cod, ammonia_nitrogen, total_phosphorus, potassium_permanganate)
             value: 指标数值
+            standard: 等级标准，默认为GB3838-2002
             
         Returns:
-            等级字符串或None
+            等级字符串或None（NaN与批量计算一致视为缺失）
         """
-        if value is None:
+        if value is None or value != value:
             return None
-            
-        if indicator_type not in cls.QUALITY_STANDARDS:
-            return None
-            
-        standards = cls.QUALITY_STANDARDS[indicator_type]
         
-        # 检查是否超过Ⅴ类标准
-        if value > standards['Ⅴ类']:
-            return '劣Ⅴ类'
+        thresholds = (standard or DEFAULT_STANDARD).threshold_lists.get(indicator_type)
+        if thresholds is None:
+            return None
         
-        # 特殊处理COD：Ⅰ类和Ⅱ类标准相同，当值等于15时判断为Ⅱ类
-        if indicator_type == 'cod' and value == 15:
-            return 'Ⅱ类'
+        # 阈值升序，bisect_left即为第一个满足 value <= 阈值 的等级，超过Ⅴ类标准时为劣Ⅴ类
+        index = bisect_left(thresholds, value)
         
-        # 从最好的等级开始检查
-        for level in ['Ⅰ类', 'Ⅱ类', 'Ⅲ类', 'Ⅳ类', 'Ⅴ类']:
-            if value <= standards[level]:
-                return level
+        # 相邻等级阈值相同时（如COD的Ⅰ类和Ⅱ类均为15），等于该阈值判为其中较差的等级
+        if index < 5 and thresholds[index] == value:
+            index = bisect_right(thresholds, value) - 1
         
-        return '劣Ⅴ类'
+        return cls.INDICATOR_LEVELS[index]
     
     @classmethod
     def calculate_comprehensive_level(cls, cod_level: Optional[str], 
@@ -104,36 +130,29 @@ class WaterQualityCalculator:
         Returns:
             (综合等级, 等级数)
         """
-        levels = [cod_level, ammonia_nitrogen_level, total_phosphorus_level, potassium_permanganate_level]
-        valid_levels = [level for level in levels if level is not None]
+        # 找到最差等级（存储代码最大，未知等级代码记为0，相同时取第一个）
+        level_codes = cls.LEVEL_CODES
+        worst_level = None
+        worst_code = -1
+        for level in (cod_level, ammonia_nitrogen_level, total_phosphorus_level, potassium_permanganate_level):
+            if level is None:
+                continue
+            code = level_codes.get(level, 0)
+            if code > worst_code:
+                worst_level = level
+                worst_code = code
         
-        if not valid_levels:
+        if worst_level is None:
             return None, None
         
-        # 找到最差等级（优先级最低）
-        worst_level = min(valid_levels, key=lambda x: cls.LEVEL_PRIORITY.get(x, 99))
-        
-        # 等级数映射
-        level_number_map = {
-            '重度黑臭': 0,
-            '轻度黑臭': 0,
-            '劣Ⅴ类': 6,
-            'Ⅴ类': 5,
-            'Ⅳ类': 4,
-            'Ⅲ类': 3,
-            'Ⅱ类': 2,
-            'Ⅰ类': 1
-        }
-        
-        level_number = level_number_map.get(worst_level, None)
-        
-        return worst_level, level_number
+        return worst_level, cls.LEVEL_NUMBERS.get(worst_level)
     
     @classmethod
     def calculate_all_levels(cls, cod_value: Optional[float],
                            ammonia_nitrogen_value: Optional[float],
                            total_phosphorus_value: Optional[float],
-                           potassium_permanganate_value: Optional[float]) -> Dict[str, Any]:
+                           potassium_permanganate_value: Optional[float],
+                           standard: Optional["CompiledStandard"] = None) -> Dict[str, Any]:
         """
         计算所有等级
         
@@ -142,15 +161,18 @@ class WaterQualityCalculator:
             ammonia_nitrogen_value: 氨氮数值
             total_phosphorus_value: 总磷数值
             potassium_permanganate_value: 高锰酸钾数值
+            standard: 等级标准，默认为GB3838-2002
             
         Returns:
             包含所有等级的字典
         """
         # 计算各指标等级
-        cod_level = cls.calculate_indicator_level('cod', cod_value)
-        ammonia_nitrogen_level = cls.calculate_indicator_level('ammonia_nitrogen', ammonia_nitrogen_value)
-        total_phosphorus_level = cls.calculate_indicator_level('total_phosphorus', total_phosphorus_value)
-        potassium_permanganate_level = cls.calculate_indicator_level('potassium_permanganate', potassium_permanganate_value)
+        cod_level = cls.calculate_indicator_level('cod', cod_value, standard)
+        ammonia_nitrogen_level = cls.calculate_indicator_level('ammonia_nitrogen', ammonia_nitrogen_value, standard)
+        total_phosphorus_level = cls.calculate_indicator_level('total_phosphorus', total_phosphorus_value, standard)
+        potassium_permanganate_level = cls.calculate_indicator_level(
+            'potassium_permanganate', potassium_permanganate_value, standard
+        )
         
         # 计算综合等级
         comprehensive_level, level_number = cls.calculate_comprehensive_level(
@@ -198,4 +220,192 @@ class WaterQualityCalculator:
             return False
         
         qualified_levels = ['Ⅰ类', 'Ⅱ类', 'Ⅲ类']
-        return level in qualified_levels 
\ No newline at end of file
+        return level in qualified_levels
+    
+    @classmethod
+    def get_threshold_vector(cls, indicator_type: str,
+                             standard: Optional["CompiledStandard"] = None) -> np.ndarray:
+        """
+        获取指标的阈值向量（Ⅰ类至Ⅴ类上限，升序）
+        
+        Args:
+            indicator_type: 指标类型
+            standard: 等级标准，默认为GB3838-2002
+            
+        Returns:
+            阈值数组
+        """
+        return (standard or DEFAULT_STANDARD).threshold_vectors[indicator_type]
+    
+    @classmethod
+    def calculate_indicator_level_codes(cls, indicator_type: str, values,
+                                        standard: Optional["CompiledStandard"] = None) -> np.ndarray:
+        """
+        批量计算单个指标的等级代码
+        
+        Args:
+            indicator_type: 指标类型 (cod, ammonia_nitrogen, total_phosphorus, potassium_permanganate)
+            values: 指标数值数组（NumPy数组、pandas Series或列表，None/NaN视为缺失）
+            standard: 等级标准，默认为GB3838-2002
+            
+        Returns:
+            等级代码数组（0=Ⅰ类 ... 5=劣Ⅴ类，-1=缺失）
+        """
+        standard = standard or DEFAULT_STANDARD
+        values = np.asarray(values, dtype=np.float64)
+        thresholds = standard.threshold_vectors[indicator_type]
+        
+        # 阈值升序，searchsorted(left)即为第一个满足 value <= 阈值 的等级
+        codes = np.searchsorted(thresholds, values, side='left')
+        
+        # 相邻等级阈值相同时（如COD的Ⅰ类和Ⅱ类均为15），等于该阈值判为其中较差的等级
+        if indicator_type in standard.tied_indicators:
+            codes = np.maximum(codes, np.searchsorted(thresholds, values, side='right') - 1)
+        
+        codes = codes.astype(np.int8)
+        codes[np.isnan(values)] = cls.MISSING_LEVEL_CODE
+        return codes
+    
+    @classmethod
+    def calculate_level_codes_batch(cls, cod_values, ammonia_nitrogen_values,
+                                    total_phosphorus_values, potassium_permanganate_values,
+                                    standard: Optional["CompiledStandard"] = None) -> Dict[str, np.ndarray]:
+        """
+        批量计算所有等级代码
+        
+        Args:
+            cod_values: COD数值数组
+            ammonia_nitrogen_values: 氨氮数值数组
+            total_phosphorus_values: 总磷数值数组
+            potassium_permanganate_values: 高锰酸钾数值数组
+            standard: 等级标准，默认为GB3838-2002
+            
+        Returns:
+            各等级代码数组，综合等级取最差等级，综合等级数为代码+1（缺失为-1）
+        """
+        codes = {
+            'cod_level': cls.calculate_indicator_level_codes('cod', cod_values, standard),
+            'ammonia_nitrogen_level': cls.calculate_indicator_level_codes(
+                'ammonia_nitrogen', ammonia_nitrogen_values, standard
+            ),
+            'total_phosphorus_level': cls.calculate_indicator_level_codes(
+                'total_phosphorus', total_phosphorus_values, standard
+            ),
+            'potassium_permanganate_level': cls.calculate_indicator_level_codes(
+                'potassium_permanganate', potassium_permanganate_values, standard
+            )
+        }
+        
+        # 代码越大等级越差，缺失值(-1)不影响取最大值
+        comprehensive_codes = np.maximum.reduce(list(codes.values()))
+        codes['comprehensive_quality_level'] = comprehensive_codes
+        codes['comprehensive_level_number'] = np.where(
+            comprehensive_codes == cls.MISSING_LEVEL_CODE, cls.MISSING_LEVEL_CODE, comprehensive_codes + 1
+        ).astype(np.int8)
+        return codes
+    
+    @classmethod
+    def decode_level_codes(cls, codes: np.ndarray) -> np.ndarray:
+        """
+        将等级代码数组转换为等级字符串数组
+        
+        Args:
+            codes: 等级代码数组
+            
+        Returns:
+            等级字符串数组（object类型，缺失为None）
+        """
+        return _LEVEL_NAME_LOOKUP[np.asarray(codes, dtype=np.int64) + 1]
+    
+    @classmethod
+    def calculate_all_levels_batch(cls, cod_values, ammonia_nitrogen_values,
+                                   total_phosphorus_values, potassium_permanganate_values,
+                                   standard: Optional["CompiledStandard"] = None) -> Dict[str, np.ndarray]:
+        """
+        批量计算所有等级，结果与calculate_all_levels逐行计算一致
+        
+        Args:
+            cod_values: COD数值数组
+            ammonia_nitrogen_values: 氨氮数值数组
+            total_phosphorus_values: 总磷数值数组
+            potassium_permanganate_values: 高锰酸钾数值数组
+            standard: 等级标准，默认为GB3838-2002
+            
+        Returns:
+            包含所有等级数组的字典（等级为字符串，综合等级数为整数，缺失均为None）
+        """
+        codes = cls.calculate_level_codes_batch(
+            cod_values, ammonia_nitrogen_values, total_phosphorus_values, potassium_permanganate_values, standard
+        )
+        
+        result = {key: cls.decode_level_codes(value) for key, value in codes.items() if key != 'comprehensive_level_number'}
+        
+        level_numbers = codes['comprehensive_level_number'].astype(object)
+        level_numbers[codes['comprehensive_level_number'] == cls.MISSING_LEVEL_CODE] = None
+        result['comprehensive_level_number'] = level_numbers
+        return result
+    
+    @classmethod
+    def validate_standards(cls, standards: Dict[str, Dict[str, float]]) -> None:
+        """
+        校验等级标准的阈值（需包含全部指标的Ⅰ类至Ⅴ类阈值，非负且按等级非递减）
+        
+        Args:
+            standards: 与QUALITY_STANDARDS结构相同的阈值字典
+            
+        Raises:
+            ValueError: 阈值不完整或不合法
+        """
+        for indicator_type in cls.QUALITY_STANDARDS:
+            thresholds = standards.get(indicator_type)
+            if not isinstance(thresholds, dict):
+                raise ValueError(f"缺少指标的阈值: {indicator_type}")
+            
+            previous = 0.0
+            for level in cls.INDICATOR_LEVELS[:5]:
+                threshold = thresholds.get(level)
+                if isinstance(threshold, bool) or not isinstance(threshold, (int, float)):
+                    raise ValueError(f"指标{indicator_type}缺少{level}阈值")
+                if threshold != threshold or threshold < previous:
+                    raise ValueError(f"指标{indicator_type}的阈值需为非负数且按Ⅰ类至Ⅴ类非递减")
+                previous = threshold
+
+
+class CompiledStandard:
+    """
+    编译后的等级标准
+    
+    由各指标Ⅰ类至Ⅴ类阈值生成逐行计算使用的阈值列表（bisect在列表上比在NumPy数组上快）
+    和批量计算使用的阈值向量（searchsorted），标准不可修改，编译后可按版本缓存复用。
+    等级名称与顺序固定（数据库存储代码依赖于此），标准只决定阈值
+    """
+    
+    def __init__(self, standards: Dict[str, Dict[str, float]], name: str = "GB3838-2002",
+                 version: Optional[int] = None):
+        WaterQualityCalculator.validate_standards(standards)
+        levels = WaterQualityCalculator.INDICATOR_LEVELS[:5]
+        
+        self.name = name
+        self.version = version
+        self.standards = {
+            indicator_type: {level: float(standards[indicator_type][level]) for level in levels}
+            for indicator_type in WaterQualityCalculator.QUALITY_STANDARDS
+        }
+        self.threshold_lists = {
+            indicator_type: [thresholds[level] for level in levels]
+            for indicator_type, thresholds in self.standards.items()
+        }
+        self.threshold_vectors = {
+            indicator_type: np.array(thresholds, dtype=np.float64)
+            for indicator_type, thresholds in self.threshold_lists.items()
+        }
+        # 存在相邻等级阈值相同的指标（批量计算时需额外处理等于阈值的数值）
+        self.tied_indicators = frozenset(
+            indicator_type for indicator_type, thresholds in self.threshold_lists.items()
+            if len(set(thresholds)) < len(thresholds)
+        )
+
+
+# 默认等级标准（GB3838-2002）和等级代码查找表（下标0对应缺失值）
+DEFAULT_STANDARD = CompiledStandard(WaterQualityCalculator.QUALITY_STANDARDS)
+_LEVEL_NAME_LOOKUP = np.array([None] + WaterQualityCalculator.INDICATOR_LEVELS, dtype=object)
@@ -14,6 +14,30 @@ class Settings(BaseSettings):
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./water_quality.db"
     DATABASE_ECHO: bool = False
+    # 连接池配置，未设置的项取app/db/pool.py中对应数据库的默认配置（SQLite与服务端数据库不同）
+    DATABASE_POOL_MODE: Optional[str] = None  # queue, null, static(SQLite单连接共享), singleton(SQLite每线程一个连接)
+    DATABASE_POOL_SIZE: Optional[int] = None  # 连接池保持的连接数（singleton为保留连接的线程数）
+    DATABASE_MAX_OVERFLOW: Optional[int] = None  # 连接池已满时允许额外创建的连接数
+    DATABASE_POOL_RECYCLE: Optional[int] = None  # 连接最长使用时间（秒），-1表示不回收
+    DATABASE_POOL_TIMEOUT: Optional[float] = None  # 等待空闲连接的超时时间（秒）
+    DATABASE_POOL_PRE_PING: Optional[bool] = None  # 取连接前检测连接是否可用，关闭时在断线错误发生后重连
+    # 只读副本连接字符串（多个用逗号分隔）：大屏和列表、统计查询使用副本，写入和其他查询使用主库
+    DATABASE_REPLICA_URLS: str = ""
+    DATABASE_REPLICA_STRATEGY: str = "round_robin"  # 副本选择策略: round_robin(轮询), least_connections(最少连接数)
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5.0  # 用户提交写入后该时间内的查询仍使用主库（秒）
+    # SQLite性能配置：建立连接时执行PRAGMA（WAL模式下读写互不阻塞）
+    SQLITE_PRAGMAS_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"  # DELETE, TRUNCATE, PERSIST, MEMORY, WAL, OFF
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # OFF, NORMAL, FULL, EXTRA（WAL模式下NORMAL不会损坏数据库）
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 每个连接的页缓存大小（KB）
+    SQLITE_MMAP_SIZE: int = 268435456  # 内存映射读取的最大字节数，0表示不使用
+    SQLITE_TEMP_STORE: str = "MEMORY"  # DEFAULT, FILE, MEMORY（临时表和排序使用内存）
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # 数据库被锁定时的等待时间（毫秒）
+    SQLITE_MAINTENANCE_INTERVAL_SECONDS: int = 3600  # 定期执行PRAGMA optimize和WAL检查点的间隔（秒），0表示不执行
+    # 异步数据库：开启后大屏、登录和水质数据查询路由通过AsyncSession执行，数据库IO不占用线程池线程
+    ASYNC_DATABASE_ENABLED: bool = False
+    # 异步驱动连接字符串，为空时由DATABASE_URL推导（sqlite→sqlite+aiosqlite，postgresql→postgresql+asyncpg）
+    ASYNC_DATABASE_URL: str = ""
     
     # API Configuration
     API_V1_STR: str = "/api/v1"
@@ -49,6 +73,33 @@ class Settings(BaseSettings):
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
     
+    LIST_COUNT_MODE: str = "exact"  # 列表默认总数计算方式: exact, estimated, has_more
+    LIST_COUNT_CACHE_TTL: int = 300  # 精确总数缓存有效期（秒），数据写入后立即失效
+    LIST_COUNT_CACHE_MAX_SIZE: int = 1024
+    SEARCH_INDEX_ENABLED: bool = True  # 河道名称子串搜索使用进程内n-gram索引
+    SEARCH_INDEX_REFRESH_SECONDS: int = 300  # 全量刷新间隔（秒），API写入实时同步
+    SEARCH_INDEX_MAX_MATCHES: int = 500  # 匹配取值超过该数量时退回LIKE过滤
+    
+    # Dashboard Configuration
+    DASHBOARD_DATA_SOURCE: str = "rollup"  # rollup: 读取预聚合汇总表, raw: 直接扫描水质数据表, snapshot: 进程内列式快照
+    DASHBOARD_SNAPSHOT_REFRESH_SECONDS: int = 300  # 列式快照全量刷新间隔（秒），API写入实时同步
+    DASHBOARD_CACHE_ENABLED: bool = True
+    DASHBOARD_CACHE_TTL: int = 60  # 缓存有效期（秒），数据写入后立即失效
+    DASHBOARD_CACHE_MAX_SIZE: int = 256
+    DASHBOARD_PARALLEL_ENABLED: bool = False  # 大屏完整数据的各组成部分在线程池中并行获取（各用独立的数据库连接）
+    DASHBOARD_PARALLEL_WORKERS: int = 4  # 并行获取的线程数上限
+    DASHBOARD_PART_TIMEOUT: float = 10.0  # 并行获取时各组成部分的超时时间（秒），超时或出错的部分返回空结果
+    
+    # Import Configuration
+    IMPORT_BATCH_SIZE: int = 10000  # 批量导入每批插入行数
+    IMPORT_WORKERS: int = 0  # 多文件导入时解析文件的进程数，0表示使用全部CPU核数
+    
+    # Export Configuration
+    EXPORT_BATCH_SIZE: int = 5000  # 导出时每批读取行数（服务端游标）
+    
+    # Recalculation Configuration
+    RECALCULATE_CHUNK_SIZE: int = 5000  # SQL重新计算等级时每块的主键范围
+    
     # File paths
     BASE_DIR: Path = Path(__file__).resolve().parent
     LOG_DIR: Path = BASE_DIR / "logs"
@@ -5,6 +5,7 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
+from fastapi.encoders import jsonable_encoder
 from pydantic import ValidationError
 import logging
 import time
@@ -13,6 +14,12 @@ from contextlib import asynccontextmanager
 from config import settings
 from app.api.v1.api import api_router
 from app.core.security import clean_expired_tokens
+from app.db.init_db import init_db
+from starlette.concurrency import run_in_threadpool
+from app.db.base import SessionLocal, engine, optimize_sqlite
+from app.db.async_base import dispose_async_engine
+from app.db.pool import get_pool_status
+from app.services.snapshot_service import SnapshotService
 
 # 配置日志
 logging.basicConfig(
@@ -36,6 +43,21 @@ async def cleanup_expired_tokens():
         await asyncio.sleep(3600)
 
 
+# SQLite定期维护任务
+async def maintain_sqlite_database():
+    """定期执行PRAGMA optimize和WAL检查点"""
+    while True:
+        await asyncio.sleep(settings.SQLITE_MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            result = await run_in_threadpool(optimize_sqlite)
+            logger.info(
+                f"SQLite维护完成: WAL帧数{result['log_frames']}, 已写回{result['checkpointed_frames']}"
+                f"{'（有连接正在读写，剩余部分下次写回）' if result['busy'] else ''}"
+            )
+        except Exception as e:
+            logger.error(f"SQLite维护失败: {e}")
+
+
 # 应用生命周期管理
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -43,10 +65,33 @@ async def lifespan(app: FastAPI):
     # 启动时
     logger.info("应用启动中...")
     
+    # 创建缺失的数据表并补建汇总数据
+    init_db()
+    
+    # 大屏使用列式快照时预先构建
+    if settings.DASHBOARD_DATA_SOURCE == "snapshot":
+        db = SessionLocal()
+        try:
+            SnapshotService(db).rebuild()
+            snapshot_status = SnapshotService.get_status()
+            logger.info(
+                f"大屏列式快照已构建: {snapshot_status['row_count']}行, "
+                f"列数组{snapshot_status['column_memory_bytes'] / 1024 / 1024:.1f}MB, "
+                f"位图索引{snapshot_status['bitmap_count']}个/{snapshot_status['bitmap_memory_bytes'] / 1024 / 1024:.1f}MB"
+            )
+        finally:
+            db.close()
+    
     # 启动清理过期token的定时任务
     cleanup_task = asyncio.create_task(cleanup_expired_tokens())
     logger.info("定时清理任务已启动")
     
+    # SQLite数据库启动定期维护任务
+    maintenance_task = None
+    if engine.dialect.name == "sqlite" and settings.SQLITE_MAINTENANCE_INTERVAL_SECONDS > 0:
+        maintenance_task = asyncio.create_task(maintain_sqlite_database())
+        logger.info("SQLite定期维护任务已启动")
+    
     yield
     
     # 关闭时
@@ -56,6 +101,21 @@ async def lifespan(app: FastAPI):
         await cleanup_task
     except asyncio.CancelledError:
         logger.info("定时清理任务已停止")
+    
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+        try:
+            await maintenance_task
+        except asyncio.CancelledError:
+            logger.info("SQLite定期维护任务已停止")
+        # 关闭前更新查询规划统计
+        try:
+            await run_in_threadpool(optimize_sqlite)
+        except Exception as e:
+            logger.error(f"SQLite维护失败: {e}")
+    
+    # 关闭异步数据库连接池
+    await dispose_async_engine()
 
 
 # 创建FastAPI应用实例
@@ -104,7 +164,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
             "success": False,
             "message": "请求参数验证失败",
             "error_code": 422,
-            "errors": exc.errors()
+            "errors": jsonable_encoder(exc.errors())
         }
     )
 
@@ -119,7 +179,7 @@ async def pydantic_validation_exception_handler(request: Request, exc: Validatio
             "success": False,
             "message": "数据验证失败",
             "error_code": 422,
-            "errors": exc.errors()
+            "errors": jsonable_encoder(exc.errors())
         }
     )
 
@@ -187,6 +247,13 @@ async def health_check():
     }
 
 
+# 数据库连接池状态
+@app.get("/health/db-pool", summary="数据库连接池状态")
+async def database_pool_status():
+    """各数据库引擎的连接池配置、当前连接数和取连接等待时间统计"""
+    return get_pool_status()
+
+
 # 根路径
 @app.get("/", summary="根路径")
 async def root():
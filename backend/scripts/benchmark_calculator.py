@@ -0,0 +1,144 @@
+"""
+等级计算微基准脚本
+对比逐行计算等级的当前实现与原实现（逐级遍历阈值字典、每次调用构建等级数映射）的耗时，
+并校验两者结果一致
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.utils.water_quality_calculator import WaterQualityCalculator
+
+# 指标类型与随机数值上限（覆盖劣Ⅴ类）
+INDICATOR_RANGES = [
+    ('cod', 60.0),
+    ('ammonia_nitrogen', 3.0),
+    ('total_phosphorus', 0.6),
+    ('potassium_permanganate', 20.0)
+]
+
+
+def reference_indicator_level(indicator_type: str, value: Optional[float]) -> Optional[str]:
+    """原实现：逐级遍历阈值字典"""
+    if value is None:
+        return None
+    if indicator_type not in WaterQualityCalculator.QUALITY_STANDARDS:
+        return None
+    standards = WaterQualityCalculator.QUALITY_STANDARDS[indicator_type]
+    if value > standards['Ⅴ类']:
+        return '劣Ⅴ类'
+    if indicator_type == 'cod' and value == 15:
+        return 'Ⅱ类'
+    for level in ['Ⅰ类', 'Ⅱ类', 'Ⅲ类', 'Ⅳ类', 'Ⅴ类']:
+        if value <= standards[level]:
+            return level
+    return '劣Ⅴ类'
+
+
+def reference_comprehensive_level(*levels: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
+    """原实现：按优先级取最小值，每次调用构建等级数映射"""
+    valid_levels = [level for level in levels if level is not None]
+    if not valid_levels:
+        return None, None
+    worst_level = min(valid_levels, key=lambda x: WaterQualityCalculator.LEVEL_PRIORITY.get(x, 99))
+    level_number_map = {
+        '重度黑臭': 0,
+        '轻度黑臭': 0,
+        '劣Ⅴ类': 6,
+        'Ⅴ类': 5,
+        'Ⅳ类': 4,
+        'Ⅲ类': 3,
+        'Ⅱ类': 2,
+        'Ⅰ类': 1
+    }
+    return worst_level, level_number_map.get(worst_level, None)
+
+
+def reference_all_levels(cod_value: Optional[float], ammonia_nitrogen_value: Optional[float],
+                         total_phosphorus_value: Optional[float],
+                         potassium_permanganate_value: Optional[float]) -> Dict[str, Any]:
+    """原实现：计算单行的全部等级（结构与calculate_all_levels相同）"""
+    cod_level = reference_indicator_level('cod', cod_value)
+    ammonia_nitrogen_level = reference_indicator_level('ammonia_nitrogen', ammonia_nitrogen_value)
+    total_phosphorus_level = reference_indicator_level('total_phosphorus', total_phosphorus_value)
+    potassium_permanganate_level = reference_indicator_level('potassium_permanganate', potassium_permanganate_value)
+    comprehensive_level, level_number = reference_comprehensive_level(
+        cod_level, ammonia_nitrogen_level, total_phosphorus_level, potassium_permanganate_level
+    )
+    return {
+        'cod_level': cod_level,
+        'ammonia_nitrogen_level': ammonia_nitrogen_level,
+        'total_phosphorus_level': total_phosphorus_level,
+        'potassium_permanganate_level': potassium_permanganate_level,
+        'comprehensive_quality_level': comprehensive_level,
+        'comprehensive_level_number': level_number
+    }
+
+
+def generate_rows(row_count: int, seed: int) -> List[tuple]:
+    """生成随机指标数值（约5%缺失，并包含恰好等于阈值的数值）"""
+    rng = random.Random(seed)
+    thresholds = {
+        indicator_type: list(standards.values())
+        for indicator_type, standards in WaterQualityCalculator.QUALITY_STANDARDS.items()
+    }
+    rows = []
+    for _ in range(row_count):
+        row = []
+        for indicator_type, upper in INDICATOR_RANGES:
+            roll = rng.random()
+            if roll < 0.05:
+                row.append(None)
+            elif roll < 0.15:
+                row.append(float(rng.choice(thresholds[indicator_type])))
+            else:
+                row.append(round(rng.uniform(0, upper), 3))
+        rows.append(tuple(row))
+    return rows
+
+
+def measure(calculate: Callable[..., Dict[str, Any]], rows: List[tuple], repeat: int) -> float:
+    """多次执行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            calculate(*row)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="等级计算微基准")
+    parser.add_argument("--rows", type=int, default=100000, help="每轮计算的行数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数（取最短耗时）")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args()
+    
+    rows = generate_rows(args.rows, args.seed)
+    
+    mismatches = [
+        row for row in rows
+        if reference_all_levels(*row) != WaterQualityCalculator.calculate_all_levels(*row)
+    ]
+    if mismatches:
+        print(f"结果不一致: {len(mismatches)} 行，例如 {mismatches[0]}")
+        sys.exit(1)
+    print(f"结果一致: {len(rows)} 行")
+    
+    reference_seconds = measure(reference_all_levels, rows, args.repeat)
+    current_seconds = measure(WaterQualityCalculator.calculate_all_levels, rows, args.repeat)
+    
+    for name, seconds in (("原实现", reference_seconds), ("当前实现", current_seconds)):
+        print(f"{name}: {seconds:.3f} 秒，{seconds / len(rows) * 1e6:.2f} 微秒/行，{len(rows) / seconds:.0f} 行/秒")
+    print(f"加速比: {reference_seconds / current_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+查询执行计划检查脚本
+执行服务层的典型查询并输出执行计划，标记全表扫描（--strict 时存在全表扫描则返回非零退出码）
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.base import SessionLocal
+from app.db.index_advisor import analyze_service_queries
+from app.db.init_db import init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="检查服务层查询的执行计划")
+    parser.add_argument("--strict", action="store_true", help="存在全表扫描时返回非零退出码")
+    parser.add_argument("--verbose", action="store_true", help="输出所有查询的SQL和执行计划")
+    args = parser.parse_args()
+    
+    # 创建缺失的表和索引
+    init_db()
+    
+    db = SessionLocal()
+    try:
+        reports = analyze_service_queries(db)
+    finally:
+        db.close()
+    
+    flagged = [report for report in reports if report.full_scans]
+    
+    for report in reports:
+        if not args.verbose and not report.full_scans and not report.warnings:
+            continue
+        
+        status = "全表扫描" if report.full_scans else ("警告" if report.warnings else "正常")
+        print(f"[{status}] {report.source}")
+        print(f"  SQL: {' '.join(report.statement.split())}")
+        for line in report.plan:
+            print(f"    {line}")
+        print()
+    
+    print(f"共检查 {len(reports)} 条查询，{len(flagged)} 条存在全表扫描")
+    
+    if args.strict and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
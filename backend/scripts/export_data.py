@@ -0,0 +1,69 @@
+"""
+水质数据导出脚本
+
+按过滤条件将水质数据分批导出为CSV、NDJSON或Parquet文件（服务端游标逐批读取写入，内存占用与导出总量无关）。
+
+用法:
+    python scripts/export_data.py water_quality.parquet
+    python scripts/export_data.py 长广溪.parquet --river-name 长广溪 --start 2024-01-01 --end 2024-12-31
+    python scripts/export_data.py water_quality.ndjson.gz --format ndjson --gzip
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.base import SessionLocal
+from app.schemas.water_quality import WaterQualityQuery
+from app.services.export_service import EXPORT_FORMATS, GZIP_FORMATS, ExportService
+from app.utils.common import parse_datetime
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="水质数据导出脚本")
+    parser.add_argument("output", help="输出文件路径")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet", help="导出格式（默认parquet）")
+    parser.add_argument("--gzip", action="store_true", help="gzip压缩（仅csv、ndjson）")
+    parser.add_argument("--river-name", default=None, help="河道名称（子串匹配）")
+    parser.add_argument("--code", default=None, help="编号（子串匹配）")
+    parser.add_argument("--level", default=None, help="综合水质等级")
+    parser.add_argument("--start", default=None, help="取样开始日期")
+    parser.add_argument("--end", default=None, help="取样结束日期")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批读取行数（默认取配置EXPORT_BATCH_SIZE）")
+    return parser.parse_args()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    if args.gzip and args.format not in GZIP_FORMATS:
+        print(f"{args.format}格式不支持gzip压缩")
+        sys.exit(1)
+    
+    query = WaterQualityQuery(
+        river_name=args.river_name,
+        code=args.code,
+        comprehensive_quality_level=args.level,
+        sampling_date_start=parse_datetime(args.start) if args.start else None,
+        sampling_date_end=parse_datetime(args.end) if args.end else None
+    )
+    
+    start_time = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.output, "wb") as output:
+            for chunk in ExportService(db).iter_chunks(query, args.format, gzip=args.gzip, batch_size=args.batch_size):
+                output.write(chunk)
+    finally:
+        db.close()
+    
+    size = Path(args.output).stat().st_size
+    print(f"导出完成: {args.output}，{size / 1024 / 1024:.2f}MB，耗时 {time.perf_counter() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
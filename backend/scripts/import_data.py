@@ -1,19 +1,19 @@
 """
 数据导入脚本
 """
+import argparse
 import sys
 import os
 from pathlib import Path
-from datetime import datetime
-import pandas as pd
 from passlib.context import CryptContext
 
 # 添加项目根目录到路径
 sys.path.append(str(Path(__file__).parent.parent))
 
-from app.db.base import engine, Base, SessionLocal
-from app.models.water_quality import WaterQuality
+from app.db.base import SessionLocal
+from app.db.init_db import init_db
 from app.models.user import User
+from app.services.import_service import ImportService
 from config import settings
 
 # 密码加密上下文
@@ -23,152 +23,80 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def create_tables():
     """创建数据库表"""
     print("创建数据库表...")
-    Base.metadata.create_all(bind=engine)
+    # 同时补建新增的列和索引
+    init_db()
     print("数据库表创建完成")
 
 
-def clean_and_convert_data(df):
-    """清理和转换数据"""
-    print("清理和转换数据...")
-    
-    # 列名映射
-    column_mapping = {
-        '取样日期': 'sampling_date',
-        '取样时间': 'sampling_time',
-        '检测日期': 'detection_date',
-        '编号': 'code',
-        '河道名称': 'river_name',
-        'COD': 'cod_value',
-        'COD等级': 'cod_level',
-        '氨氮': 'ammonia_nitrogen_value',
-        '氨氮等级': 'ammonia_nitrogen_level',
-        '总磷': 'total_phosphorus_value',
-        '总磷等级': 'total_phosphorus_level',
-        '高锰酸钾': 'potassium_permanganate_value',
-        '高锰酸钾等级': 'potassium_permanganate_level',
-        '综合水质等级': 'comprehensive_quality_level',
-        '综合等级数': 'comprehensive_level_number',
-        '方式': 'method'
-    }
-    
-    # 重命名列
-    df = df.rename(columns=column_mapping)
-    
-    # 处理缺失值
-    df['sampling_time'] = df['sampling_time'].fillna("")
-    df['code'] = df['code'].fillna("")
-    df['method'] = df['method'].fillna("")
-    
-    # 数值型字段保持NaN，稍后处理
-    numeric_columns = ['cod_value', 'ammonia_nitrogen_value', 'total_phosphorus_value', 'potassium_permanganate_value']
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # 字符串型字段用空字符串填充
-    string_columns = ['cod_level', 'ammonia_nitrogen_level', 'total_phosphorus_level', 'potassium_permanganate_level', 'comprehensive_quality_level']
-    for col in string_columns:
-        df[col] = df[col].fillna("")
-    
-    # 综合等级数字段
-    df['comprehensive_level_number'] = pd.to_numeric(df['comprehensive_level_number'], errors='coerce')
-    
-    # 确保日期类型正确
-    df['sampling_date'] = pd.to_datetime(df['sampling_date'])
-    df['detection_date'] = pd.to_datetime(df['detection_date'])
-    
-    # 添加系统字段
-    df['created_at'] = datetime.now()
-    df['updated_at'] = datetime.now()
-    df['remarks'] = None
-    
-    print(f"数据清理完成，共 {len(df)} 条记录")
-    return df
-
-
-def import_excel_data(file_path):
-    """导入Excel数据"""
-    print(f"开始导入Excel数据: {file_path}")
+def import_excel_data(file_path, batch_size=None, replace=None, upsert=False):
+    """
+    流式导入水质数据文件
+    
+    Args:
+        file_path: 文件路径（.xlsx/.xlsm/.xls/.csv/.parquet/.arrow）
+        batch_size: 每批行数，默认取配置IMPORT_BATCH_SIZE
+        replace: 已有数据时是否清空（False为追加），None表示交互询问
+        upsert: 按自然键(编号+河道+取样日期+取样时间)插入或更新，保留现有数据且不交互询问
+    """
+    print(f"开始导入数据文件: {file_path}")
     
     # 检查文件是否存在
     if not os.path.exists(file_path):
         print(f"文件不存在: {file_path}")
         return False
     
+    # 创建数据库会话
+    db = SessionLocal()
+    import_service = ImportService(db)
+    
     try:
-        # 读取Excel文件
-        df = pd.read_excel(file_path)
-        print(f"成功读取Excel文件，共 {len(df)} 行数据")
-        
-        # 清理和转换数据
-        df_cleaned = clean_and_convert_data(df)
-        
-        # 创建数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有数据
-            existing_count = db.query(WaterQuality).count()
-            if existing_count > 0:
-                print(f"数据库中已有 {existing_count} 条记录")
+        # 检查是否已有数据
+        existing_count = import_service.count_water_quality()
+        if existing_count > 0 and not upsert:
+            print(f"数据库中已有 {existing_count} 条记录")
+            if replace is None:
                 response = input("是否清空现有数据并重新导入? (y/N): ")
-                if response.lower() == 'y':
-                    db.query(WaterQuality).delete()
-                    db.commit()
-                    print("已清空现有数据")
-                else:
+                if response.lower() != 'y':
                     print("跳过数据导入")
                     return True
-            
-            # 批量插入数据
-            print("开始批量插入数据...")
-            batch_size = 100
-            total_records = len(df_cleaned)
-            
-            for i in range(0, total_records, batch_size):
-                batch_data = df_cleaned.iloc[i:i+batch_size]
-                records = []
-                
-                for _, row in batch_data.iterrows():
-                    record = WaterQuality(
-                        sampling_date=row['sampling_date'],
-                        sampling_time=row['sampling_time'] if row['sampling_time'] else None,
-                        detection_date=row['detection_date'],
-                        code=row['code'] if row['code'] else None,
-                        river_name=row['river_name'],
-                        method=row['method'] if row['method'] else None,
-                        cod_value=row['cod_value'] if pd.notna(row['cod_value']) else None,
-                        cod_level=row['cod_level'] if row['cod_level'] else None,
-                        ammonia_nitrogen_value=row['ammonia_nitrogen_value'] if pd.notna(row['ammonia_nitrogen_value']) else None,
-                        ammonia_nitrogen_level=row['ammonia_nitrogen_level'] if row['ammonia_nitrogen_level'] else None,
-                        total_phosphorus_value=row['total_phosphorus_value'] if pd.notna(row['total_phosphorus_value']) else None,
-                        total_phosphorus_level=row['total_phosphorus_level'] if row['total_phosphorus_level'] else None,
-                        potassium_permanganate_value=row['potassium_permanganate_value'] if pd.notna(row['potassium_permanganate_value']) else None,
-                        potassium_permanganate_level=row['potassium_permanganate_level'] if row['potassium_permanganate_level'] else None,
-                        comprehensive_quality_level=row['comprehensive_quality_level'] if row['comprehensive_quality_level'] else None,
-                        comprehensive_level_number=row['comprehensive_level_number'] if pd.notna(row['comprehensive_level_number']) else None,
-                        created_at=row['created_at'],
-                        updated_at=row['updated_at'],
-                        remarks=row['remarks']
-                    )
-                    records.append(record)
-                
-                db.add_all(records)
-                db.commit()
-                print(f"已导入 {min(i + batch_size, total_records)}/{total_records} 条记录")
-            
-            print(f"数据导入完成，共导入 {total_records} 条记录")
-            return True
-            
-        except Exception as e:
-            print(f"导入数据时出错: {str(e)}")
-            db.rollback()
-            return False
-        finally:
-            db.close()
-            
+                replace = True
+            if replace:
+                import_service.clear_water_quality()
+                print("已清空现有数据")
+            else:
+                print("保留现有数据，追加导入")
+        
+        def report_progress(processed_count, elapsed_seconds):
+            rate = processed_count / elapsed_seconds if elapsed_seconds > 0 else 0
+            print(f"已处理 {processed_count} 条记录，{rate:.0f} 条/秒")
+        
+        mode = 'upsert' if upsert else 'insert'
+        print("开始按自然键插入或更新数据..." if upsert else "开始批量插入数据...")
+        result = import_service.import_file(
+            file_path, batch_size=batch_size, progress_callback=report_progress, mode=mode
+        )
+        
+        if upsert:
+            print(
+                f"数据导入完成，新增 {result['inserted_count']} 条，更新 {result['updated_count']} 条，"
+                f"未变化 {result['unchanged_count']} 条，文件内重复被覆盖 {result['duplicate_count']} 条，"
+                f"耗时 {result['elapsed_seconds']:.2f}s，{result['rows_per_second']:.0f} 条/秒"
+            )
+        else:
+            print(
+                f"数据导入完成，共导入 {result['inserted_count']} 条记录，"
+                f"耗时 {result['elapsed_seconds']:.2f}s，{result['rows_per_second']:.0f} 条/秒"
+            )
+        if result['skipped_count']:
+            print(f"跳过缺少取样日期、检测日期或河道名称的记录 {result['skipped_count']} 条")
+        return True
+        
     except Exception as e:
-        print(f"读取Excel文件时出错: {str(e)}")
+        print(f"导入数据时出错: {str(e)}")
+        db.rollback()
         return False
+    finally:
+        db.close()
 
 
 def create_admin_user():
@@ -208,8 +136,22 @@ def create_admin_user():
         db.close()
 
 
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="水质数据导入脚本")
+    parser.add_argument("file", nargs="?", default="437条水质数据.xlsx", help="数据文件路径（.xlsx/.xlsm/.xls/.csv/.parquet/.arrow）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批插入行数（默认取配置IMPORT_BATCH_SIZE）")
+    existing_group = parser.add_mutually_exclusive_group()
+    existing_group.add_argument("--replace", dest="replace", action="store_const", const=True, help="清空现有数据后导入")
+    existing_group.add_argument("--append", dest="replace", action="store_const", const=False, help="保留现有数据追加导入（与已有数据自然键重复时导入失败，重复导入请使用--upsert）")
+    existing_group.add_argument("--upsert", action="store_true", help="按自然键插入新数据、更新变化的数据，可重复执行")
+    return parser.parse_args()
+
+
 def main():
     """主函数"""
+    args = parse_args()
+    
     print("=" * 50)
     print("水质数据管理系统 - 数据导入脚本")
     print("=" * 50)
@@ -220,9 +162,8 @@ def main():
     # 创建管理员用户
     create_admin_user()
     
-    # 导入Excel数据
-    excel_file = "437条水质数据.xlsx"
-    if import_excel_data(excel_file):
+    # 导入数据文件
+    if import_excel_data(args.file, batch_size=args.batch_size, replace=args.replace, upsert=args.upsert):
         print("\n数据导入成功!")
     else:
         print("\n数据导入失败!")
@@ -0,0 +1,83 @@
+"""
+多文件并行导入脚本
+
+按目录或通配符批量导入数据文件：进程池并行解析，单连接批量写入，
+已成功导入的文件（按内容哈希）自动跳过。
+
+用法:
+    python scripts/import_files.py data/2024-05/
+    python scripts/import_files.py "data/**/*.xlsx" --workers 8 --upsert
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.base import SessionLocal
+from app.db.init_db import init_db
+from app.services.import_service import ImportService
+from app.utils.data_import import expand_file_paths
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="多文件并行导入水质数据")
+    parser.add_argument("paths", nargs="+", help="数据文件、目录或通配符（目录递归查找.xlsx/.xlsm/.xls/.csv/.parquet/.arrow）")
+    parser.add_argument("--workers", type=int, default=None, help="解析进程数（默认取配置IMPORT_WORKERS）")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批写入行数（默认取配置IMPORT_BATCH_SIZE）")
+    parser.add_argument("--upsert", action="store_true", help="按自然键插入新数据、更新变化的数据（未指定时直接插入，与已有数据自然键重复的文件导入失败）")
+    parser.add_argument("--force", action="store_true", help="忽略导入清单，重新导入已导入过的文件")
+    return parser.parse_args()
+
+
+def report_file(manifest):
+    """输出单个文件的导入结果"""
+    if manifest.status == "completed":
+        print(
+            f"[完成] {manifest.file_path}: 新增 {manifest.inserted_count} 条，更新 {manifest.updated_count} 条，"
+            f"未变化 {manifest.unchanged_count} 条，文件内重复被覆盖 {manifest.duplicate_count} 条，"
+            f"跳过无效行 {manifest.skipped_count} 条"
+        )
+    else:
+        print(f"[失败] {manifest.file_path}: {manifest.error_message}")
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    
+    file_paths = expand_file_paths(args.paths)
+    if not file_paths:
+        print("未找到可导入的数据文件")
+        sys.exit(1)
+    print(f"找到 {len(file_paths)} 个数据文件")
+    
+    init_db()
+    db = SessionLocal()
+    try:
+        result = ImportService(db).import_files(
+            file_paths,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            mode='upsert' if args.upsert else 'insert',
+            force=args.force,
+            progress_callback=report_file
+        )
+    finally:
+        db.close()
+    
+    print(
+        f"导入完成：成功 {result['completed_count']} 个文件，失败 {result['failed_count']} 个，"
+        f"已导入过跳过 {result['already_imported_count']} 个；"
+        f"新增 {result['inserted_count']} 条，更新 {result['updated_count']} 条，未变化 {result['unchanged_count']} 条，"
+        f"文件内重复被覆盖 {result['duplicate_count']} 条，"
+        f"耗时 {result['elapsed_seconds']:.2f}s，{result['rows_per_second']:.0f} 条/秒"
+    )
+    if result['failed_count']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+大屏汇总数据重建脚本（批量导入数据后执行）
+"""
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.base import engine, Base, SessionLocal
+import app.models  # noqa: F401
+from app.services.rollup_service import RollupService
+
+
+def rebuild_rollups():
+    """全量重建大屏汇总数据"""
+    print("开始重建大屏汇总数据...")
+    start_time = time.time()
+    
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    try:
+        cell_count = RollupService(db).rebuild()
+        print(f"汇总数据重建完成，共 {cell_count} 个汇总单元，耗时 {time.time() - start_time:.2f}s")
+        return True
+    except Exception as e:
+        print(f"重建汇总数据时出错: {str(e)}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    if not rebuild_rollups():
+        sys.exit(1)